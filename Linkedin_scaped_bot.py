@@ -1,94 +1,195 @@
 import os
 import json
+import random
+import asyncio
 import requests
+import httpx
 import time
+import socket
 import argparse
+import multiprocessing
 from dotenv import load_dotenv
-from database import init_db, upsert_job
+from database import init_db, bulk_upsert_jobs, rebuild_job_stats, compute_content_hash, store_salary_percentiles
+from analytics_snapshot import publish_data_version
+from query_planner import QueryPlanner
+from work_queue import WorkQueue, LEASE_SECONDS
+from metrics import REGISTRY, CONTENT_TYPE
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
+# Upsert latency and rows written are recorded by database.bulk_upsert_jobs
+FETCH_SECONDS = REGISTRY.histogram("scraper_fetch_duration_seconds", "JSearch request latency, one observation per attempt", ["query"])
+FETCH_RETRIES = REGISTRY.counter("scraper_fetch_retries_total", "JSearch requests retried after a 429", ["query"])
+FETCH_ERRORS = REGISTRY.counter("scraper_fetch_errors_total", "JSearch pages given up on", ["query", "reason"])
+JOBS_FETCHED = REGISTRY.counter("scraper_jobs_fetched_total", "Jobs returned by JSearch", ["query"])
+SLEEP_SECONDS = REGISTRY.counter("scraper_sleep_seconds_total", "Time spent waiting instead of fetching", ["reason"])
+CYCLE_SECONDS = REGISTRY.histogram("scraper_cycle_duration_seconds", "Duration of a whole scraping cycle")
+LAST_CYCLE = REGISTRY.gauge("scraper_last_cycle_timestamp_seconds", "Unix time the last scraping cycle finished")
+
+class TokenBucket:
+    """
+    Asyncio token bucket shared by every request of a cycle.
+    Refills `rate` tokens per second up to `capacity` (the allowed burst).
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+                SLEEP_SECONDS.inc(delay, reason="rate_limit")
+                await asyncio.sleep(delay)
+
 class LinkedInScraper:
-    def __init__(self):
-        self.api_key = os.getenv("RAPIDAPI_KEY")
+    def __init__(self, url=None, api_key=None):
+        # Scrape workers can each be given their own key, see run_worker_processes
+        self.api_key = api_key or os.getenv("RAPIDAPI_KEY")
         if not self.api_key:
             raise ValueError("RAPIDAPI_KEY not found in environment variables.")
         
-        self.url = "https://jsearch.p.rapidapi.com/search"
+        # JSEARCH_URL lets the scraper run against a local stub server
+        self.url = url or os.getenv("JSEARCH_URL", "https://jsearch.p.rapidapi.com/search")
         self.headers = {
             "x-rapidapi-key": self.api_key,
             "x-rapidapi-host": "jsearch.p.rapidapi.com"
         }
         
-    def fetch_jobs(self, query, country="CA", pages=1):
+    def _build_params(self, query, page, country):
+        return {
+            "query": query,
+            "page": str(page),
+            "num_pages": "1",
+            "country": country,
+            "date_posted": "week",
+            "employment_types": "FULLTIME, CONTRACTOR, PARTTIME, INTERN"
+        }
+        
+    def fetch_page(self, query, page, country="CA", max_retries=3):
+        """
+        Fetches a single page, retrying 429s with exponential backoff.
+        Returns the page's jobs, or None when the page could not be fetched.
+        """
+        backoff_time = 2
+        for attempt in range(max_retries + 1):
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Fetching page {page} for query: '{query}'...")
+            try:
+                with FETCH_SECONDS.time(query=query):
+                    response = requests.get(self.url, headers=self.headers, params=self._build_params(query, page, country))
+
+                if response.status_code == 429:
+                    if attempt < max_retries:
+                        print(f"Rate limit hit (429). Retrying in {backoff_time}s... (Attempt {attempt + 1}/{max_retries})")
+                        FETCH_RETRIES.inc(query=query)
+                        SLEEP_SECONDS.inc(backoff_time, reason="backoff")
+                        time.sleep(backoff_time)
+                        backoff_time *= 2
+                        continue
+                    print(f"Max retries reached for 429 error on '{query}' page {page}.")
+                    FETCH_ERRORS.inc(query=query, reason="rate_limited")
+                    return None
+
+                response.raise_for_status()
+                jobs = response.json().get('data', [])
+                JOBS_FETCHED.inc(len(jobs), query=query)
+                return jobs
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching data on page {page}: {e}")
+                FETCH_ERRORS.inc(query=query, reason="http")
+                return None
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+                FETCH_ERRORS.inc(query=query, reason="other")
+                return None
+        return None
+
+    def fetch_jobs(self, query, country="CA", pages=1, on_page=None):
         """
         Fetches job listings from JSearch API for a given query with retry logic.
+        on_page(query, page, jobs) is called after every page and can return False
+        to stop before the next one.
         """
         all_jobs = []
         
         for page in range(1, pages + 1):
-            max_retries = 3
-            retry_count = 0
-            backoff_time = 2
+            jobs = self.fetch_page(query, page, country)
+            if jobs is None:
+                print(f"Skipping the rest of query: '{query}'.")
+                return all_jobs # Exit on errors
             
-            while retry_count <= max_retries:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Fetching page {page} for query: '{query}'...")
+            keep_paging = on_page(query, page, jobs) if on_page else True
+            if not jobs:
+                print(f"No more jobs found for query: '{query}' on page {page}.")
+                return all_jobs
                 
-                querystring = {
-                    "query": query,
-                    "page": str(page),
-                    "num_pages": "1",
-                    "country": country,
-                    "date_posted": "week",
-                    "employment_types": "FULLTIME, CONTRACTOR, PARTTIME, INTERN"
-                }
-                
-                try:
-                    response = requests.get(self.url, headers=self.headers, params=querystring)
-                    
-                    if response.status_code == 429:
-                        retry_count += 1
-                        if retry_count <= max_retries:
-                            print(f"Rate limit hit (429). Retrying in {backoff_time}s... (Attempt {retry_count}/{max_retries})")
-                            time.sleep(backoff_time)
-                            backoff_time *= 2
-                            continue
-                        else:
-                            print("Max retries reached for 429 error. Skipping this query.")
-                            return all_jobs
-
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    jobs = data.get('data', [])
-                    if not jobs:
-                        print(f"No more jobs found for query: '{query}' on page {page}.")
-                        return all_jobs
-                        
-                    print(f"Found {len(jobs)} jobs on page {page}.")
-                    all_jobs.extend(jobs)
-                    
-                    # Sleep between pages
-                    if page < pages:
-                        time.sleep(2)
-                    break # Success, move to next page
-                        
-                except requests.exceptions.RequestException as e:
-                    print(f"Error fetching data on page {page}: {e}")
-                    return all_jobs # Exit for other errors
-                except Exception as e:
-                    print(f"An unexpected error occurred: {e}")
-                    return all_jobs
+            print(f"Found {len(jobs)} jobs on page {page}.")
+            all_jobs.extend(jobs)
+            if not keep_paging:
+                print(f"Page {page} of '{query}' was mostly known jobs, skipping the remaining pages.")
+                return all_jobs
+            
+            # Sleep between pages
+            if page < pages:
+                SLEEP_SECONDS.inc(2, reason="page_delay")
+                time.sleep(2)
                     
         return all_jobs
 
-    def process_and_save_jobs(self, jobs):
+    async def _fetch_page_async(self, client, limiter, query, page, country, max_retries=3):
         """
-        Processes raw job data and saves to the database.
+        Fetches a single page, retrying 429s with jittered exponential backoff.
+        Returns None when the page couldn't be fetched, like fetch_page.
         """
-        saved_count = 0
+        backoff_time = 2
+        for attempt in range(max_retries + 1):
+            await limiter.acquire()
+            try:
+                with FETCH_SECONDS.time(query=query):
+                    response = await client.get(self.url, headers=self.headers, params=self._build_params(query, page, country))
+                if response.status_code == 429:
+                    if attempt < max_retries:
+                        delay = backoff_time * random.uniform(0.5, 1.5)
+                        print(f"Rate limit hit (429) on '{query}' page {page}. Retrying in {delay:.1f}s... (Attempt {attempt + 1}/{max_retries})")
+                        FETCH_RETRIES.inc(query=query)
+                        SLEEP_SECONDS.inc(delay, reason="backoff")
+                        await asyncio.sleep(delay)
+                        backoff_time *= 2
+                        continue
+                    print(f"Max retries reached for 429 error on '{query}' page {page}. Skipping this page.")
+                    FETCH_ERRORS.inc(query=query, reason="rate_limited")
+                    return None
+
+                response.raise_for_status()
+                jobs = response.json().get('data', [])
+                JOBS_FETCHED.inc(len(jobs), query=query)
+                return jobs
+            except httpx.HTTPError as e:
+                print(f"Error fetching data on page {page} for '{query}': {e}")
+                FETCH_ERRORS.inc(query=query, reason="http")
+                return None
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+                FETCH_ERRORS.inc(query=query, reason="other")
+                return None
+        return None
+
+    def normalize_jobs(self, jobs):
+        """
+        Maps raw JSearch jobs to database records, skipping jobs without an id.
+        """
+        job_records = []
         for job in jobs:
             try:
                 job_record = {
@@ -104,38 +205,415 @@ class LinkedInScraper:
                     'is_remote': job.get('job_is_remote', False),
                     'employment_type': job.get('job_employment_type'),
                     'posted_at': job.get('job_posted_at_datetime_utc'),
-                    'raw_data': json.dumps(job)
+                    'latitude': job.get('job_latitude'),
+                    'longitude': job.get('job_longitude'),
+                    'min_salary': job.get('job_min_salary'),
+                    'max_salary': job.get('job_max_salary'),
+                    'salary_period': job.get('job_salary_period'),
+                    'raw_data': json.dumps(job),
+                    # Read by the enrichment stage in bulk_upsert_jobs, not stored as a column
+                    'job_highlights': job.get('job_highlights')
                 }
                 
                 if job_record['id']:
-                    upsert_job(job_record)
-                    saved_count += 1
+                    job_record['content_hash'] = compute_content_hash(job_record)
+                    job_records.append(job_record)
             except Exception as e:
                 print(f"Error processing job {job.get('job_id')}: {e}")
                 
-        return saved_count
+        return job_records
+
+    def process_and_save_jobs(self, jobs):
+        """
+        Processes raw job data and saves to the database in batches. New and changed
+        jobs get a role family and skill tags on the way in (see enrichment.py).
+        Returns {'new': ..., 'changed': ..., 'unchanged': ...} job counts.
+        """
+        return bulk_upsert_jobs(self.normalize_jobs(jobs))
+
+class PipelineStats:
+    """
+    Per-stage counters for the streaming scrape pipeline.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pages_fetched = 0
+        self.jobs_fetched = 0
+        self.jobs_normalized = 0
+        self.rows_written = 0
+        self.jobs_new = 0
+        self.jobs_changed = 0
+        self.jobs_unchanged = 0
+        self.batches_written = 0
+        self.fetch_seconds = 0.0
+        self.normalize_seconds = 0.0
+        self.write_seconds = 0.0
+        self.max_page_queue = 0
+        self.max_record_queue = 0
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "pages_fetched": self.pages_fetched,
+            "jobs_fetched": self.jobs_fetched,
+            "jobs_normalized": self.jobs_normalized,
+            "rows_written": self.rows_written,
+            "jobs_new": self.jobs_new,
+            "jobs_changed": self.jobs_changed,
+            "jobs_unchanged": self.jobs_unchanged,
+            "batches_written": self.batches_written,
+            "fetch_jobs_per_sec": round(self.jobs_fetched / elapsed, 1) if elapsed else 0,
+            "normalize_jobs_per_sec": round(self.jobs_normalized / self.normalize_seconds, 1) if self.normalize_seconds else 0,
+            "write_rows_per_sec": round(self.rows_written / self.write_seconds, 1) if self.write_seconds else 0,
+            "max_page_queue": self.max_page_queue,
+            "max_record_queue": self.max_record_queue,
+        }
+
+async def run_streaming_pipeline(scraper, queries, pages, country="CA", concurrency=5, rate=5.0,
+                                 queue_size=8, batch_size=500, stats=None, page_limits=None, on_page=None):
+    """
+    Fetch -> normalize -> batch-write pipeline connected by bounded queues.
+    Pages are persisted while later pages are still in flight, and fetchers block
+    on a full queue when the writer falls behind. page_limits overrides `pages` per
+    query, and on_page works as in LinkedInScraper.fetch_jobs.
+    """
+    stats = stats or PipelineStats()
+    page_queue = asyncio.Queue(maxsize=queue_size)
+    record_queue = asyncio.Queue(maxsize=queue_size)
+    limiter = TokenBucket(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_query(client, query):
+        query_pages = page_limits.get(query, pages) if page_limits else pages
+        for page in range(1, query_pages + 1):
+            started = time.perf_counter()
+            async with semaphore:
+                jobs = await scraper._fetch_page_async(client, limiter, query, page, country)
+            stats.fetch_seconds += time.perf_counter() - started
+            if jobs is None:
+                # A failed page isn't a call that found nothing, the planner never sees it
+                print(f"Giving up on query '{query}' at page {page}, the page could not be fetched.")
+                return
+            # on_page may query the database, keep it off the event loop
+            keep_paging = await asyncio.to_thread(on_page, query, page, jobs) if on_page else True
+            if not jobs:
+                print(f"No more jobs found for query: '{query}' on page {page}.")
+                return
+            stats.pages_fetched += 1
+            stats.jobs_fetched += len(jobs)
+            print(f"Found {len(jobs)} jobs on page {page} for query: '{query}'.")
+            await page_queue.put(jobs)
+            stats.max_page_queue = max(stats.max_page_queue, page_queue.qsize())
+            if not keep_paging:
+                print(f"Page {page} of '{query}' was mostly known jobs, skipping the remaining pages.")
+                return
 
-def run_scraping_cycle(scraper, queries, pages):
-    total_new_jobs = 0
+    async def normalize():
+        while True:
+            jobs = await page_queue.get()
+            if jobs is None:
+                await record_queue.put(None)
+                return
+            started = time.perf_counter()
+            job_records = scraper.normalize_jobs(jobs)
+            stats.normalize_seconds += time.perf_counter() - started
+            stats.jobs_normalized += len(job_records)
+            await record_queue.put(job_records)
+            stats.max_record_queue = max(stats.max_record_queue, record_queue.qsize())
+
+    async def flush(batch):
+        started = time.perf_counter()
+        # Run the blocking DB write off the event loop so fetching keeps going
+        counts = await asyncio.to_thread(bulk_upsert_jobs, batch, batch_size)
+        stats.write_seconds += time.perf_counter() - started
+        stats.rows_written += counts['new'] + counts['changed']
+        stats.jobs_new += counts['new']
+        stats.jobs_changed += counts['changed']
+        stats.jobs_unchanged += counts['unchanged']
+        stats.batches_written += 1
+
+    async def write():
+        batch = []
+        while True:
+            job_records = await record_queue.get()
+            if job_records is None:
+                break
+            batch.extend(job_records)
+            # Write as soon as the writer has caught up, batches grow when it falls behind
+            if len(batch) >= batch_size or record_queue.empty():
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+
+    normalizer = asyncio.create_task(normalize())
+    writer = asyncio.create_task(write())
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+            # A failing query (e.g. on_page losing the database) doesn't stop the others
+            results = await asyncio.gather(*(fetch_query(client, query) for query in queries), return_exceptions=True)
+    finally:
+        # The pages already queued are written before any error is raised
+        await page_queue.put(None)
+        await asyncio.gather(normalizer, writer)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+    return stats
+
+def run_scraping_cycle(scraper, queries, pages, use_async=False, concurrency=5, rate=5.0, planner=None):
+    """
+    Runs one scrape of every query and returns {'new': ..., 'changed': ..., 'unchanged': ...} job counts.
+    With a QueryPlanner, low-yield queries are skipped or fetched with fewer pages and
+    paging stops once a page is mostly known jobs.
+    """
+    started = time.perf_counter()
+    totals = {'new': 0, 'changed': 0, 'unchanged': 0}
     print(f"\n--- Starting Scraping Cycle at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---")
     
-    for query in queries:
-        jobs = scraper.fetch_jobs(query, pages=pages)
-        saved_count = scraper.process_and_save_jobs(jobs)
-        print(f"Successfully processed {saved_count} jobs for query: '{query}'.")
-        total_new_jobs += saved_count
-        # Add delay between different queries to avoid hitting rate limits
-        print("Waiting 3 seconds before next query...")
-        time.sleep(3)
+    if planner:
+        plan = [(query, query_pages) for query, query_pages in planner.plan(queries, pages) if query_pages]
+        print(f"Query plan: {len(plan)} of {len(queries)} queries, {sum(p for _, p in plan)} pages at most")
+        on_page = planner.page_done
+    else:
+        plan = [(query, pages) for query in queries]
+        on_page = None
+    
+    if use_async:
+        # The token bucket replaces the fixed sleeps between pages and queries,
+        # and pages are written while later ones are still being fetched
+        stats = asyncio.run(run_streaming_pipeline(
+            scraper, [query for query, _ in plan], pages, concurrency=concurrency, rate=rate,
+            page_limits=dict(plan), on_page=on_page
+        ))
+        summary = stats.summary()
+        print(f"Pipeline stats: {json.dumps(summary)}")
+        totals = {'new': stats.jobs_new, 'changed': stats.jobs_changed, 'unchanged': stats.jobs_unchanged}
+    else:
+        for query, query_pages in plan:
+            jobs = scraper.fetch_jobs(query, pages=query_pages, on_page=on_page)
+            counts = scraper.process_and_save_jobs(jobs)
+            print(f"Successfully processed {sum(counts.values())} jobs for query: '{query}' "
+                  f"({counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged).")
+            for key in totals:
+                totals[key] += counts[key]
+            # Add delay between different queries to avoid hitting rate limits
+            print("Waiting 3 seconds before next query...")
+            SLEEP_SECONDS.inc(3, reason="query_delay")
+            time.sleep(3)
         
-    print(f"Cycle complete! Total jobs processed/updated: {total_new_jobs}")
-    return total_new_jobs
+    if planner:
+        planner.finish()
+        print(f"Planner stats: {json.dumps(planner.summary())}")
+    
+    # Refreshes the salary percentiles served by /analytics, then stamps a new data version
+    # with its analytics snapshot, which invalidates the API response caches
+    store_salary_percentiles()
+    publish_data_version()
+    CYCLE_SECONDS.observe(time.perf_counter() - started)
+    LAST_CYCLE.set(time.time())
+    print(f"Cycle complete! Total jobs processed: {sum(totals.values())} "
+          f"({totals['new']} new, {totals['changed']} changed, {totals['unchanged']} unchanged)")
+    return totals
+
+def enqueue_scraping_cycle(queries, pages, planner=None, queue=None):
+    """
+    Plans a cycle and enqueues its pages for the scrape workers (see run_worker).
+    Returns the cycle id.
+    """
+    queue = queue or WorkQueue()
+    plan = planner.plan(queries, pages) if planner else [(query, pages) for query in queries]
+    cycle_id = queue.enqueue_cycle(plan, planned=planner is not None)
+    print(f"Enqueued cycle {cycle_id}: {sum(1 for _, p in plan if p)} of {len(queries)} queries, "
+          f"{sum(p for _, p in plan)} pages at most")
+    # A plan that skips every query has no task whose worker would finish the cycle
+    finish_queued_cycle(queue, cycle_id)
+    return cycle_id
+
+def finish_queued_cycle(queue, cycle_id):
+    """
+    Runs the end-of-cycle steps of run_scraping_cycle for a queued cycle, once none of
+    its tasks is pending or leased (failed ones included) and no other worker got there
+    first. Returns the cycle summary or None.
+    """
+    summary = queue.finish_cycle(cycle_id)
+    if summary is None:
+        return None
+    if summary['planned']:
+        planner = QueryPlanner()
+        planner.plan_pages = summary['plan']
+        planner.cycle = summary['queries']
+        planner.finish()
+        print(f"Planner stats: {json.dumps(planner.summary())}")
+    store_salary_percentiles()
+    publish_data_version()
+    CYCLE_SECONDS.observe((summary['finished_at'] - summary['created_at']).total_seconds())
+    LAST_CYCLE.set(time.time())
+    print(f"Cycle {cycle_id} complete! {summary['jobs_found']} jobs fetched ({summary['jobs_new']} new), "
+          f"{summary['tasks'].get('failed', 0)} pages failed")
+    return summary
+
+def run_worker(scraper, worker_id=None, queue=None, rate=5.0, poll_interval=1.0, exit_when_idle=False, country="CA"):
+    """
+    Claims (query, page) tasks from the work queue and fetches and writes one page per
+    task, at most `rate` requests per second. Runs until stopped or, with exit_when_idle,
+    until no task is pending or leased. A page is written before its task is marked
+    done, so a crash between the two only refetches the page, and rewriting it is a
+    no-op (see content_hash). Returns the number of tasks done.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = queue or WorkQueue()
+    planner = QueryPlanner()
+    planner_cycle = None
+    next_request = time.monotonic()
+    done = 0
+    while True:
+        try:
+            # A task given up here may have been the last open one of its cycle
+            for cycle_id in queue.expire_leases():
+                _finish_queued_cycle_safely(queue, cycle_id)
+            task = queue.claim(worker_id)
+        except Exception as e:
+            print(f"Error claiming a task: {e}")
+            task = None
+        if task is None:
+            if exit_when_idle and not queue.has_open_tasks():
+                print(f"Worker {worker_id} finished {done} tasks, the queue is empty.")
+                return done
+            time.sleep(poll_interval)
+            continue
+
+        if task.cycle_id != planner_cycle:
+            # The planner only tracks the job ids seen by this worker during a cycle
+            planner.seen, planner.cycle, planner_cycle = set(), {}, task.cycle_id
+        delay = next_request - time.monotonic()
+        if delay > 0:
+            SLEEP_SECONDS.inc(delay, reason="rate_limit")
+            time.sleep(delay)
+        next_request = time.monotonic() + (1 / rate if rate else 0)
+
+        try:
+            with queue.keep_alive(task.id, worker_id):
+                jobs = scraper.fetch_page(task.query, task.page, country)
+                if jobs is None:
+                    queue.fail(task, worker_id, "fetch failed")
+                    continue
+                keep_paging = planner.page_done(task.query, task.page, jobs) if task.early_stop else True
+                job_records = scraper.normalize_jobs(jobs)
+                counts = bulk_upsert_jobs(job_records)
+                # bulk_upsert_jobs counts every job it wrote, all zeros means it rolled back
+                if job_records and not sum(counts.values()):
+                    queue.fail(task, worker_id, "write failed")
+                    continue
+            if queue.complete(task, worker_id, len(jobs), counts['new'], bool(jobs) and keep_paging):
+                done += 1
+                print(f"Saved page {task.page} of '{task.query}': {len(jobs)} jobs "
+                      f"({counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged).")
+        except Exception as e:
+            print(f"Error processing task {task.id} ('{task.query}' page {task.page}): {e}")
+            try:
+                queue.fail(task, worker_id, e)
+            except Exception as fail_error:
+                print(f"Error releasing task {task.id}, it will be retried when its lease runs out: {fail_error}")
+        finally:
+            # Also after a failure, a task that has used up its attempts can be the cycle's last
+            _finish_queued_cycle_safely(queue, task.cycle_id)
+
+def _finish_queued_cycle_safely(queue, cycle_id):
+    try:
+        finish_queued_cycle(queue, cycle_id)
+    except Exception as e:
+        print(f"Error finishing cycle {cycle_id}: {e}")
+
+def _worker_process(index, api_key, url, rate, lease_seconds, poll_interval):
+    scraper = LinkedInScraper(url=url, api_key=api_key)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    run_worker(scraper, worker_id, WorkQueue(lease_seconds), rate, poll_interval, exit_when_idle=True)
+
+def run_worker_processes(count, api_keys=None, url=None, rate=5.0, lease_seconds=LEASE_SECONDS, poll_interval=1.0):
+    """
+    Runs count worker processes until the queue is empty. api_keys are handed out to the
+    workers in turn, so each key gets its own rate limit. Returns the exit codes.
+    """
+    api_keys = api_keys or [None]
+    # Spawned rather than forked, the children must not share the parent's pooled connections
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_worker_process, args=(index, api_keys[index % len(api_keys)], url, rate, lease_seconds, poll_interval))
+        for index in range(count)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return [process.exitcode for process in processes]
+
+def export_metrics(metrics_file=None, pushgateway=None):
+    """
+    Writes the scraper's metrics for node_exporter's textfile collector and/or
+    pushes them to a Prometheus Pushgateway.
+    """
+    if metrics_file:
+        REGISTRY.write(metrics_file)
+    if pushgateway:
+        try:
+            response = requests.put(
+                f"{pushgateway.rstrip('/')}/metrics/job/jobs_scraper", data=REGISTRY.render().encode(),
+                headers={"Content-Type": CONTENT_TYPE}, timeout=10
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error pushing metrics to {pushgateway}: {e}")
+
+# One search per role family, see enrichment.ROLE_FAMILIES
+QUERIES = [
+    "Software Engineer jobs in Canada",
+    "Data Scientist jobs in Canada",
+    "Frontend Developer jobs in Canada",
+    "Backend Developer jobs in Canada",
+    "Data Analyst jobs in Canada",
+    "Machine Learning Engineer jobs in Canada",
+    "Data Engineer jobs in Canada",
+    "Business Analyst jobs in Canada",
+    "Project Manager jobs in Canada",
+    "Product Manager jobs in Canada",
+    "QA Engineer jobs in Canada",
+    "DevOps Engineer jobs in Canada",
+    "Cloud Engineer jobs in Canada",
+    "AI Engineer jobs in Canada",
+    "MLOps Engineer jobs in Canada",
+    "Data Visualization Engineer jobs in Canada",
+    "Data Architect jobs in Canada",
+    "Data Governance Engineer jobs in Canada",
+    "Data Quality Engineer jobs in Canada",
+    "Data Integration Engineer jobs in Canada",
+    "Data Migration Engineer jobs in Canada",
+    "Data Warehouse Engineer jobs in Canada",
+    "Data Lake Engineer jobs in Canada",
+    "Data Mesh Engineer jobs in Canada",
+    "Data Fabric Engineer jobs in Canada",
+    "DataOps Engineer jobs in Canada",
+]
 
 def main():
     parser = argparse.ArgumentParser(description="LinkedIn Job Scraper Bot")
     parser.add_argument("--loop", action="store_true", help="Run the scraper in a continuous loop")
     parser.add_argument("--interval", type=float, default=24.0, help="Interval between loops in hours (default: 24)")
     parser.add_argument("--pages", type=int, default=2, help="Number of pages to scrape per query (default: 2)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Fetch concurrently and stream pages into the database")
+    parser.add_argument("--concurrency", type=int, default=5, help="Max in-flight requests in --async mode (default: 5)")
+    parser.add_argument("--rate", type=float, default=5.0, help="Max requests per second in --async mode, or per worker (default: 5)")
+    parser.add_argument("--no-planner", action="store_true", help="Fetch every query for --pages pages, ignoring past yields")
+    parser.add_argument("--enqueue", action="store_true", help="Enqueue a cycle for the scrape workers instead of scraping (with --loop, every --interval hours)")
+    parser.add_argument("--worker", action="store_true", help="Run a scrape worker that processes queued cycles")
+    parser.add_argument("--workers", type=int, help="Enqueue a cycle and run this many worker processes until it is done")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Stop the --worker once the queue is empty")
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help=f"Seconds a worker's task stays leased without a heartbeat (default: {LEASE_SECONDS})")
+    parser.add_argument("--rebuild-stats", action="store_true", help="Recompute the analytics rollups from the jobs table and exit")
+    parser.add_argument("--metrics-file", default=os.getenv("SCRAPER_METRICS_FILE"), help="Write Prometheus metrics here after each cycle")
+    parser.add_argument("--pushgateway", default=os.getenv("PUSHGATEWAY_URL"), help="Push Prometheus metrics to this Pushgateway after each cycle")
     args = parser.parse_args()
 
     print("--- LinkedIn Job Scraper Bot ---")
@@ -143,44 +621,51 @@ def main():
     # Initialize Database
     init_db()
     
-    scraper = LinkedInScraper()
+    if args.rebuild_stats:
+        rebuild_job_stats()
+        return
     
-    queries = [
-        "Software Engineer jobs in Canada",
-        "Data Scientist jobs in Canada",
-        "Frontend Developer jobs in Canada",
-        "Backend Developer jobs in Canada",
-        "Data Analyst jobs in Canada",
-        "Machine Learning Engineer jobs in Canada",
-        "Data Engineer jobs in Canada",
-        "Business Analyst jobs in Canada",
-        "Project Manager jobs in Canada",
-        "Product Manager jobs in Canada",
-        "QA Engineer jobs in Canada",
-        "DevOps Engineer jobs in Canada",
-        "Cloud Engineer jobs in Canada",
-        "AI Engineer jobs in Canada",
-        "MLOps Engineer jobs in Canada",
-        "Data Visualization Engineer jobs in Canada",
-        "Data Architect jobs in Canada",
-        "Data Governance Engineer jobs in Canada",
-        "Data Quality Engineer jobs in Canada",
-        "Data Integration Engineer jobs in Canada",
-        "Data Migration Engineer jobs in Canada",
-        "Data Warehouse Engineer jobs in Canada",
-        "Data Lake Engineer jobs in Canada",
-        "Data Mesh Engineer jobs in Canada",
-        "Data Fabric Engineer jobs in Canada",
-        "DataOps Engineer jobs in Canada",
-    ]
+    planner = None if args.no_planner else QueryPlanner()
+    queue = WorkQueue(args.lease)
+    
+    if args.enqueue:
+        while True:
+            enqueue_scraping_cycle(QUERIES, args.pages, planner, queue)
+            if not args.loop:
+                return
+            print(f"Next cycle in {args.interval} hours. Press Ctrl+C to stop.")
+            time.sleep(args.interval * 3600)
+    
+    if args.worker:
+        # Each worker process can run with its own RAPIDAPI_KEY
+        run_worker(LinkedInScraper(), queue=queue, rate=args.rate, exit_when_idle=args.exit_when_idle)
+        export_metrics(args.metrics_file, args.pushgateway)
+        return
+    
+    if args.workers:
+        # RAPIDAPI_KEYS=key1,key2,... spreads the workers over several keys
+        api_keys = [key.strip() for key in os.getenv("RAPIDAPI_KEYS", "").split(",") if key.strip()] or [os.getenv("RAPIDAPI_KEY")]
+        if not any(api_keys):
+            raise ValueError("RAPIDAPI_KEY not found in environment variables.")
+        while True:
+            enqueue_scraping_cycle(QUERIES, args.pages, planner, queue)
+            run_worker_processes(args.workers, api_keys, rate=args.rate, lease_seconds=args.lease)
+            if not args.loop:
+                return
+            print(f"Next run in {args.interval} hours. Press Ctrl+C to stop.")
+            time.sleep(args.interval * 3600)
+    
+    scraper = LinkedInScraper()
     
     if args.loop:
         while True:
-            run_scraping_cycle(scraper, queries, args.pages)
+            run_scraping_cycle(scraper, QUERIES, args.pages, args.use_async, args.concurrency, args.rate, planner)
+            export_metrics(args.metrics_file, args.pushgateway)
             print(f"Next run in {args.interval} hours. Press Ctrl+C to stop.")
             time.sleep(args.interval * 3600)
     else:
-        run_scraping_cycle(scraper, queries, args.pages)
+        run_scraping_cycle(scraper, QUERIES, args.pages, args.use_async, args.concurrency, args.rate, planner)
+        export_metrics(args.metrics_file, args.pushgateway)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,178 @@
+import io
+import threading
+from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import select, func, desc
+from database import engine, SessionLocal, Job, JobSkill, AnalyticsSnapshot, get_data_version, new_data_version, stamp_data_version, bump_data_version
+from salary import salary_distribution
+
+# pandas and pyarrow are imported on first use, the API imports this module at startup
+# but only needs them for the /analytics fallback
+@lru_cache(maxsize=None)
+def _pyarrow():
+    # pyarrow is optional: without it the snapshot is skipped and analytics read the columns with pd.read_sql
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None, None
+    return pa, pq
+
+# The only columns /analytics needs
+ANALYTICS_COLUMNS = ['title', 'posted_at', 'city', 'state', 'country', 'is_remote', 'employment_type', 'role_family',
+                     'annual_salary_min', 'annual_salary_max']
+TOP_SKILLS = 20
+
+_cache_lock = threading.Lock()
+_cached_frame = (None, None)
+
+def read_analytics_frame(bind=None):
+    """
+    Reads the analytics columns straight into a DataFrame, without building ORM objects.
+    """
+    import pandas as pd
+    columns = [getattr(Job, col) for col in ANALYTICS_COLUMNS]
+    df = pd.read_sql(select(*columns), bind if bind is not None else engine)
+    df['posted_at'] = pd.to_datetime(df['posted_at'], errors='coerce')
+    return df
+
+def read_top_skills(bind=None):
+    """
+    The TOP_SKILLS most common skills in job_skills with their job counts, for the
+    fallback path. The snapshot only holds jobs columns, so these are always queried.
+    """
+    jobs = func.count(JobSkill.job_id).label('jobs')
+    statement = select(JobSkill.skill, jobs).group_by(JobSkill.skill).order_by(desc(jobs), JobSkill.skill).limit(TOP_SKILLS)
+    if bind is None:
+        with engine.connect() as connection:
+            rows = connection.execute(statement).all()
+    else:
+        rows = bind.execute(statement).all()
+    return [{"name": skill, "count": int(count)} for skill, count in rows]
+
+def write_analytics_snapshot(data_version, stamp=False):
+    """
+    Stores a Parquet snapshot of the analytics columns tagged with data_version.
+    It lives in the database so the API can use it even when the scraper runs elsewhere.
+    With stamp, data_version is stamped in the same transaction (see publish_data_version).
+    """
+    pa, pq = _pyarrow()
+    if pq is None:
+        print("pyarrow is not installed, skipping the analytics snapshot")
+        return False
+    df = read_analytics_frame()
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer, compression='zstd')
+    db = SessionLocal()
+    try:
+        db.merge(AnalyticsSnapshot(name='analytics', data_version=data_version, data=buffer.getvalue(), created_at=datetime.utcnow()))
+        if stamp:
+            stamp_data_version(db, data_version)
+        db.commit()
+        print(f"Wrote analytics snapshot of {len(df)} jobs ({buffer.tell() / 1024:.0f} KB)")
+        return True
+    except Exception as e:
+        print(f"Error writing analytics snapshot: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+def publish_data_version():
+    """
+    Stamps a new data version together with its analytics snapshot, in one transaction.
+    An API worker that sees the new version then always finds its snapshot, instead of
+    caching a pd.read_sql frame for it. Without a snapshot (no pyarrow, or it failed)
+    the version is stamped alone. Returns the version, or None when it wasn't stamped.
+    """
+    version = new_data_version()
+    if write_analytics_snapshot(version, stamp=True):
+        return version
+    return bump_data_version(version)
+
+def _read_snapshot(data_version):
+    pa, pq = _pyarrow()
+    if pq is None or data_version is None:
+        return None
+    db = SessionLocal()
+    try:
+        data = db.query(AnalyticsSnapshot.data).filter(
+            AnalyticsSnapshot.name == 'analytics',
+            AnalyticsSnapshot.data_version == data_version
+        ).scalar()
+    finally:
+        db.close()
+    if data is None:
+        return None
+    # Arrow reads the Parquet buffer in place, no per-row Python objects are created
+    table = pq.read_table(pa.BufferReader(data))
+    if table.column_names != ANALYTICS_COLUMNS:
+        # Written before the analytics columns changed
+        return None
+    return table.to_pandas()
+
+def load_analytics_frame():
+    """
+    Returns the analytics DataFrame for the current data version, decoded from the
+    snapshot when it is current, otherwise read with pd.read_sql. Kept in memory
+    until the data version changes.
+    """
+    global _cached_frame
+    data_version = get_data_version()
+    with _cache_lock:
+        cached_version, cached = _cached_frame
+        if cached is not None and cached_version == data_version:
+            return cached
+    df = _read_snapshot(data_version)
+    if df is None:
+        df = read_analytics_frame()
+    with _cache_lock:
+        _cached_frame = (data_version, df)
+    return df
+
+def analytics_from_frame(df, top_skills=None):
+    """
+    Computes the /analytics payload with vectorized pandas operations, top_skills
+    comes from read_top_skills.
+    """
+    if df.empty:
+        return {
+            "total_jobs": 0,
+            "remote_percent": 0,
+            "top_cities": [],
+            "employment_types": []
+        }
+    
+    total_jobs = len(df)
+    remote_jobs = int((df['is_remote'] == True).sum())
+    remote_percent = remote_jobs / total_jobs * 100
+    
+    top_cities = df['city'].value_counts().head(5)
+    emp_types = df['employment_type'].value_counts()
+    role_families = df['role_family'].value_counts()
+    number_computer_jobs = int(df['title'].str.contains('computer', case=False, na=False, regex=False).sum())
+    
+    salaried = df[df['annual_salary_min'].notna()]
+    salaries = (salaried['annual_salary_min'] + salaried['annual_salary_max']) / 2
+    salary_percentiles = salary_distribution(
+        salaries.groupby(salaried['employment_type']).agg(list).to_dict(),
+        salaries.groupby(salaried['city']).agg(list).to_dict()
+    )
+    
+    # Count per day on the datetime values, only the handful of distinct days get formatted
+    jobs_by_day = df['posted_at'].dt.normalize().value_counts().sort_index()
+    jobs_by_day.index = jobs_by_day.index.strftime('%Y-%m-%d')
+    today_str = datetime.now().date().isoformat()
+    
+    return {
+        "total_jobs": int(total_jobs),
+        "remote_percent": round(float(remote_percent), 1),
+        "top_cities": [{"name": name, "count": int(count)} for name, count in top_cities.items()],
+        "employment_types": [{"type": name, "count": int(count)} for name, count in emp_types.items()],
+        "number_computer_jobs": number_computer_jobs,
+        "number_of_jobs_today": int(jobs_by_day.get(today_str, 0)),
+        "number_of_jobs_by_days": [{"name": day, "count": int(count)} for day, count in jobs_by_day.items()],
+        "role_families": [{"name": name, "count": int(count)} for name, count in role_families.items()],
+        "top_skills": top_skills or [],
+        "salary_percentiles": salary_percentiles
+    }
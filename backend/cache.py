@@ -0,0 +1,146 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from database import get_data_version, get_data_version_async
+
+# orjson is optional: without it responses are encoded with jsonable_encoder and json.dumps
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def encode_json(payload):
+    """
+    Serializes a response payload to JSON bytes, with orjson when it's installed.
+    Payloads orjson can't encode (non-string keys, pydantic models) take the stdlib path.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(jsonable_encoder(payload)).encode()
+
+class ResponseCache:
+    """
+    In-process LRU cache of serialized JSON responses with a TTL per entry.
+    Entries are dropped as soon as the data version stamped by the scraper changes,
+    which keeps several uvicorn workers coherent without a shared cache service.
+    """
+    def __init__(self, max_entries=256, ttl=300, version_check_interval=2.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _version_check_due(self):
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return False
+        self._version_checked_at = now
+        return True
+
+    def _set_version(self, version):
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = version
+
+    @staticmethod
+    def make_key(request):
+        # Parameter order and empty values don't change the response
+        params = sorted((k, v.strip()) for k, v in request.query_params.multi_items() if v.strip())
+        return request.url.path, tuple(params)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[2] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, etag):
+        with self._lock:
+            self._entries[key] = (body, etag, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _store(self, key, payload):
+        # build() may return the serialized body itself, e.g. /jobs assembled from fragments
+        body = payload if isinstance(payload, bytes) else encode_json(payload)
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.put(key, body, etag)
+        return body, etag
+
+    def _response(self, request, body, etag):
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def respond(self, request, build):
+        """
+        Returns the cached response for this request, or calls build() for the payload.
+        Answers 304 when If-None-Match matches the current ETag.
+        """
+        if self._version_check_due():
+            self._set_version(get_data_version())
+        key = self.make_key(request)
+        entry = self.get(key)
+        if entry is None:
+            self.misses += 1
+            body, etag = self._store(key, build())
+        else:
+            self.hits += 1
+            body, etag, _ = entry
+        return self._response(request, body, etag)
+
+    async def respond_async(self, request, build):
+        """
+        Same as respond() for async handlers, build is awaited.
+        """
+        if self._version_check_due():
+            self._set_version(await get_data_version_async())
+        key = self.make_key(request)
+        entry = self.get(key)
+        if entry is None:
+            self.misses += 1
+            body, etag = self._store(key, await build())
+        else:
+            self.hits += 1
+            body, etag, _ = entry
+        return self._response(request, body, etag)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "data_version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,292 @@
+import bisect
+import threading
+import time
+from collections import Counter
+from sqlalchemy import select
+from database import engine, Job, get_data_version, normalize_filter_value
+from enrichment import find_role_family
+
+# Counted dimensions, then the dimensions only used to filter (matched like build_jobs_query)
+FACETS = ['city', 'state', 'employment_type', 'remote', 'posted_day']
+FILTER_DIMENSIONS = ['city_norm', 'state_norm', 'country_norm', 'employment_type_norm', 'role_family', 'canonical']
+DIMENSIONS = FACETS + FILTER_DIMENSIONS
+# Rows are numbered in location order at a full build, so the members of a location value
+# sit close together and its bitmap spans few rows. Jobs added since then get new numbers at
+# the end, past this share of the rows the index is rebuilt to restore the order.
+REBUILD_APPENDED_RATIO = 0.25
+# Below this many matching rows the facets are tallied row by row instead of intersected
+ROW_TALLY_LIMIT = 2000
+
+class Bitmap:
+    """
+    Immutable set of row numbers stored as a Python int shifted down to its lowest row,
+    so a bitmap costs one bit per row between its first and last member. AND, OR and
+    popcount run on the int in C. This is an uncompressed bitset, not a roaring bitmap:
+    there are no run or array containers, so the values spread over the whole table
+    (remote, posted_day, employment_type) cost one bit per job each.
+    """
+    __slots__ = ('low', 'bits')
+
+    def __init__(self, bits=0, low=0):
+        if bits:
+            shift = (bits & -bits).bit_length() - 1
+            bits >>= shift
+            low += shift
+        else:
+            low = 0
+        self.low = low
+        self.bits = bits
+
+    @classmethod
+    def from_rows(cls, rows):
+        if not rows:
+            return EMPTY
+        low = min(rows)
+        buffer = bytearray((max(rows) - low) // 8 + 1)
+        for row in rows:
+            offset = row - low
+            buffer[offset >> 3] |= 1 << (offset & 7)
+        return cls(int.from_bytes(buffer, 'little'), low)
+
+    def __and__(self, other):
+        if not self.bits or not other.bits:
+            return EMPTY
+        low = max(self.low, other.low)
+        return Bitmap((self.bits >> (low - self.low)) & (other.bits >> (low - other.low)), low)
+
+    def __or__(self, other):
+        if not self.bits:
+            return other
+        if not other.bits:
+            return self
+        low = min(self.low, other.low)
+        return Bitmap((self.bits << (self.low - low)) | (other.bits << (other.low - low)), low)
+
+    def __sub__(self, other):
+        if not self.bits or not other.bits:
+            return self
+        shift = other.low - self.low
+        other_bits = other.bits << shift if shift >= 0 else other.bits >> -shift
+        # Members of other below self.low can't be in self, the right shift drops them
+        return Bitmap(self.bits & ~other_bits, self.low)
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __iter__(self):
+        bits = self.bits
+        position = self.low
+        while bits:
+            lowest = bits & -bits
+            offset = lowest.bit_length() - 1
+            yield position + offset
+            bits ^= lowest
+
+EMPTY = Bitmap()
+
+def _row_keys(job):
+    posted_at = job.posted_at
+    return (
+        job.city,
+        job.state,
+        job.employment_type,
+        job.is_remote,
+        posted_at.date().isoformat() if posted_at else None,
+        job.city_norm,
+        job.state_norm,
+        job.country_norm,
+        job.employment_type_norm,
+        job.role_family,
+        job.cluster_id == job.id,
+    )
+
+_COLUMNS = [
+    Job.id, Job.change_seq, Job.city, Job.state, Job.employment_type, Job.is_remote, Job.posted_at,
+    Job.city_norm, Job.state_norm, Job.country_norm, Job.employment_type_norm, Job.role_family, Job.cluster_id
+]
+
+class FacetIndex:
+    """
+    In-memory bitmap indexes over the jobs table for /jobs/facets: one bitmap of row
+    numbers per value of each dimension. A facet query intersects the filter bitmaps and
+    counts the overlap with every facet value. The index follows the data version stamped
+    by the scraper, only the jobs written since its last change_seq are re-read after a scrape.
+    """
+    def __init__(self, version_check_interval=2.0):
+        self.version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self._built = False
+        self._rows = {}
+        self._last_seq = 0
+        self._keys = []
+        self._all = EMPTY
+        self._bitmaps = {dimension: {} for dimension in DIMENSIONS}
+        self._sorted_values = {}
+        self._built_rows = 0
+        self.full_builds = 0
+        self.incremental_refreshes = 0
+
+    def refresh(self, force=False):
+        """
+        Brings the index up to the current data version. Returns True when it changed.
+        """
+        now = time.monotonic()
+        if self._built and not force and now - self._version_checked_at < self.version_check_interval:
+            return False
+        with self._refresh_lock:
+            self._version_checked_at = time.monotonic()
+            version = get_data_version()
+            if self._built and not force and version == self._version:
+                return False
+            if not self._built or force or len(self._keys) - self._built_rows > self._built_rows * REBUILD_APPENDED_RATIO:
+                self._build()
+            else:
+                self._update()
+            self._version = version
+            return True
+
+    def _build(self):
+        bitmaps = {dimension: {} for dimension in DIMENSIONS}
+        rows, keys = {}, []
+        last_seq = 0
+        order = [Job.country_norm, Job.state_norm, Job.city_norm, Job.id]
+        with engine.connect() as conn:
+            for job in conn.execute(select(*_COLUMNS).order_by(*order)):
+                rows[job.id] = len(keys)
+                keys.append(_row_keys(job))
+                last_seq = max(last_seq, job.change_seq or 0)
+        members = [{} for _ in DIMENSIONS]
+        for row, row_keys in enumerate(keys):
+            for position, value in enumerate(row_keys):
+                members[position].setdefault(value, []).append(row)
+        for position, dimension in enumerate(DIMENSIONS):
+            bitmaps[dimension] = {value: Bitmap.from_rows(value_rows) for value, value_rows in members[position].items()}
+        with self._lock:
+            self._rows, self._keys, self._last_seq = rows, keys, last_seq
+            self._all = Bitmap((1 << len(keys)) - 1)
+            self._bitmaps = bitmaps
+            self._sorted_values = {}
+            self._built_rows = len(keys)
+            self._built = True
+            self.full_builds += 1
+
+    def _update(self):
+        # Jobs are never deleted, new and changed jobs carry a change_seq past the last one seen
+        with engine.connect() as conn:
+            jobs = conn.execute(select(*_COLUMNS).where(Job.change_seq > self._last_seq)).all()
+
+        with self._lock:
+            added = {}
+            removed = {}
+            new_rows = []
+            for job in jobs:
+                row_keys = _row_keys(job)
+                row = self._rows.get(job.id)
+                if row is None:
+                    row = len(self._keys)
+                    self._rows[job.id] = row
+                    self._keys.append(row_keys)
+                    new_rows.append(row)
+                    for dimension, value in zip(DIMENSIONS, row_keys):
+                        added.setdefault((dimension, value), []).append(row)
+                    continue
+                # Changed job: it keeps its row number, only the values that moved are touched
+                for dimension, old, new in zip(DIMENSIONS, self._keys[row], row_keys):
+                    if old != new:
+                        removed.setdefault((dimension, old), []).append(row)
+                        added.setdefault((dimension, new), []).append(row)
+                self._keys[row] = row_keys
+            self._last_seq = max([self._last_seq] + [job.change_seq for job in jobs])
+
+            for (dimension, value), rows in removed.items():
+                values = self._bitmaps[dimension]
+                remaining = values.get(value, EMPTY) - Bitmap.from_rows(rows)
+                if remaining.bits:
+                    values[value] = remaining
+                else:
+                    values.pop(value, None)
+                    self._sorted_values.pop(dimension, None)
+            for (dimension, value), rows in added.items():
+                values = self._bitmaps[dimension]
+                if value not in values:
+                    self._sorted_values.pop(dimension, None)
+                values[value] = values.get(value, EMPTY) | Bitmap.from_rows(rows)
+            self._all = self._all | Bitmap.from_rows(new_rows)
+            self.incremental_refreshes += 1
+
+    def _prefix_bitmap(self, dimension, prefix):
+        values = self._sorted_values.get(dimension)
+        if values is None:
+            values = self._sorted_values[dimension] = sorted(value for value in self._bitmaps[dimension] if value)
+        result = EMPTY
+        for value in values[bisect.bisect_left(values, prefix):]:
+            if not value.startswith(prefix):
+                break
+            result |= self._bitmaps[dimension][value]
+        return result
+
+    def bitmap_for_ids(self, ids):
+        with self._lock:
+            return Bitmap.from_rows([self._rows[job_id] for job_id in ids if job_id in self._rows])
+
+    def facets(self, location=None, remote=None, type=None, role=None, collapse=False, matching=None, limit=20):
+        """
+        Counts per facet value for the jobs matching the filters. matching is an optional
+        Bitmap (see bitmap_for_ids) for the filters that aren't indexed here.
+        """
+        with self._lock:
+            mask = self._all
+            location = normalize_filter_value(location)
+            if location:
+                mask &= (self._prefix_bitmap('city_norm', location) | self._prefix_bitmap('state_norm', location)
+                         | self._prefix_bitmap('country_norm', location))
+            if remote is not None:
+                mask &= self._bitmaps['remote'].get(remote, EMPTY)
+            type = normalize_filter_value(type)
+            if type:
+                mask &= self._prefix_bitmap('employment_type_norm', type)
+            if role:
+                mask &= self._bitmaps['role_family'].get(find_role_family(role) or role, EMPTY)
+            if collapse:
+                mask &= self._bitmaps['canonical'].get(True, EMPTY)
+            if matching is not None:
+                mask &= matching
+
+            total = len(mask)
+            if total <= ROW_TALLY_LIMIT:
+                counters = [Counter() for _ in FACETS]
+                for row in mask:
+                    for counter, value in zip(counters, self._keys[row]):
+                        counter[value] += 1
+                counts = {facet: counter for facet, counter in zip(FACETS, counters)}
+            else:
+                counts = {
+                    facet: {value: len(mask & bitmap) for value, bitmap in self._bitmaps[facet].items()}
+                    for facet in FACETS
+                }
+
+        result = {}
+        for facet, facet_counts in counts.items():
+            entries = [(value, count) for value, count in facet_counts.items() if value is not None and count]
+            if facet == 'posted_day':
+                entries.sort(reverse=True)
+            else:
+                entries.sort(key=lambda entry: (-entry[1], str(entry[0])))
+            result[facet] = [{"value": value, "count": count} for value, count in entries[:limit]]
+        return {"count": total, "facets": result}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "jobs": len(self._rows),
+                "data_version": self._version,
+                "values": {dimension: len(values) for dimension, values in self._bitmaps.items()},
+                "bitmap_bytes": sum(
+                    (bitmap.bits.bit_length() + 7) // 8 for values in self._bitmaps.values() for bitmap in values.values()
+                ),
+                "full_builds": self.full_builds,
+                "incremental_refreshes": self.incremental_refreshes,
+            }
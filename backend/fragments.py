@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+
+class FragmentCache:
+    """
+    LRU cache of the serialized JSON object of each job per field list, up to max_bytes.
+    Entries are keyed by the job's change_seq, which bulk_upsert_jobs renumbers on every
+    write, so they can't go stale. They outlive the data version changes that clear the
+    response cache, after a scrape only the jobs it wrote are serialized again.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, names, keys):
+        """
+        Returns the cached fragment or None for every (job id, change_seq) in keys.
+        """
+        fragments = []
+        with self._lock:
+            for job_id, change_seq in keys:
+                key = (names, job_id, change_seq)
+                fragment = self._entries.get(key)
+                if fragment is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                fragments.append(fragment)
+        return fragments
+
+    def put_many(self, names, fragments):
+        """
+        Stores {job id: (change_seq, fragment)}. Jobs without a change_seq aren't cached.
+        """
+        with self._lock:
+            for job_id, (change_seq, fragment) in fragments.items():
+                if change_seq is None:
+                    continue
+                key = (names, job_id, change_seq)
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self.bytes -= len(previous)
+                self._entries[key] = fragment
+                self.bytes += len(fragment)
+            while self.bytes > self.max_bytes and self._entries:
+                _, fragment = self._entries.popitem(last=False)
+                self.bytes -= len(fragment)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+        }
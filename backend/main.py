@@ -1,14 +1,40 @@
-from fastapi import FastAPI, Query, Depends
+from fastapi import FastAPI, Query, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, and_, func
 import os
-import pandas as pd
+import threading
+import time
+import json
+import base64
 from datetime import datetime
-from database import SessionLocal, Job, init_db
+from database import SessionLocal, AsyncSessionLocal, get_async_engine, Job, JobSkill, JobStat, init_db, apply_search_filter, load_raw_data, normalize_filter_value, prefix_filter, near_filter, salary_filter, stored_salary_percentiles
+from backend.cache import ResponseCache, encode_json
+from backend.facets import FacetIndex
+from backend.fragments import FragmentCache
+from metrics import REGISTRY, CONTENT_TYPE, SamplingProfiler
+from analytics_snapshot import read_analytics_frame, load_analytics_frame, analytics_from_frame, read_top_skills, TOP_SKILLS
+from enrichment import find_role_family
+from geo import haversine_km, parse_coordinates
 
 app = FastAPI()
 
+# Responses only change when the scraper stamps a new data version
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("RESPONSE_CACHE_TTL", 300))
+)
+facet_index = FacetIndex()
+# Serialized jobs reused across /jobs and /jobs/changes responses, see _job_fragments
+job_fragments = FragmentCache(max_bytes=int(os.environ.get("FRAGMENT_CACHE_MB", 64)) * 1024 * 1024)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "API request latency by route template", ["method", "route", "status"]
+)
+# ANALYTICS_PROFILE=1 samples the stacks of /analytics computations (cache misses only)
+analytics_profiler = SamplingProfiler() if os.environ.get("ANALYTICS_PROFILE") else None
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +44,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # The route template keeps ids and query strings out of the label values
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method, route=route.path if route else "unmatched", status=str(response.status_code)
+    )
+    return response
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -26,75 +64,418 @@ def get_db():
     finally:
         db.close()
 
+# Async session for the async handlers
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await get_async_engine().dispose()
+
 # Initialize database on startup
 @app.on_event("startup")
 def on_startup():
     init_db()
+    # Built in the background, /jobs/facets builds it itself if it's asked first
+    threading.Thread(target=facet_index.refresh, daemon=True).start()
 
 @app.get("/")
 def read_root():
     return {"message": "Job Board API is running"}
 
+JOB_FIELDS = [
+    "id", "title", "employer", "logo", "city", "state", "country",
+    "description", "apply_link", "is_remote", "employment_type", "posted_at", "role_family", "cluster_id", "latitude", "longitude",
+    "annual_salary_min", "annual_salary_max", "created_at", "updated_at"
+]
+# Truncated description for list views, so the full text is only sent by /jobs/{job_id}
+SNIPPET_LENGTH = 300
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 500
+DEFAULT_FACET_VALUES = 20
+MAX_FACET_VALUES = 200
+
+def _job_columns(fields):
+    if not fields:
+        names = JOB_FIELDS
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in JOB_FIELDS and name != "description_snippet"]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    columns = {}
+    for name in names:
+        if name == "description_snippet":
+            columns[name] = func.substr(Job.description, 1, SNIPPET_LENGTH).label(name)
+        else:
+            columns[name] = getattr(Job, name)
+    return columns
+
+def _encode_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def _decode_cursor(cursor, keys):
+    """
+    Decodes a cursor made by _encode_cursor. Answers 400 unless it is an object with
+    exactly these keys, e.g. a search cursor reused without the search.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(payload, dict) or set(payload) != set(keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+def _cursor_int(payload, key):
+    value = payload[key]
+    # bool is an int too
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+def _decode_offset_cursor(cursor):
+    return _cursor_int(_decode_cursor(cursor, ["o"]), "o")
+
+def _decode_keyset_cursor(cursor):
+    # (posted_at, id) of the last row of the previous page
+    payload = _decode_cursor(cursor, ["p", "i"])
+    posted_at, last_id = payload["p"], payload["i"]
+    if not isinstance(last_id, str) or not (posted_at is None or isinstance(posted_at, str)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if posted_at is not None:
+        try:
+            posted_at = datetime.fromisoformat(posted_at)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return posted_at, last_id
+
+def _apply_keyset(query, cursor):
+    # Rows come newest first as (posted_at DESC NULLS LAST, id DESC), continue after the cursor row
+    last_posted_at, last_id = cursor
+    if last_posted_at is None:
+        return query.filter(Job.posted_at.is_(None), Job.id < last_id)
+    return query.filter(or_(
+        Job.posted_at < last_posted_at,
+        and_(Job.posted_at == last_posted_at, Job.id < last_id),
+        Job.posted_at.is_(None)
+    ))
+
 @app.get("/jobs")
-def get_jobs(
+async def get_jobs(
+    request: Request,
     search: str = Query(None, description="Search term for title or description"),
-    location: str = Query(None, description="Filter by city, state, or country"),
+    location: str = Query(None, description="Filter by city, state, or country (prefix match)"),
     remote: bool = Query(None, description="Filter by remote jobs"),
-    type: str = Query(None, description="Filter by employment type"),
-    db: Session = Depends(get_db)
+    type: str = Query(None, description="Filter by employment type (prefix match)"),
+    role: str = Query(None, description="Filter by role family, e.g. Data Engineer"),
+    skill: str = Query(None, description="Filter by skill tag, e.g. python"),
+    collapse: bool = Query(False, description="Return only the first-seen posting of each duplicate cluster"),
+    cluster: str = Query(None, description="Filter by cluster_id, lists the postings of one job"),
+    min_salary: float = Query(None, ge=0, description="Only jobs whose annual salary range reaches this amount"),
+    max_salary: float = Query(None, ge=0, description="Only jobs whose annual salary range starts at or below this amount"),
+    near: str = Query(None, description="lat,lon: only jobs within radius_km, nearest first"),
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM, description="Radius for near, in km"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    fields: str = Query(None, description="Comma-separated fields to return, e.g. id,title,description_snippet"),
+    include_count: bool = Query(True, description="Also return the total number of matches"),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    point = _parse_near(near) if near else None
+    async def build():
+        # The ORM query code runs on the async connection, without a threadpool slot
+        return await db.run_sync(lambda session: _list_jobs(
+            session, search, location, remote, type, role, skill, collapse, cluster, min_salary, max_salary,
+            point, radius_km, limit, cursor, fields, include_count
+        ))
+    return await response_cache.respond_async(request, build)
+
+def _parse_near(near):
+    parts = near.split(",")
+    latitude, longitude = parse_coordinates(*parts) if len(parts) == 2 else (None, None)
+    if latitude is None:
+        raise HTTPException(status_code=400, detail="near must be lat,lon")
+    return latitude, longitude
+
+def build_jobs_query(db, search=None, location=None, remote=None, type=None, role=None, skill=None, collapse=False, cluster=None,
+                     min_salary=None, max_salary=None):
     query = db.query(Job)
     
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(or_(
-            Job.title.ilike(search_term),
-            Job.description.ilike(search_term),
-            Job.employer.ilike(search_term)
-        ))
+        # Relevance-ranked full-text search when the index exists, ILIKE otherwise
+        query = apply_search_filter(query, search)
         
+    # Location and type match the start of the indexed lowercase columns
+    location = normalize_filter_value(location)
     if location:
-        loc_term = f"%{location}%"
         query = query.filter(or_(
-            Job.city.ilike(loc_term),
-            Job.state.ilike(loc_term),
-            Job.country.ilike(loc_term)
+            prefix_filter(Job.city_norm, location),
+            prefix_filter(Job.state_norm, location),
+            prefix_filter(Job.country_norm, location)
         ))
         
     if remote is not None:
         query = query.filter(Job.is_remote == remote)
         
+    type = normalize_filter_value(type)
     if type:
-        query = query.filter(Job.employment_type.ilike(f"%{type}%"))
+        query = query.filter(prefix_filter(Job.employment_type_norm, type))
     
-    jobs_list = query.all()
+    # Role and skill come from the enrichment stage, both are indexed exact matches
+    if role:
+        query = query.filter(Job.role_family == (find_role_family(role) or role))
     
-    return {
-        "count": len(jobs_list),
-        "jobs": [
-            {
-                "id": j.id,
-                "title": j.title,
-                "employer": j.employer,
-                "logo": j.logo,
-                "city": j.city,
-                "state": j.state,
-                "country": j.country,
-                "description": j.description,
-                "apply_link": j.apply_link,
-                "is_remote": j.is_remote,
-                "employment_type": j.employment_type,
-                "posted_at": j.posted_at,
-            } for j in jobs_list
-        ]
+    skill = normalize_filter_value(skill)
+    if skill:
+        query = query.filter(Job.id.in_(db.query(JobSkill.job_id).filter(JobSkill.skill == skill)))
+    
+    # Near-duplicate postings share the cluster_id of the first one seen
+    if collapse:
+        query = query.filter(Job.cluster_id == Job.id)
+    
+    if cluster:
+        query = query.filter(Job.cluster_id == cluster)
+    
+    # Salary ranges overlap the requested one, on the indexed annualized columns
+    if min_salary is not None or max_salary is not None:
+        query = query.filter(salary_filter(min_salary, max_salary))
+    
+    return query
+
+def _list_jobs(db, search, location, remote, type, role, skill, collapse, cluster, min_salary, max_salary,
+               point, radius_km, limit, cursor, fields, include_count):
+    query = build_jobs_query(db, search, location, remote, type, role, skill, collapse, cluster, min_salary, max_salary)
+    if point:
+        return _list_jobs_near(query, point, radius_km, limit, cursor, fields)
+    
+    # Counted separately so the matching rows are never materialized just for len()
+    count = None
+    if include_count:
+        count = query.order_by(None).with_entities(func.count(Job.id)).scalar()
+    
+    columns = _job_columns(fields)
+    # The page only selects the jobs, their JSON comes from _job_fragments.
+    # id and posted_at make up the keyset cursor.
+    selected = [Job.id, Job.change_seq, Job.posted_at]
+    
+    if search:
+        # Relevance order has no stable keyset, page through it by offset instead.
+        # Ties in rank are broken by id so each offset sees the same order.
+        offset = _decode_offset_cursor(cursor) if cursor else 0
+        rows = query.order_by(Job.id).with_entities(*selected).offset(offset).limit(limit + 1).all()
+        next_payload = {"o": offset + limit}
+    else:
+        if cursor:
+            query = _apply_keyset(query, _decode_keyset_cursor(cursor))
+        query = query.order_by(Job.posted_at.desc().nulls_last(), Job.id.desc())
+        rows = query.with_entities(*selected).limit(limit + 1).all()
+        next_payload = None
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        if next_payload is None:
+            last = rows[-1]
+            posted_at = last.posted_at
+            next_payload = {"p": posted_at.isoformat() if posted_at else None, "i": last.id}
+        next_cursor = _encode_cursor(next_payload)
+    
+    fragments = _job_fragments(db, columns, [(row.id, row.change_seq) for row in rows])
+    return _jobs_body({"count": count, "next_cursor": next_cursor}, fragments)
+
+def _job_fragments(db, columns, keys):
+    """
+    The serialized JSON objects of the jobs in keys, [(id, change_seq)], in order.
+    Cached fragments are reused, the others are read in one query and cached.
+    """
+    names = tuple(columns)
+    fragments = job_fragments.get_many(names, keys)
+    missing = [job_id for (job_id, _), fragment in zip(keys, fragments) if fragment is None]
+    if not missing:
+        return fragments
+    rendered = {
+        row._fragment_id: (row._fragment_seq, encode_json({name: getattr(row, name) for name in names}))
+        for row in db.query(
+            *columns.values(), Job.id.label("_fragment_id"), Job.change_seq.label("_fragment_seq")
+        ).filter(Job.id.in_(missing))
     }
+    job_fragments.put_many(names, rendered)
+    return [fragment if fragment is not None else rendered[job_id][1] for (job_id, _), fragment in zip(keys, fragments)]
+
+def _jobs_body(head, fragments):
+    # {**head, "jobs": [...]} as JSON, the jobs are concatenated without being decoded
+    return encode_json(head)[:-1] + b',"jobs":[' + b",".join(fragments) + b"]}"
+
+def _with_member(fragment, name, value):
+    # Appends "name": value to a serialized JSON object
+    separator = b"," if fragment != b"{}" else b""
+    return fragment[:-1] + separator + encode_json(name) + b":" + encode_json(value) + b"}"
+
+def _near_matches(query, point, radius_km):
+    # The geohash index narrows the jobs down to the cells around the point, exact
+    # distances are computed here on those candidates. Returns [(distance, id)], nearest first.
+    latitude, longitude = point
+    candidates = query.order_by(None).filter(near_filter(latitude, longitude, radius_km)).with_entities(
+        Job.id, Job.latitude, Job.longitude
+    ).all()
+    return sorted(
+        (distance, job_id) for job_id, distance in (
+            (job_id, haversine_km(latitude, longitude, job_lat, job_lon)) for job_id, job_lat, job_lon in candidates
+        ) if distance <= radius_km
+    )
+
+def _list_jobs_near(query, point, radius_km, limit, cursor, fields):
+    matches = _near_matches(query, point, radius_km)
+    offset = _decode_offset_cursor(cursor) if cursor else 0
+    page = matches[offset:offset + limit]
+    columns = _job_columns(fields)
+    change_seqs = dict(
+        query.order_by(None).filter(Job.id.in_([job_id for _, job_id in page])).with_entities(Job.id, Job.change_seq)
+    )
+    fragments = _job_fragments(query.session, columns, [(job_id, change_seqs[job_id]) for _, job_id in page])
+    
+    return _jobs_body({
+        "count": len(matches),
+        "next_cursor": _encode_cursor({"o": offset + limit}) if offset + limit < len(matches) else None,
+    }, [_with_member(fragment, "distance_km", round(distance, 2)) for (distance, _), fragment in zip(page, fragments)])
+
+@app.get("/jobs/facets")
+def get_job_facets(
+    request: Request,
+    search: str = Query(None, description="Search term for title or description"),
+    location: str = Query(None, description="Filter by city, state, or country (prefix match)"),
+    remote: bool = Query(None, description="Filter by remote jobs"),
+    type: str = Query(None, description="Filter by employment type (prefix match)"),
+    role: str = Query(None, description="Filter by role family, e.g. Data Engineer"),
+    skill: str = Query(None, description="Filter by skill tag, e.g. python"),
+    collapse: bool = Query(False, description="Count only the first-seen posting of each duplicate cluster"),
+    cluster: str = Query(None, description="Filter by cluster_id"),
+    min_salary: float = Query(None, ge=0, description="Only jobs whose annual salary range reaches this amount"),
+    max_salary: float = Query(None, ge=0, description="Only jobs whose annual salary range starts at or below this amount"),
+    near: str = Query(None, description="lat,lon: only jobs within radius_km"),
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM, description="Radius for near, in km"),
+    limit: int = Query(DEFAULT_FACET_VALUES, ge=1, le=MAX_FACET_VALUES, description="Values returned per facet"),
+    db: Session = Depends(get_db)
+):
+    """
+    Job counts per city, state, employment type, remote flag and posted day for the
+    jobs matching the same filters as /jobs, from the in-memory bitmap indexes.
+    """
+    point = _parse_near(near) if near else None
+    def build():
+        facet_index.refresh()
+        matching = None
+        if search or skill or cluster or min_salary is not None or max_salary is not None or point:
+            # Filters without a bitmap index select their jobs in the database first
+            query = build_jobs_query(db, search=search, skill=skill, cluster=cluster, min_salary=min_salary, max_salary=max_salary)
+            if point:
+                ids = [job_id for _, job_id in _near_matches(query, point, radius_km)]
+            else:
+                ids = [job_id for (job_id,) in query.order_by(None).with_entities(Job.id)]
+            matching = facet_index.bitmap_for_ids(ids)
+        return facet_index.facets(location, remote, type, role, collapse, matching, limit)
+    return response_cache.respond(request, build)
+
+@app.get("/jobs/changes")
+async def get_job_changes(
+    request: Request,
+    since: str = Query(None, description="next_token from the previous call, omit to start a full sync"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    fields: str = Query(None, description="Comma-separated fields to return"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Jobs inserted or updated since the token, oldest change first. Keep calling with
+    next_token while has_more is true, then store it for the next sync.
+    """
+    after = _cursor_int(_decode_cursor(since, ["s"]), "s") if since else 0
+    async def build():
+        return await db.run_sync(lambda session: _list_changes(session, after, limit, fields))
+    return await response_cache.respond_async(request, build)
+
+def _list_changes(db, after, limit, fields):
+    columns = _job_columns(fields)
+    rows = db.query(Job.id, Job.change_seq).filter(Job.change_seq > after).order_by(Job.change_seq).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return _jobs_body({
+        "next_token": _encode_cursor({"s": rows[-1].change_seq if rows else after}),
+        "has_more": has_more,
+    }, _job_fragments(db, columns, [(row.id, row.change_seq) for row in rows]))
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    columns = _job_columns(None)
+    row = db.query(*columns.values()).filter(Job.id == job_id).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = {name: getattr(row, name) for name in columns}
+    job["skills"] = [skill for (skill,) in db.query(JobSkill.skill).filter(JobSkill.job_id == job_id).order_by(JobSkill.skill)]
+    return job
+
+@app.get("/jobs/{job_id}/raw")
+def get_job_raw_data(job_id: str):
+    # The full JSearch payload is only decompressed on this explicit request
+    raw_data = load_raw_data(job_id)
+    if raw_data is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return Response(content=raw_data, media_type="application/json")
 
 @app.get("/analytics")
-def get_analytics(db: Session = Depends(get_db)):
-    # Using pandas for complex analytics as before, but fetching via SQLAlchemy
-    jobs_query = db.query(Job).all()
+async def get_analytics_endpoint(request: Request, db: AsyncSession = Depends(get_async_db)):
+    def from_frame():
+        return analytics_from_frame(load_analytics_frame(), read_top_skills())
+    rollup, fallback = rollup_analytics, from_frame
+    if analytics_profiler:
+        rollup, fallback = analytics_profiler.profiled(rollup), analytics_profiler.profiled(fallback)
+    async def build():
+        result = await db.run_sync(rollup)
+        if result is None:
+            # Rollups not built yet, the columnar fallback is CPU-bound so it runs in the threadpool
+            result = await run_in_threadpool(fallback)
+        return result
+    return await response_cache.respond_async(request, build)
+
+@app.get("/metrics")
+def get_metrics():
+    # Per process: with several uvicorn workers each one is scraped separately
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/debug/profile/analytics")
+def get_analytics_profile():
+    """
+    Stacks sampled while computing /analytics, in the collapsed format for flamegraph.pl.
+    """
+    if analytics_profiler is None:
+        raise HTTPException(status_code=404, detail="Start the API with ANALYTICS_PROFILE=1 to profile /analytics")
+    return Response(content=analytics_profiler.collapsed(), media_type="text/plain")
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    return dict(response_cache.stats(), fragments=job_fragments.stats())
+
+def get_analytics(db):
+    result = rollup_analytics(db)
+    if result is None:
+        return compute_analytics_dataframe(db)
+    return result
+
+def rollup_analytics(db):
+    # Served from the job_stats rollups maintained by the scraper's write path.
+    # Returns None when jobs exist but the rollups were never built (see rebuild_job_stats).
+    stats = {}
+    for stat in db.query(JobStat).all():
+        stats.setdefault(stat.dimension, {})[stat.key] = stat.count
     
-    if not jobs_query:
+    total_jobs = stats.get('total', {}).get('all', 0)
+    if not total_jobs:
+        if db.query(Job.id).first() is not None:
+            return None
         return {
             "total_jobs": 0,
             "remote_percent": 0,
@@ -102,55 +483,32 @@ def get_analytics(db: Session = Depends(get_db)):
             "employment_types": []
         }
     
-    # Convert to DataFrame
-    data = []
-    for j in jobs_query:
-        data.append({
-            "title": j.title,
-            "posted_at": j.posted_at,
-            "city": j.city,
-            "state": j.state,
-            "country": j.country,
-            "is_remote": j.is_remote,
-            "employment_type": j.employment_type
-        })
-    df = pd.DataFrame(data)
-    
-    # Calculate stats
-    total_jobs = len(df)
-    remote_jobs = df['is_remote'].sum()
-    remote_percent = (remote_jobs / total_jobs * 100) if total_jobs > 0 else 0
-    
-    # Top Cities
-    top_cities = df['city'].value_counts().head(5).to_dict()
-    top_cities_list = [{"name": name, "count": int(count)} for name, count in top_cities.items()]
-    
-    # Employment Types
-    emp_types = df['employment_type'].value_counts().to_dict()
-    emp_types_list = [{"type": name, "count": int(count)} for name, count in emp_types.items()]
-    
-    # Number of job related to Computer
-    number_computer_jobs_df = df[df['title'].str.contains('Computer', case=False, na=False)]
-    
-    # Calculate jobs by day
-    df['posted_date'] = pd.to_datetime(df['posted_at']).dt.date
-    jobs_by_day = df['posted_date'].astype(str).value_counts().sort_index().to_dict()
-    number_of_jobs_by_days = [{"name": date, "count": int(count)} for date, count in jobs_by_day.items()]
-    
-    # Calculate jobs today
+    def by_count(counts):
+        return sorted(((key, count) for key, count in counts.items() if count > 0), key=lambda item: (-item[1], item[0]))
+    
+    remote_jobs = stats.get('remote', {}).get('all', 0)
+    jobs_by_day = {day: count for day, count in sorted(stats.get('day', {}).items()) if count > 0}
     today_str = datetime.now().date().isoformat()
-    number_of_jobs_today = int(jobs_by_day.get(today_str, 0))
     
     return {
         "total_jobs": int(total_jobs),
-        "remote_percent": round(float(remote_percent), 1),
-        "top_cities": top_cities_list,
-        "employment_types": emp_types_list,
-        "number_computer_jobs": int(len(number_computer_jobs_df)),
-        "number_of_jobs_today": number_of_jobs_today,
-        "number_of_jobs_by_days": number_of_jobs_by_days
+        "remote_percent": round(float(remote_jobs / total_jobs * 100), 1),
+        "top_cities": [{"name": name, "count": count} for name, count in by_count(stats.get('city', {}))[:5]],
+        "employment_types": [{"type": name, "count": count} for name, count in by_count(stats.get('employment_type', {}))],
+        "number_computer_jobs": int(stats.get('computer', {}).get('all', 0)),
+        "number_of_jobs_today": int(jobs_by_day.get(today_str, 0)),
+        "number_of_jobs_by_days": [{"name": day, "count": count} for day, count in jobs_by_day.items()],
+        "role_families": [{"name": name, "count": count} for name, count in by_count(stats.get('role', {}))],
+        "top_skills": [{"name": name, "count": count} for name, count in by_count(stats.get('skill', {}))[:TOP_SKILLS]],
+        # Percentiles don't roll up incrementally, the scraper stores them once per cycle
+        "salary_percentiles": stored_salary_percentiles(db)
     }
 
+def compute_analytics_dataframe(db):
+    # Full recomputation with pandas over every job, the reference for the rollups
+    connection = db.connection()
+    return analytics_from_frame(read_analytics_frame(connection), read_top_skills(connection))
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,88 @@
+# Compares ways of getting the jobs table into pandas for /analytics:
+# ORM objects -> dicts -> DataFrame (the original path), pd.read_sql of the needed
+# columns, and decoding the Parquet snapshot written by the scraper.
+# Usage (from the repository root): python -m benchmarks.bench_analytics --sizes 10000 100000 1000000
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from benchmarks.synthetic import use_temp_database, load_sample_jobs
+
+use_temp_database()
+
+import pandas as pd
+from sqlalchemy import insert
+from database import init_db, engine, SessionLocal, Job
+from analytics_snapshot import ANALYTICS_COLUMNS, read_analytics_frame, write_analytics_snapshot, load_analytics_frame, analytics_from_frame
+import analytics_snapshot
+
+def fill_jobs(target):
+    # Only the analytics columns, inserted directly to keep million-row setups quick
+    with engine.connect() as conn:
+        existing = conn.exec_driver_sql("SELECT COUNT(*) FROM jobs").scalar()
+    rng = random.Random(1)
+    samples = load_sample_jobs()
+    now = datetime.utcnow()
+    for start in range(existing, target, 50000):
+        rows = []
+        for i in range(start, min(target, start + 50000)):
+            job = samples[i % len(samples)]
+            rows.append({
+                'id': f"bench-{i}",
+                'title': job['job_title'],
+                'city': job['job_city'],
+                'state': job['job_state'],
+                'country': job['job_country'],
+                'is_remote': rng.random() < 0.2,
+                'employment_type': job['job_employment_type'],
+                'posted_at': now - timedelta(days=rng.randint(0, 30), seconds=rng.randint(0, 86400)),
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(Job), rows)
+
+def orm_frame():
+    db = SessionLocal()
+    try:
+        # The same columns as the other paths, so adding an analytics column can't break this one
+        data = [{column: getattr(j, column) for column in ANALYTICS_COLUMNS} for j in db.query(Job).all()]
+        df = pd.DataFrame(data)
+        df['posted_at'] = pd.to_datetime(df['posted_at'])
+        return df
+    finally:
+        db.close()
+
+def snapshot_frame():
+    analytics_snapshot._cached_frame = (None, None)
+    return load_analytics_frame()
+
+def _time(label, fn):
+    start = time.perf_counter()
+    df = fn()
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    analytics_from_frame(df)
+    computed = time.perf_counter() - start
+    print(f"  {label:<26} load {loaded * 1000:9.1f} ms  aggregate {computed * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics load benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--skip-orm-above", type=int, default=1000000, help="Skip the ORM path above this size")
+    args = parser.parse_args()
+
+    init_db()
+    for size in sorted(args.sizes):
+        fill_jobs(size)
+        print(f"{size} jobs")
+        if size <= args.skip_orm_above:
+            _time("ORM -> dicts -> DataFrame", orm_frame)
+        _time(f"pd.read_sql ({len(ANALYTICS_COLUMNS)} columns)", read_analytics_frame)
+        start = time.perf_counter()
+        write_analytics_snapshot(f"bench-{size}")
+        print(f"  snapshot write {(time.perf_counter() - start) * 1000:.1f} ms")
+        analytics_snapshot.get_data_version = lambda: f"bench-{size}"
+        _time("Parquet snapshot", snapshot_frame)
+        _time("cached frame", load_analytics_frame)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Near-duplicate detection: the LSH bucket index used at ingest versus comparing
+# every posting with all earlier ones, on a corpus with injected near-duplicates
+# (a reposted job with a sentence dropped and a publisher footer added).
+# Usage (from the repository root): python -m benchmarks.bench_dedup --sizes 1000 5000 20000 --ingest-rows 5000
+import argparse
+import random
+import re
+import time
+import numpy as np
+from benchmarks.synthetic import use_temp_database, load_sample_jobs
+
+use_temp_database()
+
+import dedup
+from database import init_db, bulk_upsert_jobs, SessionLocal, Job
+
+PUBLISHERS = ["LinkedIn", "Indeed", "Glassdoor", "ZipRecruiter", "Workopolis", "Talent.com"]
+
+def make_corpus(n, dup_rate=0.2, seed=3):
+    """
+    Returns (records, truth) where truth maps the id of every injected duplicate to its original.
+    """
+    rng = random.Random(seed)
+    samples = load_sample_jobs()
+    sentences = sorted({s.strip() for job in samples for s in re.split(r"[.!?\n]+", job.get("job_description") or "") if len(s.split()) >= 6})
+    records, truth, originals = [], {}, []
+    for i in range(n):
+        if originals and rng.random() < dup_rate:
+            original = rng.choice(originals)
+            parts = original["description"].split(". ")
+            del parts[rng.randrange(len(parts))]
+            description = ". ".join(parts) + f". Posted via {rng.choice(PUBLISHERS)}."
+            record = dict(original, id=f"dedup-{i}", description=description)
+            truth[record["id"]] = original["id"]
+        else:
+            sample = rng.choice(samples)
+            record = {
+                "id": f"dedup-{i}",
+                "title": f"{sample['job_title']} {rng.randint(1, 9999)}",
+                "employer": f"{sample['employer_name']} {rng.randint(1, 999)}",
+                "description": ". ".join(rng.sample(sentences, 25)) + f". Reference {i}-{rng.random()}.",
+            }
+            originals.append(record)
+        records.append(record)
+    return records, truth
+
+def lsh_clusters(ids, signatures, keys):
+    buckets = {}
+    canonical_signatures = {}
+    clusters = {}
+    for job_id, signature, row_keys in zip(ids, signatures, keys):
+        candidates = sorted({other for key in row_keys for other in buckets.get(key, ())})
+        if candidates:
+            scores = dedup.similarity(signature, [canonical_signatures[other] for other in candidates])
+            best = int(scores.argmax())
+            if scores[best] >= dedup.SIMILARITY_THRESHOLD:
+                clusters[job_id] = candidates[best]
+                continue
+        clusters[job_id] = job_id
+        canonical_signatures[job_id] = signature
+        for key in row_keys:
+            buckets.setdefault(key, []).append(job_id)
+    return clusters
+
+def all_pairs_clusters(ids, signatures):
+    matrix = np.empty((len(ids), dedup.NUM_PERM), dtype=np.uint32)
+    canonical_ids = []
+    clusters = {}
+    for job_id, signature in zip(ids, signatures):
+        if canonical_ids:
+            scores = dedup.similarity(signature, matrix[:len(canonical_ids)])
+            best = int(scores.argmax())
+            if scores[best] >= dedup.SIMILARITY_THRESHOLD:
+                clusters[job_id] = canonical_ids[best]
+                continue
+        clusters[job_id] = job_id
+        matrix[len(canonical_ids)] = signature
+        canonical_ids.append(job_id)
+    return clusters
+
+def accuracy(clusters, truth):
+    flagged = {job_id for job_id, cluster_id in clusters.items() if cluster_id != job_id}
+    found = sum(1 for job_id in flagged if clusters[job_id] == truth.get(job_id))
+    precision = found / len(flagged) if flagged else 1.0
+    recall = found / len(truth) if truth else 1.0
+    return precision, recall
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate detection benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--ingest-rows", type=int, default=5000, help="Also run bulk_upsert_jobs on this many postings (0 to skip)")
+    args = parser.parse_args()
+
+    print(f"{'postings':>9} {'signatures':>11} {'LSH':>9} {'all-pairs':>10}  {'LSH precision/recall':>21}  {'all-pairs precision/recall':>27}")
+    for size in args.sizes:
+        records, truth = make_corpus(size)
+        ids = [record["id"] for record in records]
+        start = time.perf_counter()
+        signatures = [dedup.minhash_signature(r["title"], r["employer"], r["description"]) for r in records]
+        keys = [dedup.band_keys(signature) for signature in signatures]
+        signature_s = time.perf_counter() - start
+        start = time.perf_counter()
+        lsh = lsh_clusters(ids, signatures, keys)
+        lsh_s = time.perf_counter() - start
+        start = time.perf_counter()
+        brute = all_pairs_clusters(ids, signatures)
+        brute_s = time.perf_counter() - start
+        lsh_p, lsh_r = accuracy(lsh, truth)
+        brute_p, brute_r = accuracy(brute, truth)
+        print(f"{size:>9} {signature_s:>10.2f}s {lsh_s:>8.2f}s {brute_s:>9.2f}s  {lsh_p:>10.3f} / {lsh_r:.3f}  {brute_p:>16.3f} / {brute_r:.3f}")
+
+    if args.ingest_rows:
+        init_db()
+        records, truth = make_corpus(args.ingest_rows, seed=5)
+        start = time.perf_counter()
+        bulk_upsert_jobs(records)
+        ingest_s = time.perf_counter() - start
+        db = SessionLocal()
+        try:
+            clusters = dict(db.query(Job.id, Job.cluster_id).all())
+        finally:
+            db.close()
+        precision, recall = accuracy(clusters, truth)
+        print(f"bulk_upsert_jobs: {args.ingest_rows} postings in {ingest_s:.2f}s "
+              f"({args.ingest_rows / ingest_s:.0f} rows/sec), precision {precision:.3f}, recall {recall:.3f}")
+
+if __name__ == "__main__":
+    main()
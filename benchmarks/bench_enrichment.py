@@ -0,0 +1,44 @@
+# Compares the single combined skills regex used by the enrichment stage with
+# scanning every document once per skill spelling, on the sample job descriptions.
+# Usage (from the repository root): python -m benchmarks.bench_enrichment --docs 5000
+import argparse
+import re
+import time
+from benchmarks.synthetic import synthetic_api_jobs
+import enrichment
+
+def per_keyword_skills(patterns, text):
+    return sorted({skill for skill, pattern in patterns if pattern.search(text)})
+
+def main():
+    parser = argparse.ArgumentParser(description="Enrichment matcher benchmark")
+    parser.add_argument("--docs", type=int, default=5000)
+    args = parser.parse_args()
+
+    jobs = synthetic_api_jobs(args.docs)
+    docs = [job.get('job_description') or '' for job in jobs]
+    megabytes = sum(len(doc) for doc in docs) / 1e6
+    patterns = [
+        (skill, re.compile(r"(?<![\w+#.])" + enrichment._alias_pattern(alias) + r"(?![\w+#])", re.IGNORECASE))
+        for alias, skill in enrichment._SKILL_ALIASES.items()
+    ]
+
+    start = time.perf_counter()
+    combined = [enrichment.extract_skills(doc) for doc in docs]
+    combined_s = time.perf_counter() - start
+    start = time.perf_counter()
+    per_keyword = [per_keyword_skills(patterns, doc) for doc in docs]
+    per_keyword_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for job in jobs:
+        enrichment.classify_title(job.get('job_title'))
+    titles_s = time.perf_counter() - start
+
+    print(f"{len(docs)} descriptions ({megabytes:.1f} MB), {len(patterns)} skill spellings")
+    print(f"combined regex   {len(docs) / combined_s:9.0f} docs/s")
+    print(f"per-keyword      {len(docs) / per_keyword_s:9.0f} docs/s")
+    print(f"title classifier {len(jobs) / titles_s:9.0f} titles/s")
+    print(f"same skills: {combined == per_keyword}")
+
+if __name__ == "__main__":
+    main()
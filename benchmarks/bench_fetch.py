@@ -0,0 +1,63 @@
+# Compares the serial scrape path (fetch a query, then write it) with the streaming
+# pipeline used by --async against the local stub server. Each path scrapes its own
+# queries, so both write new jobs to the throwaway database.
+# Usage (from the repository root): python -m benchmarks.bench_fetch --queries 4 --pages 3
+import argparse
+import asyncio
+import os
+import time
+from benchmarks.synthetic import use_temp_database
+from benchmarks.stub_server import start_stub_server
+
+use_temp_database()
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+
+from database import init_db
+from Linkedin_scaped_bot import LinkedInScraper, run_streaming_pipeline
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch engine benchmark")
+    parser.add_argument("--queries", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=5.0)
+    parser.add_argument("--skip-serial", action="store_true", help="Only run the streaming pipeline")
+    args = parser.parse_args()
+
+    init_db()
+    server = start_stub_server(args.latency, args.rate_limit_ratio)
+    scraper = LinkedInScraper(url=server.url)
+
+    try:
+        if not args.skip_serial:
+            start = time.perf_counter()
+            serial_jobs = 0
+            for query in [f"Serial query {i}" for i in range(args.queries)]:
+                jobs = scraper.fetch_jobs(query, pages=args.pages)
+                scraper.process_and_save_jobs(jobs)
+                serial_jobs += len(jobs)
+                time.sleep(3)  # Same delay as run_scraping_cycle
+            serial = time.perf_counter() - start
+
+        requests_before = server.request_count
+        start = time.perf_counter()
+        stats = asyncio.run(run_streaming_pipeline(
+            scraper, [f"Benchmark query {i}" for i in range(args.queries)], args.pages,
+            concurrency=args.concurrency, rate=args.rate
+        ))
+        concurrent = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    print()
+    if not args.skip_serial:
+        print(f"serial: {serial_jobs} jobs in {serial:.2f}s")
+    print(f"async:  {stats.jobs_fetched} jobs in {concurrent:.2f}s, {stats.rows_written} rows written "
+          f"({server.request_count - requests_before} requests, {server.rate_limited_count} total 429s)")
+    if not args.skip_serial:
+        print(f"Speedup: {serial / concurrent:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Compares the geohash-indexed radius query behind /jobs?near= with scanning every
+# job's coordinates and computing haversine distances in Python, on points scattered
+# around the cities in output.json.
+# Usage (from the repository root): python -m benchmarks.bench_geo --points 100000 --queries 50
+import argparse
+import random
+import sys
+import time
+from benchmarks.synthetic import use_temp_database, load_sample_jobs
+use_temp_database()
+from sqlalchemy import insert
+from database import init_db, SessionLocal, Job, near_filter
+from geo import encode_geohash, haversine_km, parse_coordinates
+
+def city_centers():
+    centers = set()
+    for job in load_sample_jobs():
+        latitude, longitude = parse_coordinates(job.get('job_latitude'), job.get('job_longitude'))
+        if latitude is not None:
+            centers.add((latitude, longitude))
+    return sorted(centers)
+
+def insert_points(db, centers, n, rng, batch_size=10000):
+    for start in range(0, n, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, n)):
+            center_lat, center_lon = rng.choice(centers)
+            latitude = max(-90.0, min(90.0, center_lat + rng.gauss(0, 0.5)))
+            longitude = (center_lon + rng.gauss(0, 0.5) + 180) % 360 - 180
+            rows.append({
+                'id': f"geo-{i}", 'title': "Synthetic job",
+                'latitude': latitude, 'longitude': longitude, 'geohash': encode_geohash(latitude, longitude)
+            })
+        db.execute(insert(Job), rows)
+    db.commit()
+
+def indexed_query(db, latitude, longitude, radius_km):
+    rows = db.query(Job.id, Job.latitude, Job.longitude).filter(near_filter(latitude, longitude, radius_km))
+    return {job_id for job_id, job_lat, job_lon in rows if haversine_km(latitude, longitude, job_lat, job_lon) <= radius_km}
+
+def full_scan(db, latitude, longitude, radius_km):
+    rows = db.query(Job.id, Job.latitude, Job.longitude).filter(Job.latitude.isnot(None))
+    return {job_id for job_id, job_lat, job_lon in rows if haversine_km(latitude, longitude, job_lat, job_lon) <= radius_km}
+
+def main():
+    parser = argparse.ArgumentParser(description="Geo radius search benchmark")
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--radius", type=float, nargs="+", default=[5, 25, 100])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    centers = city_centers()
+    init_db()
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        insert_points(db, centers, args.points, rng)
+        print(f"{args.points} points around {len(centers)} cities, inserted in {time.perf_counter() - start:.1f}s")
+        queries = [
+            (lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3))
+            for lat, lon in (rng.choice(centers) for _ in range(args.queries))
+        ]
+
+        mismatches = 0
+        print(f"{'radius km':>9} {'matches/query':>14} {'geohash ms':>11} {'full scan ms':>13}")
+        for radius_km in args.radius:
+            indexed_s = scan_s = 0.0
+            matches = 0
+            for latitude, longitude in queries:
+                start = time.perf_counter()
+                indexed = indexed_query(db, latitude, longitude, radius_km)
+                indexed_s += time.perf_counter() - start
+                start = time.perf_counter()
+                scanned = full_scan(db, latitude, longitude, radius_km)
+                scan_s += time.perf_counter() - start
+                matches += len(scanned)
+                mismatches += indexed != scanned
+            print(f"{radius_km:9.0f} {matches / len(queries):14.0f} "
+                  f"{indexed_s * 1000 / len(queries):11.2f} {scan_s * 1000 / len(queries):13.2f}")
+        print(f"same results: {mismatches == 0}")
+    finally:
+        db.close()
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
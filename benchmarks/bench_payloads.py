@@ -0,0 +1,121 @@
+# Times building a GET /jobs page the way the API did before job fragments (rows to
+# dicts, jsonable_encoder, json.dumps) against assembling it from serialized jobs, with
+# the fragment cache cold and warm, and checks that all three give the same JSON. Then
+# changes some of the listed jobs and checks the warm cache doesn't serve them stale.
+# Last it pages through a search whose matches all have the same relevance rank and
+# checks every match is listed exactly once.
+# Usage (from the repository root): python -m benchmarks.bench_payloads --rows 20000 --limits 50 500
+import argparse
+import json
+import random
+import sys
+import time
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+use_temp_database()
+
+from sqlalchemy import func
+from fastapi.encoders import jsonable_encoder
+from database import init_db, SessionLocal, Job, bulk_upsert_jobs
+from backend.main import _list_jobs, _job_columns, job_fragments
+
+LIST_FIELDS = "id,title,employer,city,country,is_remote,employment_type,posted_at,description_snippet"
+
+def reference_page(db, limit, fields):
+    # The /jobs handler before fragments, without a cursor
+    count = db.query(func.count(Job.id)).scalar()
+    columns = _job_columns(fields)
+    rows = db.query(*columns.values()).order_by(Job.posted_at.desc().nulls_last(), Job.id.desc()).limit(limit).all()
+    payload = {"count": count, "jobs": [{name: getattr(row, name) for name in columns} for row in rows]}
+    return json.dumps(jsonable_encoder(payload)).encode()
+
+def fragment_page(db, limit, fields):
+    return _list_jobs(db, None, None, None, None, None, None, False, None, None, None, None, None, limit, None, fields, True)
+
+def search_page_ids(db, search, limit):
+    ids = []
+    cursor = None
+    while True:
+        data = json.loads(_list_jobs(db, search, None, None, None, None, None, False, None, None, None, None, None, limit, cursor, "id", False))
+        ids.extend(job["id"] for job in data["jobs"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            return ids
+
+def same_jobs(reference, body):
+    expected = json.loads(reference)
+    data = json.loads(body)
+    return data["count"] == expected["count"] and data["jobs"] == expected["jobs"]
+
+def _time(fn, repeat, before=None):
+    elapsed = 0.0
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        body = fn()
+        elapsed += time.perf_counter() - start
+    return elapsed / repeat * 1000, body
+
+def main():
+    parser = argparse.ArgumentParser(description="/jobs payload serialization benchmark")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--limits", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    records = synthetic_job_records(args.rows)
+    for start in range(0, len(records), 5000):
+        bulk_upsert_jobs(records[start:start + 5000])
+
+    db = SessionLocal()
+    results = []
+    print(f"{'limit':>5} {'fields':<7} {'KB':>7} {'dicts+json ms':>14} {'cold ms':>8} {'warm ms':>8} {'speedup':>8}  check")
+    try:
+        for limit in args.limits:
+            for label, fields in [("list", LIST_FIELDS), ("all", None)]:
+                reference_ms, reference = _time(lambda: reference_page(db, limit, fields), args.repeat)
+                cold_ms, cold = _time(lambda: fragment_page(db, limit, fields), args.repeat, job_fragments.clear)
+                warm_ms, warm = _time(lambda: fragment_page(db, limit, fields), args.repeat)
+                ok = same_jobs(reference, cold) and same_jobs(reference, warm)
+                results.append(ok)
+                print(f"{limit:>5} {label:<7} {len(warm) / 1024:7.1f} {reference_ms:14.2f} {cold_ms:8.2f} {warm_ms:8.2f} "
+                      f"{reference_ms / warm_ms:7.2f}x  {'OK' if ok else 'MISMATCH'}")
+
+        # Rewrite a few of the newest jobs, the cache must miss on them
+        limit = max(args.limits)
+        newest = {job.id for job in db.query(Job.id).order_by(Job.posted_at.desc().nulls_last(), Job.id.desc()).limit(limit)}
+        rng = random.Random(5)
+        changed = [record for record in records if record["id"] in newest]
+        for record in rng.sample(changed, min(10, len(changed))):
+            record["title"] = f"{record['title']} (updated)"
+            record["is_remote"] = not record["is_remote"]
+        for fields in (LIST_FIELDS, None):
+            fragment_page(db, limit, fields)
+        misses = job_fragments.misses
+        bulk_upsert_jobs(changed)
+        db.expire_all()
+        for fields in (LIST_FIELDS, None):
+            ok = same_jobs(reference_page(db, limit, fields), fragment_page(db, limit, fields))
+            results.append(ok)
+        print(f"after updating 10 listed jobs: {job_fragments.misses - misses} fragments rendered again for 2 field lists  "
+              f"{'OK' if all(results[-2:]) else 'STALE'}")
+        print(f"fragment cache: {job_fragments.stats()}")
+
+        # Identical postings rank the same, only the id orders them across pages
+        tied = [dict(records[0], id=f"tied-{i:03d}", title="Zyxwarden operator", description="Zyxwarden operator")
+                for i in range(23)]
+        bulk_upsert_jobs(tied)
+        db.expire_all()
+        ids = search_page_ids(db, "zyxwarden", 5)
+        ok = ids == sorted(record["id"] for record in tied)
+        results.append(ok)
+        print(f"search with {len(tied)} equally ranked matches, 5 per page: {len(ids)} listed, {len(set(ids))} distinct  "
+              f"{'OK' if ok else 'MISMATCH'}")
+    finally:
+        db.close()
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
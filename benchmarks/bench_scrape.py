@@ -0,0 +1,109 @@
+# End-to-end scrape benchmark: replays fixture cycles through the stub server at a
+# given latency and 429 rate, and drives LinkedInScraper through the streaming
+# pipeline into the database. SQLite by default, PostgreSQL when DATABASE_URL points
+# at a throwaway database. Reports per cycle jobs/sec, API calls, 429s, DB write
+# time, analytics snapshot time and peak RSS.
+# Usage (from the repository root): python -m benchmarks.bench_scrape --cycles 5 --pages 3 --latency 0.1 --rate-limit-ratio 0.05
+#   --fixture FILE replays recorded cycles (see benchmarks.fixtures), --planner plans each cycle with QueryPlanner,
+#   --metrics-file FILE writes the scraper's Prometheus metrics at the end
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from benchmarks.synthetic import use_temp_database
+from benchmarks.stub_server import start_stub_server
+from benchmarks.fixtures import synthetic_recording, load_fixture
+
+use_temp_database()
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+
+from database import init_db, engine
+from analytics_snapshot import publish_data_version
+from query_planner import QueryPlanner
+from Linkedin_scaped_bot import LinkedInScraper, QUERIES, PipelineStats, run_streaming_pipeline, FETCH_SECONDS, SLEEP_SECONDS
+from metrics import REGISTRY
+from database import UPSERT_SECONDS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end scrape benchmark")
+    parser.add_argument("--fixture", help="Replay this fixture file instead of the synthetic job market")
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds of stub latency per request (default: 0.1)")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Share of requests answered with 429 (default: 0)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=20.0, help="Max requests per second (default: 20)")
+    parser.add_argument("--planner", action="store_true", help="Plan each cycle with the QueryPlanner")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper's output")
+    parser.add_argument("--metrics-file", help="Write the scraper's Prometheus metrics here at the end")
+    args = parser.parse_args()
+
+    cycles = load_fixture(args.fixture) if args.fixture else synthetic_recording(QUERIES, args.cycles, args.pages)
+    init_db()
+    server = start_stub_server(latency=args.latency, rate_limit_ratio=args.rate_limit_ratio, seed=1)
+    scraper = LinkedInScraper(url=server.url)
+    planner = QueryPlanner() if args.planner else None
+
+    print(f"Database: {engine.dialect.name}, {len(cycles)} cycle(s), latency {args.latency}s, 429 ratio {args.rate_limit_ratio}")
+    print(f"{'cycle':>5} {'seconds':>8} {'jobs':>6} {'jobs/s':>8} {'calls':>6} {'429s':>5} {'written':>8} "
+          f"{'write s':>8} {'snapshot s':>11} {'peak RSS MB':>12}")
+    totals = {"seconds": 0.0, "jobs": 0, "calls": 0, "write": 0.0}
+    try:
+        for number, cycle in enumerate(cycles, start=1):
+            server.recording = cycle
+            queries = list(cycle)
+            requests_before = server.request_count
+            limited_before = server.rate_limited_count
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            start = time.perf_counter()
+            with output:
+                if planner:
+                    plan = [(query, pages) for query, pages in planner.plan(queries, args.pages) if pages]
+                else:
+                    plan = [(query, args.pages) for query in queries]
+                stats = asyncio.run(run_streaming_pipeline(
+                    scraper, [query for query, _ in plan], args.pages, concurrency=args.concurrency, rate=args.rate,
+                    stats=PipelineStats(), page_limits=dict(plan), on_page=planner.page_done if planner else None
+                ))
+                if planner:
+                    planner.finish()
+                snapshot_start = time.perf_counter()
+                publish_data_version()
+                snapshot_seconds = time.perf_counter() - snapshot_start
+            elapsed = time.perf_counter() - start
+            calls = server.request_count - requests_before
+            rss = peak_rss_mb()
+            print(f"{number:>5} {elapsed:8.2f} {stats.jobs_fetched:>6} {stats.jobs_fetched / elapsed:8.1f} {calls:>6} "
+                  f"{server.rate_limited_count - limited_before:>5} {stats.rows_written:>8} {stats.write_seconds:8.2f} "
+                  f"{snapshot_seconds:11.2f} {rss if rss is None else round(rss, 1):>12}")
+            totals["seconds"] += elapsed
+            totals["jobs"] += stats.jobs_fetched
+            totals["calls"] += calls
+            totals["write"] += stats.write_seconds
+    finally:
+        server.shutdown()
+    print(f"Total: {totals['jobs']} jobs in {totals['seconds']:.1f}s ({totals['jobs'] / totals['seconds']:.1f} jobs/s), "
+          f"{totals['calls'] / len(cycles):.1f} API calls per cycle, {totals['write']:.1f}s writing")
+    # Summed over concurrent requests, so these can add up to more than the wall time
+    print(f"Metrics: {FETCH_SECONDS.total():.1f}s in requests, {SLEEP_SECONDS.value(reason='backoff'):.1f}s in 429 backoff, "
+          f"{SLEEP_SECONDS.value(reason='rate_limit'):.1f}s waiting on the rate limiter, {UPSERT_SECONDS.total():.1f}s in bulk_upsert_jobs")
+    if args.metrics_file:
+        REGISTRY.write(args.metrics_file)
+
+if __name__ == "__main__":
+    main()
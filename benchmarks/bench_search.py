@@ -0,0 +1,52 @@
+# Compares the ILIKE '%term%' scan with the full-text index used by GET /jobs?search=.
+# Usage (from the repository root): python -m benchmarks.bench_search --rows 100000
+import argparse
+import time
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+use_temp_database()
+
+from sqlalchemy import or_
+from database import init_db, SessionLocal, Job, bulk_upsert_jobs, apply_search_filter, get_search_backend
+
+TERMS = ["python", "data engineer", "toronto", "machine learning", "kubernetes"]
+
+def ilike_query(db, search):
+    search_term = f"%{search}%"
+    return db.query(Job.id).filter(or_(
+        Job.title.ilike(search_term),
+        Job.description.ilike(search_term),
+        Job.employer.ilike(search_term)
+    ))
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        count = len(fn())
+    return (time.perf_counter() - start) / repeat * 1000, count
+
+def main():
+    parser = argparse.ArgumentParser(description="Search benchmark")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of synthetic jobs (default: 100000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    existing = db.query(Job).count()
+    if existing < args.rows:
+        print(f"Loading {args.rows - existing} synthetic jobs...")
+        records = synthetic_job_records(args.rows)[existing:]
+        for start in range(0, len(records), 10000):
+            bulk_upsert_jobs(records[start:start + 10000])
+
+    print(f"Search backend: {get_search_backend() or 'ILIKE only'}, {db.query(Job).count()} jobs")
+    print(f"{'term':<18} {'ilike ms':>10} {'index ms':>10} {'matches':>9}")
+    for term in TERMS:
+        ilike_ms, ilike_count = _time(lambda: ilike_query(db, term).all(), args.repeat)
+        index_ms, index_count = _time(lambda: apply_search_filter(db.query(Job.id), term).all(), args.repeat)
+        print(f"{term:<18} {ilike_ms:10.1f} {index_ms:10.1f} {index_count:>9} (ilike {ilike_count})")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Measures API cold start: the import time of backend.main in a fresh interpreter,
+# against the same import with the analytics and dedup dependencies (pandas, pyarrow,
+# numpy) loaded up front as they were before they were imported lazily, and the
+# scraper's import time. With --serve it also starts uvicorn and times the first
+# successful request and the first /jobs and /analytics responses.
+# Usage (from the repository root): python -m benchmarks.bench_startup --repeat 5 --serve --rows 5000
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+from benchmarks.load_test_api import _free_port
+
+EAGER_MODULES = "import numpy, pandas, pyarrow, pyarrow.parquet"
+
+def import_seconds(statement, repeat):
+    # Median over fresh interpreters, the first run also warms the OS file cache
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    times = []
+    for _ in range(repeat + 1):
+        output = subprocess.run([sys.executable, "-c", code], env=dict(os.environ), capture_output=True, text=True, check=True)
+        times.append(float(output.stdout.strip().splitlines()[-1]))
+    return statistics.median(times[1:])
+
+def loaded_modules(module):
+    code = f"import sys; import {module}; print(','.join(name for name in ('numpy', 'pandas', 'pyarrow') if name in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], env=dict(os.environ), capture_output=True, text=True, check=True)
+    return output.stdout.strip().splitlines()[-1] if output.stdout.strip() else ""
+
+def first_response(client, path):
+    start = time.perf_counter()
+    response = client.get(path)
+    return (time.perf_counter() - start) * 1000, response.status_code
+
+def serve(rows):
+    from database import init_db, bulk_upsert_jobs
+    init_db()
+    records = synthetic_job_records(rows)
+    for start in range(0, len(records), 5000):
+        bulk_upsert_jobs(records[start:start + 5000])
+
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=dict(os.environ)
+    )
+    try:
+        with httpx.Client(base_url=url, timeout=60) as client:
+            while True:
+                try:
+                    client.get("/")
+                    break
+                except httpx.HTTPError:
+                    if time.perf_counter() - start > 60:
+                        raise RuntimeError("uvicorn did not start")
+                    time.sleep(0.02)
+            ready = time.perf_counter() - start
+            jobs_ms, jobs_status = first_response(client, "/jobs?limit=50")
+            analytics_ms, analytics_status = first_response(client, "/analytics")
+    finally:
+        process.terminate()
+        process.wait()
+    print(f"uvicorn: first response after {ready:.2f}s, first /jobs {jobs_ms:.0f} ms, first /analytics {analytics_ms:.0f} ms")
+    return jobs_status == 200 and analytics_status == 200
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold start benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreters started per measurement (default: 5)")
+    parser.add_argument("--serve", action="store_true", help="Also time uvicorn's startup and first requests")
+    parser.add_argument("--rows", type=int, default=5000, help="Synthetic jobs for --serve (default: 5000)")
+    args = parser.parse_args()
+    use_temp_database()
+
+    lazy = import_seconds("import backend.main", args.repeat)
+    eager = import_seconds(f"{EAGER_MODULES}; import backend.main", args.repeat)
+    scraper = import_seconds("import Linkedin_scaped_bot", args.repeat)
+    loaded = loaded_modules("backend.main")
+    print(f"{'import':<44} {'median s':>9}")
+    print(f"{'backend.main':<44} {lazy:9.3f}")
+    print(f"{'backend.main with pandas/pyarrow/numpy first':<44} {eager:9.3f}  ({eager / lazy:.2f}x)")
+    print(f"{'Linkedin_scaped_bot':<44} {scraper:9.3f}")
+    print(f"heavy modules loaded by importing backend.main: {loaded or 'none'}")
+    ok = not loaded
+    if args.serve:
+        ok = serve(args.rows) and ok
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
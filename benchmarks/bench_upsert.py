@@ -0,0 +1,48 @@
+# Compares the per-row upsert_job path with bulk_upsert_jobs.
+# Usage (from the repository root): python -m benchmarks.bench_upsert --rows 5000
+import argparse
+import time
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+use_temp_database()
+
+from database import init_db, engine, upsert_job, bulk_upsert_jobs, get_search_backend
+
+def _clear_jobs():
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM jobs")
+        conn.exec_driver_sql("DELETE FROM job_stats")
+        if get_search_backend() == "fts5":
+            conn.exec_driver_sql("DELETE FROM jobs_fts")
+
+def _time(label, fn, rows):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/sec")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Upsert throughput benchmark")
+    parser.add_argument("--rows", type=int, default=2000, help="Number of synthetic jobs (default: 2000)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Batch size for bulk_upsert_jobs (default: 500)")
+    args = parser.parse_args()
+
+    init_db()
+    records = synthetic_job_records(args.rows)
+    # Unchanged jobs are skipped by their content hash, so updates need new content
+    updated = [dict(r, description=r['description'] + " (updated)") for r in records]
+
+    _clear_jobs()
+    per_row = _time("per-row upsert_job (insert)", lambda: [upsert_job(r) for r in records], args.rows)
+    per_row_update = _time("per-row upsert_job (update)", lambda: [upsert_job(r) for r in updated], args.rows)
+
+    _clear_jobs()
+    bulk = _time("bulk_upsert_jobs (insert)", lambda: bulk_upsert_jobs(records, batch_size=args.batch_size), args.rows)
+    bulk_update = _time("bulk_upsert_jobs (update)", lambda: bulk_upsert_jobs(updated, batch_size=args.batch_size), args.rows)
+    _time("bulk_upsert_jobs (unchanged)", lambda: bulk_upsert_jobs(updated, batch_size=args.batch_size), args.rows)
+
+    print(f"Speedup: {per_row / bulk:.1f}x on insert, {per_row_update / bulk_update:.1f}x on update")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# Multi-process scrape benchmark: enqueues a cycle of the synthetic job market (queries
+# overlap, so workers write the same jobs concurrently) and runs it with 1, 2, 4...
+# worker processes against the stub server, each worker with its own API key. Then
+# kills a worker mid-cycle and checks that the others finish its leased task. After
+# every run it checks that every served job was stored and that the job_stats rollups
+# match a rebuild from the jobs table. Worker processes only add throughput while the
+# work is waiting on the API, the default latency is closer to JSearch's than 0.1s.
+# Usage (from the repository root): python -m benchmarks.bench_workers --workers 1 2 4 --pages 3 --latency 0.5
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+import time
+from benchmarks.synthetic import use_temp_database
+from benchmarks.stub_server import start_stub_server
+from benchmarks.fixtures import synthetic_recording
+
+use_temp_database()
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+
+from sqlalchemy import select, func
+from database import init_db, engine, find_known_job_ids, rebuild_job_stats, JobStat, ScrapeTask
+from work_queue import WorkQueue
+from Linkedin_scaped_bot import QUERIES, enqueue_scraping_cycle, run_worker_processes
+
+def run_recording(base, label):
+    # The same job market under fresh job ids, so every run writes new jobs
+    return {
+        query: {page: [dict(job, job_id=f"{job['job_id']}-{label}") for job in jobs] for page, jobs in pages.items()}
+        for query, pages in base.items()
+    }
+
+def served_ids(recording, pages):
+    return {job["job_id"] for query_pages in recording.values() for page, jobs in query_pages.items() if int(page) <= pages for job in jobs}
+
+@contextlib.contextmanager
+def silenced(verbose):
+    # The worker processes inherit stdout, so it is redirected at the file descriptor
+    if verbose:
+        yield
+        return
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+def job_stats():
+    with engine.connect() as conn:
+        return {(row.dimension, row.key): row.count for row in conn.execute(select(JobStat)) if row.count}
+
+def check(recording, pages, cycle_id, queue):
+    expected = served_ids(recording, pages)
+    stored = find_known_job_ids(expected)
+    progress = queue.progress(cycle_id)
+    stats = job_stats()
+    with contextlib.redirect_stdout(None):
+        rebuild_job_stats()
+    ok = stored == expected and set(progress) == {"done"} and stats == job_stats()
+    if not ok:
+        print(f"  MISMATCH: {len(stored)}/{len(expected)} jobs stored, tasks {progress}, "
+              f"rollups {'match' if stats == job_stats() else 'differ from a rebuild'}")
+    return ok
+
+def wait_for_lease(cycle_id, queue, done, timeout=60):
+    # Until the worker has done some tasks and holds the lease on the next one
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        progress = queue.progress(cycle_id)
+        if progress.get("done", 0) >= done and progress.get("leased"):
+            return
+        time.sleep(0.01)
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process scrape worker benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds of stub latency per request (default: 0.5)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Max requests per second per worker (default: 10)")
+    parser.add_argument("--lease", type=float, default=2.0, help="Lease seconds, short so the crash test recovers quickly (default: 2)")
+    parser.add_argument("--verbose", action="store_true", help="Show the workers' output")
+    args = parser.parse_args()
+
+    init_db()
+    server = start_stub_server(latency=args.latency, seed=1)
+    queue = WorkQueue(args.lease)
+    base = synthetic_recording(QUERIES, 1, args.pages)[0]
+    results = []
+    baseline = None
+    print(f"Database: {engine.dialect.name}, {len(QUERIES)} queries x {args.pages} pages, latency {args.latency}s")
+    print(f"{'workers':>7} {'seconds':>8} {'pages':>6} {'jobs':>6} {'jobs/s':>8} {'speedup':>8}  check")
+    try:
+        for count in args.workers:
+            recording = run_recording(base, f"w{count}")
+            server.recording = recording
+            requests_before = server.request_count
+            start = time.perf_counter()
+            with silenced(args.verbose):
+                cycle_id = enqueue_scraping_cycle(QUERIES, args.pages, queue=queue)
+                exit_codes = run_worker_processes(
+                    count, [f"key-{index}" for index in range(count)], server.url, args.rate, args.lease, poll_interval=0.05
+                )
+            elapsed = time.perf_counter() - start
+            with engine.connect() as conn:
+                jobs = conn.execute(select(func.sum(ScrapeTask.jobs_found)).where(ScrapeTask.cycle_id == cycle_id)).scalar() or 0
+            ok = check(recording, args.pages, cycle_id, queue) and not any(exit_codes)
+            results.append(ok)
+            baseline = baseline or jobs / elapsed
+            print(f"{count:>7} {elapsed:8.2f} {server.request_count - requests_before:>6} {jobs:>6} {jobs / elapsed:8.1f} "
+                  f"{jobs / elapsed / baseline:7.2f}x  {'OK' if ok else 'MISMATCH'}")
+
+        # Crash test: a worker started from the command line is killed mid-cycle
+        recording = run_recording(base, "crash")
+        server.recording = recording
+        with silenced(args.verbose):
+            cycle_id = enqueue_scraping_cycle(QUERIES, args.pages, queue=queue)
+        env = dict(os.environ, JSEARCH_URL=server.url)
+        worker = subprocess.Popen(
+            [sys.executable, "Linkedin_scaped_bot.py", "--worker", "--exit-when-idle", "--no-planner",
+             "--lease", str(args.lease), "--rate", str(args.rate)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        wait_for_lease(cycle_id, queue, 10)
+        worker.kill()
+        worker.wait()
+        killed_done = queue.progress(cycle_id).get("done", 0)
+        start = time.perf_counter()
+        with silenced(args.verbose):
+            exit_codes = run_worker_processes(2, ["key-a", "key-b"], server.url, args.rate, args.lease, poll_interval=0.05)
+        elapsed = time.perf_counter() - start
+        with engine.connect() as conn:
+            reclaimed = conn.execute(
+                select(func.count(ScrapeTask.id)).where(ScrapeTask.cycle_id == cycle_id, ScrapeTask.attempts > 1)
+            ).scalar()
+        ok = check(recording, args.pages, cycle_id, queue) and not any(exit_codes) and reclaimed >= 1
+        results.append(ok)
+        print(f"crash test: worker killed after {killed_done} tasks, {reclaimed} leased task(s) taken over, "
+              f"the rest finished by 2 workers in {elapsed:.2f}s  {'OK' if ok else 'MISMATCH'}")
+    finally:
+        server.shutdown()
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
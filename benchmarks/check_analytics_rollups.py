@@ -0,0 +1,88 @@
+# Checks that the job_stats rollups behind GET /analytics match the full pandas
+# computation, after inserts and after updates that move jobs between counters.
+# Usage (from the repository root): python -m benchmarks.check_analytics_rollups --rows 2000
+import argparse
+import json
+import random
+import sys
+import time
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+use_temp_database()
+
+from database import init_db, SessionLocal, bulk_upsert_jobs, rebuild_job_stats, store_salary_percentiles
+from backend.main import get_analytics, compute_analytics_dataframe
+
+def _comparable(result):
+    return {
+        "total_jobs": result["total_jobs"],
+        "remote_percent": result["remote_percent"],
+        "number_computer_jobs": result.get("number_computer_jobs", 0),
+        "number_of_jobs_today": result.get("number_of_jobs_today", 0),
+        # Ties make the order of equal counts arbitrary, compare the counts only
+        "top_city_counts": [c["count"] for c in result["top_cities"]],
+        "employment_types": {t["type"]: t["count"] for t in result["employment_types"]},
+        "role_families": {r["name"]: r["count"] for r in result.get("role_families", [])},
+        "top_skills": {s["name"]: s["count"] for s in result.get("top_skills", [])},
+        # pandas reports jobs without posted_at under "NaT", the rollups skip them
+        "jobs_by_day": {d["name"]: d["count"] for d in result.get("number_of_jobs_by_days", []) if d["name"] != "NaT"},
+        "salary_percentiles": result.get("salary_percentiles"),
+    }
+
+def check(label):
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        rollup = get_analytics(db)
+        rollup_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        reference = compute_analytics_dataframe(db)
+        pandas_ms = (time.perf_counter() - start) * 1000
+    finally:
+        db.close()
+    # Both paths serve /analytics, a client must get the same keys from either
+    ok = set(rollup) == set(reference) and _comparable(rollup) == _comparable(reference)
+    print(f"{label:<28} {'OK' if ok else 'MISMATCH'}  rollups {rollup_ms:7.1f}ms  pandas {pandas_ms:7.1f}ms")
+    if not ok:
+        print(f"  keys only in rollups: {sorted(set(rollup) - set(reference))}, only in pandas: {sorted(set(reference) - set(rollup))}")
+        print(f"  rollups: {_comparable(rollup)}\n  pandas:  {_comparable(reference)}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics rollup consistency check")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    init_db()
+    results = [check("empty database")]
+    rng = random.Random(7)
+    records = synthetic_job_records(args.rows)
+    bulk_upsert_jobs(records)
+    # The scraper stores the salary percentiles at the end of each cycle
+    store_salary_percentiles()
+    results.append(check("after insert"))
+
+    # Move a third of the jobs to another city/type/day/remote flag and re-upsert them
+    cities = [r["city"] for r in records]
+    for record in rng.sample(records, args.rows // 3):
+        record["city"] = rng.choice(cities)
+        record["employment_type"] = rng.choice(["Full-time", "Contractor", "Part-time", None])
+        record["is_remote"] = not record["is_remote"]
+        record["posted_at"] = rng.choice([None, "2026-01-02T03:04:05.000Z"])
+        record["title"] = rng.choice(["Computer Vision Engineer", "Accountant"])
+        record["description"] = rng.choice(["Python, SQL and Airflow", "Excel and Power BI", None])
+        payload = json.loads(record["raw_data"])
+        payload["job_min_salary"], payload["job_max_salary"], payload["job_salary_period"] = rng.choice([
+            (None, None, None), (90000, 130000, "YEAR"), (40, None, "HOUR"), (5000, 6000, "month")
+        ])
+        record["raw_data"] = json.dumps(payload)
+    bulk_upsert_jobs(records)
+    store_salary_percentiles()
+    results.append(check("after update"))
+
+    rebuild_job_stats()
+    results.append(check("after rebuild"))
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Checks that re-ingesting identical jobs issues no row writes, that refetching them
+# the next day (only the relative job_posted_at text changes) doesn't either, and that
+# only the jobs whose content changed are rewritten.
+# Usage (from the repository root): python -m benchmarks.check_change_detection --rows 500
+import argparse
+import os
+import sys
+from sqlalchemy import event
+from benchmarks.synthetic import use_temp_database, synthetic_api_jobs
+
+use_temp_database()
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+
+from database import init_db, engine
+from Linkedin_scaped_bot import LinkedInScraper
+
+write_statements = []
+
+@event.listens_for(engine, "before_cursor_execute")
+def _record_writes(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith(("INSERT INTO JOBS ", "UPDATE JOBS ")):
+        write_statements.append(statement)
+
+def next_day(posted_at):
+    days = int(posted_at.split()[0]) if posted_at and posted_at.split()[0].isdigit() else 0
+    return f"{days + 1} days ago"
+
+def run(label, scraper, jobs, expected):
+    write_statements.clear()
+    counts = scraper.process_and_save_jobs(jobs)
+    ok = counts == expected
+    print(f"{label:<16} {counts}  job writes: {len(write_statements)}  {'OK' if ok else 'UNEXPECTED'}")
+    return ok, len(write_statements)
+
+def main():
+    parser = argparse.ArgumentParser(description="Change detection check")
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+
+    init_db()
+    scraper = LinkedInScraper()
+    jobs = synthetic_api_jobs(args.rows)
+    results = []
+
+    ok, _ = run("first run", scraper, jobs, {'new': args.rows, 'changed': 0, 'unchanged': 0})
+    results.append(ok)
+    ok, writes = run("identical rerun", scraper, jobs, {'new': 0, 'changed': 0, 'unchanged': args.rows})
+    results.append(ok and writes == 0)
+
+    # The next day JSearch says "22 days ago" instead of "21 days ago"
+    for job in jobs:
+        job["job_posted_at"] = next_day(job.get("job_posted_at"))
+    ok, writes = run("next-day refetch", scraper, jobs, {'new': 0, 'changed': 0, 'unchanged': args.rows})
+    results.append(ok and writes == 0)
+
+    for job in jobs[:10]:
+        job["job_title"] = job["job_title"] + " (Senior)"
+    ok, _ = run("10 changed", scraper, jobs, {'new': 0, 'changed': 10, 'unchanged': args.rows - 10})
+    results.append(ok)
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
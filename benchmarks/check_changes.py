@@ -0,0 +1,102 @@
+# Checks that a client syncing through /jobs/changes ends up with the same jobs as the
+# database after a full sync, a scrape cycle and an idle cycle, and compares the bytes
+# transferred with re-downloading every job.
+# Usage (from the repository root): python -m benchmarks.check_changes --rows 5000
+import argparse
+import random
+import sys
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+use_temp_database()
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from database import init_db, SessionLocal, Job, bulk_upsert_jobs, bump_data_version
+from backend.main import app, response_cache, MAX_PAGE_SIZE
+
+FIELDS = "id,title,employer,city,employment_type,is_remote,posted_at"
+
+def sync(client, local, token):
+    transferred = 0
+    pages = 0
+    while True:
+        params = {"fields": FIELDS, "limit": MAX_PAGE_SIZE}
+        if token:
+            params["since"] = token
+        response = client.get("/jobs/changes", params=params)
+        transferred += len(response.content)
+        pages += 1
+        data = response.json()
+        for job in data["jobs"]:
+            local[job["id"]] = job
+        token = data["next_token"]
+        if not data["has_more"]:
+            return token, transferred, pages
+
+def full_download(client):
+    transferred = 0
+    cursor = None
+    while True:
+        params = {"fields": FIELDS, "limit": MAX_PAGE_SIZE, "include_count": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/jobs", params=params)
+        transferred += len(response.content)
+        cursor = response.json()["next_cursor"]
+        if not cursor:
+            return transferred
+
+def check(client, local, token, label):
+    token, delta_bytes, pages = sync(client, local, token)
+    db = SessionLocal()
+    try:
+        names = FIELDS.split(",")
+        expected = {
+            row.id: {name: getattr(row, name) for name in names}
+            for row in db.query(*[getattr(Job, name) for name in names])
+        }
+    finally:
+        db.close()
+    # Compare through the JSON encoding the API uses, e.g. for datetimes
+    ok = jsonable_encoder(expected) == local
+    full_bytes = full_download(client)
+    print(f"{label:<16} {'OK' if ok else 'MISMATCH'}  changes feed {delta_bytes / 1024:8.1f} KB in {pages} pages  "
+          f"full /jobs download {full_bytes / 1024:8.1f} KB")
+    return token, ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Changes feed consistency check")
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    init_db()
+    rng = random.Random(3)
+    records = synthetic_job_records(args.rows)
+    bulk_upsert_jobs(records)
+    bump_data_version()
+    response_cache.version_check_interval = 0
+
+    local = {}
+    with TestClient(app) as client:
+        token, ok = check(client, local, None, "full sync")
+        results = [ok]
+
+        # A scrape cycle: a tenth new jobs and a twentieth of the existing ones changed
+        for record in rng.sample(records, args.rows // 20):
+            record["title"] = rng.choice(["Computer Vision Engineer", "Accountant"])
+            record["is_remote"] = not record["is_remote"]
+        new_records = synthetic_job_records(args.rows + args.rows // 10, seed=9)[args.rows:]
+        bulk_upsert_jobs(records + new_records)
+        bump_data_version()
+        token, ok = check(client, local, token, "after a cycle")
+        results.append(ok)
+
+        # Nothing changes: one empty page
+        bulk_upsert_jobs(records + new_records)
+        bump_data_version()
+        token, ok = check(client, local, token, "idle cycle")
+        results.append(ok)
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
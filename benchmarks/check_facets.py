@@ -0,0 +1,121 @@
+# Checks /jobs/facets against GROUP BY queries on the same filters, after the bitmap
+# indexes are built and after an incremental refresh, and times both.
+# Usage (from the repository root): python -m benchmarks.check_facets --rows 20000
+import argparse
+import random
+import sys
+import time
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+use_temp_database()
+
+from collections import Counter
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from database import init_db, SessionLocal, Job, bulk_upsert_jobs, bump_data_version
+from backend.main import app, build_jobs_query, facet_index, response_cache, MAX_FACET_VALUES
+
+FILTERS = [
+    {},
+    {"location": "toronto"},
+    {"remote": True},
+    {"type": "full"},
+    {"location": "ontario", "remote": False},
+    {"role": "Data Engineer"},
+    {"collapse": True},
+    {"skill": "python", "remote": False},
+    {"search": "data"},
+    {"min_salary": 100000, "type": "full"},
+]
+FACET_COLUMNS = {
+    "city": Job.city,
+    "state": Job.state,
+    "employment_type": Job.employment_type,
+    "remote": Job.is_remote,
+    "posted_day": func.date(Job.posted_at),
+}
+
+def reference_facets(db, filters):
+    # What a facet UI costs without the index: a count plus one GROUP BY per facet
+    query = build_jobs_query(db, **filters).order_by(None)
+    result = {}
+    for facet, column in FACET_COLUMNS.items():
+        counts = Counter({
+            value if facet != "posted_day" else str(value): count
+            for value, count in query.with_entities(column, func.count(Job.id)).group_by(column) if value is not None
+        })
+        entries = sorted(counts.items(), reverse=True) if facet == "posted_day" else \
+            sorted(counts.items(), key=lambda entry: (-entry[1], str(entry[0])))
+        result[facet] = [{"value": value, "count": count} for value, count in entries[:MAX_FACET_VALUES]]
+    return {"count": query.with_entities(func.count(Job.id)).scalar(), "facets": result}
+
+def check(client, label):
+    db = SessionLocal()
+    ok = True
+    index_s = reference_s = 0.0
+    try:
+        for filters in FILTERS:
+            params = dict(filters, limit=MAX_FACET_VALUES)
+            start = time.perf_counter()
+            response = client.get("/jobs/facets", params=params)
+            index_s += time.perf_counter() - start
+            start = time.perf_counter()
+            reference = reference_facets(db, filters)
+            reference_s += time.perf_counter() - start
+            if response.json() != reference:
+                ok = False
+                print(f"  MISMATCH {filters}")
+    finally:
+        db.close()
+    stats = facet_index.stats()
+    print(f"{label:<22} {'OK' if ok else 'MISMATCH'}  /jobs/facets {index_s * 1000 / len(FILTERS):7.1f}ms  "
+          f"GROUP BY {reference_s * 1000 / len(FILTERS):7.1f}ms  per filter set  "
+          f"({stats['full_builds']} builds, {stats['incremental_refreshes']} incremental, {stats['bitmap_bytes'] / 1024:.0f} KB)")
+    return ok
+
+def time_bitmap_queries(repeat=20):
+    # The bitmap-only filters, without the HTTP layer and the response cache
+    filters = [f for f in FILTERS if not set(f) & {"skill", "search", "min_salary"}]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for f in filters:
+            facet_index.facets(**f)
+    print(f"bitmap facet query      {(time.perf_counter() - start) * 1000 / (repeat * len(filters)):7.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Facet index consistency check")
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    init_db()
+    rng = random.Random(11)
+    records = synthetic_job_records(args.rows)
+    bulk_upsert_jobs(records)
+    bump_data_version()
+    response_cache.version_check_interval = facet_index.version_check_interval = 0
+
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        facet_index.refresh(force=True)
+        print(f"built the index for {args.rows} jobs in {(time.perf_counter() - start) * 1000:.0f}ms")
+        results = [check(client, "after build")]
+        time_bitmap_queries()
+
+        # A scrape cycle: a tenth new jobs and a fifth of the existing ones changed
+        cities = [r["city"] for r in records]
+        for record in rng.sample(records, args.rows // 5):
+            record["city"] = rng.choice(cities)
+            record["employment_type"] = rng.choice(["Full-time", "Contractor", "Part-time", None])
+            record["is_remote"] = not record["is_remote"]
+            record["posted_at"] = rng.choice([None, "2026-01-02T03:04:05.000Z"])
+        new_records = synthetic_job_records(args.rows + args.rows // 10, seed=5)[args.rows:]
+        bulk_upsert_jobs(records + new_records)
+        bump_data_version()
+        start = time.perf_counter()
+        facet_index.refresh()
+        print(f"incremental refresh in {(time.perf_counter() - start) * 1000:.0f}ms")
+        results.append(check(client, "after refresh"))
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
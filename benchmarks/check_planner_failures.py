@@ -0,0 +1,66 @@
+# Checks that pages the scraper fails to fetch don't count against a query in the
+# QueryPlanner: after a cycle where every request is rate limited, and one where the
+# API is unreachable, the query keeps its full page budget. A cycle of genuinely empty
+# pages still counts, and demotes the query.
+# Usage (from the repository root): python -m benchmarks.check_planner_failures
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+from benchmarks.synthetic import use_temp_database
+from benchmarks.stub_server import start_stub_server
+from benchmarks.load_test_api import _free_port
+
+use_temp_database()
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+
+from database import init_db
+from query_planner import QueryPlanner
+from Linkedin_scaped_bot import LinkedInScraper, run_streaming_pipeline
+
+class NoRetryScraper(LinkedInScraper):
+    # 429s are given up on at once instead of after seconds of backoff
+    async def _fetch_page_async(self, client, limiter, query, page, country, max_retries=0):
+        return await super()._fetch_page_async(client, limiter, query, page, country, max_retries)
+
+def run_cycle(url, query, pages, planner):
+    plan = planner.plan([query], pages)
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run_streaming_pipeline(
+            NoRetryScraper(url=url), [query], pages, rate=1000, page_limits=dict(plan), on_page=planner.page_done
+        ))
+    planner.finish()
+    planner.load()
+    return planner.plan([query], pages), planner.stats.get(query)
+
+def check(label, url, query, pages, expected_pages):
+    planner = QueryPlanner()
+    next_plan, stat = run_cycle(url, query, pages, planner)
+    ok = next_plan == [(query, expected_pages)]
+    print(f"{label:<22} next plan {next_plan}  yield_per_call {stat['yield_per_call'] if stat else None}  "
+          f"{'OK' if ok else 'UNEXPECTED'}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Planner check for failed pages")
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+
+    init_db()
+    results = []
+    server = start_stub_server(rate_limit_ratio=1.0)
+    try:
+        results.append(check("every request 429", server.url, "Rate limited query", args.pages, args.pages))
+        server.rate_limit_ratio = 0.0
+        server.recording = {}
+        results.append(check("empty pages", server.url, "Empty query", args.pages, 0))
+    finally:
+        server.shutdown()
+    # Nothing listens on a free port, every request fails to connect
+    results.append(check("API unreachable", f"http://127.0.0.1:{_free_port()}", "Unreachable query", args.pages, args.pages))
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# EXPLAIN-based check that the common GET /jobs filter combinations are answered
+# from indexes rather than full scans of the jobs table, on SQLite and PostgreSQL.
+# Usage (from the repository root): python -m benchmarks.check_query_plans --rows 20000
+# Set DATABASE_URL to a scratch PostgreSQL database to check the PostgreSQL plans.
+import argparse
+import json
+import sys
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+use_temp_database()
+
+from sqlalchemy import func
+from database import init_db, engine, SessionLocal, Job, bulk_upsert_jobs, near_filter
+from backend.main import build_jobs_query
+
+FILTERS = [
+    {},
+    {"location": "toronto"},
+    {"location": "on"},
+    {"remote": True},
+    {"type": "full-time"},
+    {"location": "toronto", "remote": False},
+    {"location": "ontario", "type": "contract"},
+    {"remote": True, "type": "full-time"},
+    {"location": "calgary", "remote": True, "type": "full-time"},
+    {"role": "Data Engineer"},
+    {"skill": "python"},
+    {"role": "data analyst", "skill": "sql"},
+    {"cluster": "synthetic-1"},
+    {"min_salary": 150000},
+    {"max_salary": 60000},
+    {"min_salary": 80000, "max_salary": 120000},
+]
+
+def page_query(db, filters):
+    query = build_jobs_query(db, **filters)
+    return query.with_entities(Job.id).order_by(Job.posted_at.desc().nulls_last(), Job.id.desc()).limit(51)
+
+def count_query(db, filters):
+    return build_jobs_query(db, **filters).with_entities(func.count(Job.id))
+
+def explain(conn, query):
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+        return json.dumps(plan if isinstance(plan, list) else json.loads(plan))
+    return "; ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+def uses_index(plan, filtered):
+    if engine.dialect.name == "postgresql":
+        return '"Seq Scan"' not in plan
+    # Without filters walking ix_jobs_posted_at_id for the first page is the best plan,
+    # with filters the jobs table has to be searched through an index
+    if not filtered:
+        return "SCAN jobs" not in plan or "USING INDEX" in plan or "USING COVERING INDEX" in plan
+    return "SCAN jobs" not in plan
+
+def main():
+    parser = argparse.ArgumentParser(description="Query plan check for /jobs filters")
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    existing = db.query(Job).count()
+    if existing < args.rows:
+        records = synthetic_job_records(args.rows)[existing:]
+        for start in range(0, len(records), 5000):
+            bulk_upsert_jobs(records[start:start + 5000])
+
+    failures = 0
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        if engine.dialect.name == "postgresql":
+            # Small test tables favour sequential scans, this checks that an index path exists
+            conn.exec_driver_sql("SET enable_seqscan = off")
+        for filters in FILTERS:
+            for label, query in [("page", page_query(db, filters)), ("count", count_query(db, filters))]:
+                plan = explain(conn, query)
+                ok = uses_index(plan, bool(filters))
+                failures += not ok
+                print(f"{'OK  ' if ok else 'SCAN'} {label:<5} {json.dumps(filters):<58} {plan if engine.dialect.name == 'sqlite' else ''}")
+        # /jobs?near= fetches its candidates through the geohash index, not the page order
+        near = build_jobs_query(db).order_by(None).filter(near_filter(43.65, -79.38, 25)).with_entities(Job.id)
+        plan = explain(conn, near)
+        ok = uses_index(plan, True)
+        failures += not ok
+        print(f"{'OK  ' if ok else 'SCAN'} {'near':<5} {'43.65,-79.38 25km':<58} {plan if engine.dialect.name == 'sqlite' else ''}")
+    db.close()
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Record/replay fixtures of JSearch responses, in the format the stub server replays
+# (StubJSearchServer.recording): {"cycles": [{query: {page: [jobs]}}]}, one entry per scrape cycle.
+# Record real responses (needs RAPIDAPI_KEY, every page is one API call of quota):
+#   python -m benchmarks.fixtures record --out fixtures.json --pages 2 --queries 3
+# Write a synthetic job market built from output.json:
+#   python -m benchmarks.fixtures synthetic --out fixtures.json --cycles 10 --pages 3
+import argparse
+import json
+import random
+from benchmarks.synthetic import load_sample_jobs, OUTPUT_JSON
+
+PAGE_SIZE = 10
+POSTING_DAYS = 7
+DAILY_POSTINGS = {
+    "Software Engineer": 60, "Data Analyst": 30, "Data Engineer": 25, "Business Analyst": 20,
+    "Project Manager": 20, "Product Manager": 15, "Data Scientist": 15, "DevOps Engineer": 12,
+    "Frontend Developer": 12, "Backend Developer": 12, "QA Engineer": 10, "Cloud Engineer": 10,
+    "Machine Learning Engineer": 10, "AI Engineer": 10,
+}
+# (query role, role whose postings it also returns, share of those postings)
+OVERLAPS = [
+    ("Frontend Developer", "Software Engineer", 0.3),
+    ("Backend Developer", "Software Engineer", 0.3),
+    ("MLOps Engineer", "Machine Learning Engineer", 0.5),
+    ("AI Engineer", "Machine Learning Engineer", 0.5),
+    ("Cloud Engineer", "DevOps Engineer", 0.5),
+    ("Data Visualization Engineer", "Data Analyst", 0.5),
+]
+
+def _role(query):
+    return query.replace(" jobs in Canada", "")
+
+def synthetic_recording(queries, cycles, pages, seed=11):
+    """
+    A job market built from the output.json postings: postings live a week, broad queries
+    get many new postings a day and the niche "Data X Engineer" queries mostly return
+    the same postings as "Data Engineer". Results are newest first, PAGE_SIZE per page.
+    """
+    rng = random.Random(seed)
+    samples = load_sample_jobs()
+    roles = [_role(query) for query in queries]
+    overlaps = list(OVERLAPS) + [
+        (role, "Data Engineer", 0.5) for role in roles
+        if role.startswith("Data") and role not in DAILY_POSTINGS and role != "Data Visualization Engineer"
+    ]
+    postings = []
+    recording = []
+    for day in range(cycles):
+        for role in roles:
+            for _ in range(rng.randint(0, 2 * DAILY_POSTINGS.get(role, 1))):
+                number = len(postings)
+                job = dict(samples[number % len(samples)])
+                job.update(job_id=f"replay-{number}", job_title=f"{role} {number}")
+                matches = {role} | {query_role for query_role, source, share in overlaps if source == role and rng.random() < share}
+                postings.append((day, number, job, matches))
+        active = [posting for posting in postings if posting[0] > day - POSTING_DAYS]
+        cycle = {}
+        for query, role in zip(queries, roles):
+            results = sorted((p for p in active if role in p[3]), key=lambda p: (-p[0], -p[1]))
+            cycle[query] = {
+                str(page): [p[2] for p in results[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]]
+                for page in range(1, pages + 1)
+            }
+        recording.append(cycle)
+    return recording
+
+def load_fixture(path=OUTPUT_JSON):
+    """
+    Returns the list of recorded cycles in path. A single JSearch response such as
+    output.json becomes one cycle serving it for its own query and page.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if "cycles" in data:
+        return data["cycles"]
+    parameters = data.get("parameters", {})
+    return [{parameters.get("query", ""): {str(parameters.get("page", 1)): data.get("data", [])}}]
+
+def save_fixture(path, cycles):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"cycles": cycles}, f)
+
+def record_cycle(scraper, queries, pages):
+    """
+    Fetches every query through scraper.fetch_jobs and returns the pages as one cycle.
+    """
+    cycle = {}
+    def on_page(query, page, jobs):
+        cycle.setdefault(query, {})[str(page)] = jobs
+        return True
+    for query in queries:
+        scraper.fetch_jobs(query, pages=pages, on_page=on_page)
+    return cycle
+
+def main():
+    parser = argparse.ArgumentParser(description="JSearch response fixtures")
+    parser.add_argument("mode", choices=["record", "synthetic"])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=3, help="Use the first N scraper queries (default: 3)")
+    parser.add_argument("--cycles", type=int, default=10, help="Cycles of the synthetic market (default: 10)")
+    args = parser.parse_args()
+
+    from Linkedin_scaped_bot import LinkedInScraper, QUERIES
+    queries = QUERIES[:args.queries] if args.mode == "record" else QUERIES
+    if args.mode == "record":
+        cycles = [record_cycle(LinkedInScraper(), queries, args.pages)]
+    else:
+        cycles = synthetic_recording(queries, args.cycles, args.pages)
+    save_fixture(args.out, cycles)
+    pages = sum(len(query_pages) for cycle in cycles for query_pages in cycle.values())
+    print(f"Wrote {len(cycles)} cycle(s), {pages} pages to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Load test for GET /jobs and GET /analytics: N concurrent clients, p50/p99 latency per path.
+# Usage (from the repository root):
+#   python -m benchmarks.load_test_api --serve --rows 20000 --clients 200
+#   python -m benchmarks.load_test_api --serve --sizes 10000 50000 100000 --clients 50
+#   python -m benchmarks.load_test_api --url http://127.0.0.1:8000 --clients 200
+# --serve starts uvicorn on a throwaway SQLite database filled with synthetic jobs,
+# --sizes repeats the run as the table grows to each size.
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+PATHS = [
+    "/jobs?limit=50&fields=id,title,employer,city,posted_at",
+    "/jobs?location=toronto&limit=50",
+    "/jobs?search=data&limit=20",
+    "/jobs?role=data%20analyst&skill=sql&limit=50",
+    "/jobs?collapse=true&limit=50",
+    "/jobs/facets?location=toronto&collapse=true",
+    "/jobs?min_salary=100000&limit=50",
+    "/jobs?near=43.65,-79.38&radius_km=50&limit=50",
+    "/analytics",
+]
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(rows, cache):
+    use_temp_database()
+    from database import init_db, bulk_upsert_jobs, engine
+    init_db()
+    with engine.connect() as conn:
+        existing = conn.exec_driver_sql("SELECT COUNT(*) FROM jobs").scalar()
+    records = synthetic_job_records(rows)[existing:]
+    for start in range(0, len(records), 5000):
+        bulk_upsert_jobs(records[start:start + 5000])
+
+    port = _free_port()
+    env = dict(os.environ)
+    if not cache:
+        env["RESPONSE_CACHE_SIZE"] = "0"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(url + "/", timeout=1)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+async def run_load(url, path, clients, requests_per_client):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="API load test")
+    parser.add_argument("--url", help="Base URL of a running API")
+    parser.add_argument("--serve", action="store_true", help="Start a local API on synthetic data")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic jobs for --serve (default: 20000)")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Run --serve at each of these table sizes instead of --rows")
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache on with --serve")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5, help="Requests per client and path (default: 5)")
+    args = parser.parse_args()
+
+    if not args.url and not args.serve:
+        parser.error("pass --url or --serve")
+    sizes = (args.sizes or [args.rows]) if args.serve else [None]
+
+    for rows in sorted(sizes, key=lambda size: size or 0):
+        process = None
+        url = args.url
+        if args.serve:
+            process, url = start_server(rows, args.cache)
+            print(f"\n{rows} jobs")
+        try:
+            print(f"{'path':<58} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8} {'errors':>7}")
+            for path in PATHS:
+                latencies, errors, elapsed = asyncio.run(run_load(url, path, args.clients, args.requests))
+                print(f"{path:<58} {percentile(latencies, 50) * 1000:8.1f} {percentile(latencies, 99) * 1000:8.1f} "
+                      f"{len(latencies) / elapsed:8.1f} {errors:>7}")
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+if __name__ == "__main__":
+    main()
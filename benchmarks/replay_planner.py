@@ -0,0 +1,87 @@
+# Replays recorded JSearch responses over several scrape cycles through the stub
+# server, with the QueryPlanner, and compares API calls and job coverage with
+# fetching every query for --pages pages (the scraper's behaviour without it).
+# Without --recording the synthetic job market of benchmarks.fixtures is replayed.
+# Usage (from the repository root): python -m benchmarks.replay_planner --cycles 10 --pages 3
+#   --recording FILE replays a fixture file (see benchmarks.fixtures), --save FILE writes the synthetic one
+import argparse
+import contextlib
+import io
+import os
+from benchmarks.synthetic import use_temp_database
+from benchmarks.stub_server import start_stub_server
+from benchmarks.fixtures import synthetic_recording, load_fixture, save_fixture
+
+use_temp_database()
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+
+from database import init_db, SessionLocal, Job
+from query_planner import QueryPlanner
+from Linkedin_scaped_bot import LinkedInScraper, QUERIES, run_scraping_cycle
+
+def baseline(cycle, pages):
+    # Every query for `pages` pages, stopping after the first empty page like fetch_jobs
+    calls = 0
+    ids = set()
+    for query_pages in cycle.values():
+        for page in range(1, pages + 1):
+            calls += 1
+            jobs = query_pages.get(str(page), [])
+            if not jobs:
+                break
+            ids.update(job["job_id"] for job in jobs)
+    return calls, ids
+
+def main():
+    parser = argparse.ArgumentParser(description="Query planner replay harness")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--recording", help="Replay this recording instead of a synthetic one")
+    parser.add_argument("--save", help="Write the synthetic recording to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper's output")
+    args = parser.parse_args()
+
+    if args.recording:
+        recording = load_fixture(args.recording)
+    else:
+        recording = synthetic_recording(QUERIES, args.cycles, args.pages)
+        if args.save:
+            save_fixture(args.save, recording)
+    queries = list(recording[0])
+
+    init_db()
+    server = start_stub_server()
+    scraper = LinkedInScraper(url=server.url)
+    planner = QueryPlanner()
+    baseline_ids = set()
+    totals = {"baseline": 0, "planner": 0}
+    print(f"{'cycle':>5} {'baseline calls':>15} {'planner calls':>14} {'queries run':>12} {'stopped early':>14}")
+    try:
+        for number, cycle in enumerate(recording, start=1):
+            server.recording = cycle
+            calls, ids = baseline(cycle, args.pages)
+            baseline_ids |= ids
+            before = server.request_count
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with output:
+                run_scraping_cycle(scraper, queries, args.pages, use_async=True, concurrency=8, rate=1000, planner=planner)
+            planner_calls = server.request_count - before
+            summary = planner.summary()
+            totals["baseline"] += calls
+            totals["planner"] += planner_calls
+            print(f"{number:>5} {calls:>15} {planner_calls:>14} {summary['queries_planned']:>12} {summary['stopped_early']:>14}")
+    finally:
+        server.shutdown()
+
+    db = SessionLocal()
+    try:
+        stored = {job_id for (job_id,) in db.query(Job.id)}
+    finally:
+        db.close()
+    coverage = len(stored & baseline_ids) / len(baseline_ids) if baseline_ids else 1.0
+    saved = 1 - totals["planner"] / totals["baseline"] if totals["baseline"] else 0
+    print(f"API calls: {totals['baseline']} without the planner, {totals['planner']} with it ({saved:.0%} fewer)")
+    print(f"Coverage: {len(stored & baseline_ids)} of {len(baseline_ids)} job ids ({coverage:.1%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Reports table size and /jobs load time with raw_data stored inline (the old
+# layout) and after migrate_raw_data moves it to the compressed job_raw_data table.
+# Usage (from the repository root): python -m benchmarks.report_raw_data --rows 20000
+import argparse
+import os
+import time
+from benchmarks.synthetic import use_temp_database, synthetic_job_records
+
+use_temp_database()
+
+from sqlalchemy.orm import undefer
+from database import init_db, engine, SessionLocal, Job, JobRawData, bulk_upsert_jobs, migrate_raw_data, decompress_raw_data, DATABASE_URL
+
+def vacuum():
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+
+def table_sizes():
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            jobs = conn.exec_driver_sql("SELECT pg_total_relation_size('jobs')").scalar()
+            raw = conn.exec_driver_sql("SELECT pg_total_relation_size('job_raw_data')").scalar()
+            return jobs, raw
+        # SQLite keeps everything in one file, dbstat needs SQLITE_ENABLE_DBSTAT_VTAB
+        try:
+            rows = conn.exec_driver_sql("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").all()
+            sizes = dict(rows)
+            return sizes.get('jobs', 0), sizes.get('job_raw_data', 0)
+        except Exception:
+            return os.path.getsize(DATABASE_URL.replace("sqlite:///", "")), 0
+
+def load_time(repeat=3, legacy=False):
+    # The old get_jobs loaded full Job objects, raw_data included
+    timings = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        start = time.perf_counter()
+        query = db.query(Job)
+        if legacy:
+            query = query.options(undefer(Job.raw_data))
+        query.all()
+        timings.append(time.perf_counter() - start)
+        db.close()
+    return min(timings) * 1000
+
+def report(label, legacy):
+    jobs_size, raw_size = table_sizes()
+    print(f"{label:<22} jobs {jobs_size / 1e6:8.2f} MB  job_raw_data {raw_size / 1e6:8.2f} MB  load all jobs {load_time(legacy=legacy):8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="raw_data storage report")
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    init_db()
+    records = synthetic_job_records(args.rows)
+    for start in range(0, len(records), 5000):
+        bulk_upsert_jobs(records[start:start + 5000])
+
+    # Recreate the old layout: payload inline in jobs.raw_data, no side table
+    db = SessionLocal()
+    for stored in db.query(JobRawData).yield_per(1000):
+        db.query(Job).filter(Job.id == stored.job_id).update({Job.raw_data: decompress_raw_data(stored.data)}, synchronize_session=False)
+    db.query(JobRawData).delete()
+    db.commit()
+    db.close()
+    vacuum()
+    report("inline raw_data", legacy=True)
+
+    migrate_raw_data()
+    vacuum()
+    report("compressed side table", legacy=False)
+
+if __name__ == "__main__":
+    main()
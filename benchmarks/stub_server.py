@@ -0,0 +1,108 @@
+# Local stand-in for the JSearch /search endpoint. Serves output.json-shaped
+# payloads with job ids rewritten per query and page, or replays recorded
+# responses, at a configurable latency and 429 rate.
+# Usage (from the repository root): python -m benchmarks.stub_server --port 8765 --latency 0.2
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from benchmarks.synthetic import load_sample_jobs
+
+class StubJSearchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, rate_limit_ratio=0.0, pages_per_query=10, seed=None):
+        super().__init__(address, StubJSearchHandler)
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.pages_per_query = pages_per_query
+        self.samples = load_sample_jobs()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.rate_limited_count = 0
+        # {query: {page: [jobs]}} to replay instead of the generated pages, pages given as strings
+        self.recording = None
+
+    def handle_error(self, request, client_address):
+        # Killed clients (see bench_workers) hang up mid-response
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/search"
+
+    def page_payload(self, query, page):
+        if self.recording is not None:
+            return {"status": "OK", "parameters": {"query": query, "page": page}, "data": self.recording.get(query, {}).get(str(page), [])}
+        if page > self.pages_per_query:
+            return {"status": "OK", "data": []}
+        data = []
+        for job in self.samples:
+            job = dict(job)
+            job["job_id"] = f"{query}|{page}|{job['job_id']}"
+            data.append(job)
+        return {"status": "OK", "parameters": {"query": query, "page": page}, "data": data}
+
+class StubJSearchHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get("query", [""])[0]
+        page = int(params.get("page", ["1"])[0])
+
+        with server.lock:
+            server.request_count += 1
+            rate_limited = server.rng.random() < server.rate_limit_ratio
+            if rate_limited:
+                server.rate_limited_count += 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if rate_limited:
+            body = json.dumps({"message": "Too many requests"}).encode()
+            self.send_response(429)
+        else:
+            body = json.dumps(server.page_payload(query, page)).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(latency=0.0, rate_limit_ratio=0.0, pages_per_query=10, port=0, seed=None):
+    """
+    Starts the stub server on a background thread and returns it, call shutdown() when done.
+    """
+    server = StubJSearchServer(("127.0.0.1", port), latency, rate_limit_ratio, pages_per_query, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub JSearch API server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds of latency per request (default: 0.2)")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Share of requests answered with 429 (default: 0)")
+    parser.add_argument("--pages-per-query", type=int, default=10, help="Pages served before returning empty data (default: 10)")
+    args = parser.parse_args()
+
+    server = StubJSearchServer(("127.0.0.1", args.port), args.latency, args.rate_limit_ratio, args.pages_per_query)
+    print(f"Stub JSearch API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
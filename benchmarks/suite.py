@@ -0,0 +1,57 @@
+# Runs every benchmark and consistency check with small sizes, each in its own
+# process and throwaway SQLite database, and summarizes exit codes and timings.
+# With DATABASE_URL set they all run against that database instead, use a throwaway one.
+# Usage (from the repository root): python -m benchmarks.suite [--only bench_scrape load_test_api] [--quiet]
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SUITE = [
+    ("check_change_detection", ["--rows", "300"]),
+    ("check_analytics_rollups", ["--rows", "1000"]),
+    ("check_query_plans", ["--rows", "3000"]),
+    ("check_facets", ["--rows", "3000"]),
+    ("check_changes", ["--rows", "2000"]),
+    ("bench_upsert", ["--rows", "1000"]),
+    ("bench_enrichment", ["--docs", "1000"]),
+    ("bench_dedup", ["--sizes", "1000", "5000", "--ingest-rows", "1000"]),
+    ("bench_search", ["--rows", "5000", "--repeat", "1"]),
+    ("bench_geo", ["--points", "20000", "--queries", "10"]),
+    ("bench_analytics", ["--sizes", "10000"]),
+    ("report_raw_data", ["--rows", "2000"]),
+    ("bench_fetch", ["--queries", "4", "--pages", "2", "--skip-serial"]),
+    ("replay_planner", ["--cycles", "5"]),
+    ("check_planner_failures", []),
+    ("bench_scrape", ["--cycles", "3", "--rate-limit-ratio", "0.05"]),
+    ("bench_scrape", ["--cycles", "3", "--planner"]),
+    ("bench_workers", ["--workers", "1", "2", "--pages", "1"]),
+    ("bench_startup", ["--repeat", "2", "--serve", "--rows", "2000"]),
+    ("bench_payloads", ["--rows", "3000", "--repeat", "5"]),
+    ("load_test_api", ["--serve", "--sizes", "2000", "10000", "--clients", "20", "--requests", "3"]),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args()
+
+    results = []
+    for name, arguments in SUITE:
+        if args.only and name not in args.only:
+            continue
+        command = [sys.executable, "-m", f"benchmarks.{name}"] + arguments
+        print(f"\n=== {' '.join(command[2:])}", flush=True)
+        start = time.perf_counter()
+        completed = subprocess.run(command, env=dict(os.environ), capture_output=args.quiet, text=True)
+        results.append((" ".join([name] + arguments), completed.returncode, time.perf_counter() - start))
+
+    print(f"\n{'benchmark':<72} {'exit':>5} {'seconds':>8}")
+    for label, returncode, seconds in results:
+        print(f"{label:<72} {returncode:>5} {seconds:8.1f}")
+    sys.exit(1 if any(returncode for _, returncode, _ in results) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Helpers shared by the benchmark scripts: a throwaway database and
+# synthetic job records built from the recorded JSearch payload in output.json.
+import os
+import json
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+OUTPUT_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output.json")
+
+def use_temp_database():
+    # Must run before `database` is imported, it reads DATABASE_URL at import time
+    if not os.environ.get("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(prefix="jobs_bench_"), "jobs.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return os.environ["DATABASE_URL"]
+
+# (period, low, high) of the salaries given to synthetic jobs, most JSearch jobs have none
+SALARY_RANGES = [("YEAR", 50000, 180000), ("HOUR", 18, 95), ("MONTH", 3500, 12000)]
+
+def load_sample_jobs():
+    with open(OUTPUT_JSON, encoding="utf-8") as f:
+        return json.load(f).get("data", [])
+
+def synthetic_api_jobs(n, seed=42):
+    """
+    Returns n JSearch-shaped job dicts with unique ids, derived from output.json.
+    """
+    rng = random.Random(seed)
+    # Separate stream so adding salaries left the other synthetic fields unchanged
+    salary_rng = random.Random(seed + 1)
+    samples = load_sample_jobs()
+    now = datetime.utcnow()
+    jobs = []
+    for i in range(n):
+        job = dict(samples[i % len(samples)])
+        job["job_id"] = f"synthetic-{i}"
+        job["job_posted_at_datetime_utc"] = (now - timedelta(days=rng.randint(0, 30))).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        job["job_is_remote"] = rng.random() < 0.2
+        job["job_min_salary"] = job["job_max_salary"] = job["job_salary_period"] = None
+        if salary_rng.random() < 0.4:
+            period, low, high = salary_rng.choice(SALARY_RANGES)
+            job["job_min_salary"] = round(salary_rng.uniform(low, high))
+            job["job_max_salary"] = round(job["job_min_salary"] * salary_rng.uniform(1, 1.4))
+            job["job_salary_period"] = period
+        jobs.append(job)
+    return jobs
+
+def to_job_record(job):
+    return {
+        'id': job.get('job_id'),
+        'title': job.get('job_title'),
+        'employer': job.get('employer_name'),
+        'logo': job.get('employer_logo'),
+        'city': job.get('job_city'),
+        'state': job.get('job_state'),
+        'country': job.get('job_country'),
+        'description': job.get('job_description'),
+        'apply_link': job.get('job_apply_link'),
+        'is_remote': job.get('job_is_remote', False),
+        'employment_type': job.get('job_employment_type'),
+        'posted_at': job.get('job_posted_at_datetime_utc'),
+        'raw_data': json.dumps(job)
+    }
+
+def synthetic_job_records(n, seed=42):
+    return [to_job_record(job) for job in synthetic_api_jobs(n, seed)]
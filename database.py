@@ -1,11 +1,24 @@
 import os
-from sqlalchemy import create_engine, Column, Text, Boolean, DateTime, String
+from sqlalchemy import create_engine, Column, Text, Boolean, DateTime, String, Integer, BigInteger, Float, LargeBinary, Index
+from sqlalchemy import text, bindparam, inspect, func, or_, and_, literal_column, select, update, delete, cast
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, deferred
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime
 import re
+import json
+import time
+import hashlib
+import zlib
 import urllib.parse
+from enrichment import enrich_record
+from geo import encode_geohash, parse_coordinates, bounding_box, covering_cells
+from salary import annualize_salary, salary_midpoint, salary_distribution
+from metrics import REGISTRY, instrument_engine
 
 # Database connection URL
 # Default to SQLite for local development if DATABASE_URL is not set
@@ -32,7 +45,53 @@ if DATABASE_URL.count('@') > 1:
         DATABASE_URL = f"{scheme}://{user}:{urllib.parse.quote_plus(password)}@{host}"
 
 engine = create_engine(DATABASE_URL)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for the API (asyncpg for PostgreSQL, aiosqlite for SQLite).
+# Created on first use so the scraper doesn't need the async drivers installed.
+# SQLite serializes writers and aiosqlite runs a thread per connection, so it gets a small pool
+_IS_SQLITE = DATABASE_URL.startswith("sqlite")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5 if _IS_SQLITE else 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 0 if _IS_SQLITE else 20))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+_async_engine = None
+_async_session_factory = None
+
+def _async_database_url():
+    url = make_url(DATABASE_URL)
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+        # asyncpg takes the libpq sslmode values through its ssl argument
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"])
+            connect_args["ssl"] = sslmode
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, connect_args
+
+def get_async_engine():
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        url, connect_args = _async_database_url()
+        _async_engine = create_async_engine(
+            url,
+            connect_args=connect_args,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=url.get_backend_name() == "postgresql",
+            pool_recycle=1800,
+        )
+        instrument_engine(_async_engine.sync_engine)
+        _async_session_factory = async_sessionmaker(_async_engine, expire_on_commit=False)
+    return _async_engine
+
+def AsyncSessionLocal():
+    get_async_engine()
+    return _async_session_factory()
 Base = declarative_base()
 
 class Job(Base):
@@ -50,83 +109,1042 @@ class Job(Base):
     is_remote = Column(Boolean)
     employment_type = Column(Text)
     posted_at = Column(DateTime)
-    raw_data = Column(Text)
+    # Legacy inline payload, emptied by migrate_raw_data. Payloads now live
+    # compressed in job_raw_data, see load_raw_data.
+    raw_data = deferred(Column(Text))
+    content_hash = Column(String)
+    # Lowercased copies of the filter columns (see NORMALIZED_COLUMNS), indexed by migration 2
+    city_norm = Column(Text)
+    state_norm = Column(Text)
+    country_norm = Column(Text)
+    employment_type_norm = Column(Text)
+    # Set at ingest by enrichment.classify_title, indexed by migration 3
+    role_family = Column(Text)
+    # id of the first-seen posting of this job, equal to id for canonical postings (see _assign_clusters)
+    cluster_id = Column(String)
+    # JSearch job_latitude/job_longitude, geohash is indexed by migration 5 (see near_filter)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String)
+    # JSearch job_min_salary/job_max_salary converted to a yearly amount, indexed by migration 6
+    annual_salary_min = Column(Float)
+    annual_salary_max = Column(Float)
+    # Position in the /jobs/changes feed, renumbered on every write (see _next_change_seqs)
+    change_seq = Column(BigInteger)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+class JobRawData(Base):
+    """
+    zlib-compressed JSearch payload of a job, kept out of the jobs table so
+    listing and analytics queries never read it.
+    """
+    __tablename__ = "job_raw_data"
+
+    job_id = Column(String, primary_key=True)
+    data = Column(LargeBinary)
+
+class JobSkill(Base):
+    """
+    Skill tags extracted from a job's description and highlights, one row per (job, skill).
+    """
+    __tablename__ = "job_skills"
+    __table_args__ = (Index("ix_job_skills_skill_job_id", "skill", "job_id"),)
+
+    job_id = Column(String, primary_key=True)
+    skill = Column(String, primary_key=True)
+
+class JobSignature(Base):
+    """
+    MinHash signature of a canonical job (see dedup.py), compared against new postings
+    that share an LSH bucket with it.
+    """
+    __tablename__ = "job_signatures"
+
+    job_id = Column(String, primary_key=True)
+    signature = Column(LargeBinary)
+
+class JobLshBucket(Base):
+    """
+    LSH band buckets of the canonical jobs, one row per (band key, job).
+    """
+    __tablename__ = "job_lsh_buckets"
+    __table_args__ = (Index("ix_job_lsh_buckets_job_id", "job_id"),)
+
+    bucket = Column(BigInteger, primary_key=True)
+    job_id = Column(String, primary_key=True)
+
+class QueryStat(Base):
+    """
+    Yield of one scraper query over recent cycles, kept by query_planner.QueryPlanner.
+    """
+    __tablename__ = "query_stats"
+
+    query = Column(String, primary_key=True)
+    # Moving average of new job ids per API call
+    yield_per_call = Column(Float)
+    calls = Column(Integer, nullable=False, default=0)
+    new_jobs = Column(Integer, nullable=False, default=0)
+    cycles_run = Column(Integer, nullable=False, default=0)
+    # Cycles skipped in a row since the query last ran
+    cycles_skipped = Column(Integer, nullable=False, default=0)
+    # Pages planned for the query in the last cycle, 0 when it was skipped
+    planned_pages = Column(Integer)
+    last_run_at = Column(DateTime)
+
+class ScrapeCycle(Base):
+    """
+    A scrape cycle enqueued for the scrape workers, see work_queue.WorkQueue.
+    """
+    __tablename__ = "scrape_cycles"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # JSON {query: pages} as planned, 0 for the queries the planner skipped
+    plan = Column(Text)
+    # Whether the plan came from the QueryPlanner, which then gets the cycle's yields
+    planned = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+class ScrapeTask(Base):
+    """
+    One page of one query in a scrape cycle. Workers lease tasks, and the next page of a
+    query is enqueued when its previous page is done, so a query's progress survives a crash.
+    """
+    __tablename__ = "scrape_tasks"
+    __table_args__ = (
+        Index("ix_scrape_tasks_cycle_query_page", "cycle_id", "query", "page", unique=True),
+        Index("ix_scrape_tasks_status_available_at", "status", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cycle_id = Column(Integer, nullable=False)
+    query = Column(String, nullable=False)
+    page = Column(Integer, nullable=False)
+    max_pages = Column(Integer, nullable=False)
+    # Stop paging once a page is mostly known jobs (QueryPlanner.page_done)
+    early_stop = Column(Boolean, nullable=False, default=False)
+    # pending, leased, done or failed
+    status = Column(String, nullable=False, default='pending')
+    # When a pending task may be claimed, or when the lease of a leased task runs out
+    available_at = Column(DateTime, nullable=False)
+    lease_owner = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    jobs_found = Column(Integer)
+    jobs_new = Column(Integer)
+    error = Column(Text)
+    updated_at = Column(DateTime)
+
+class AppMeta(Base):
+    """
+    Small key/value settings, e.g. the data_version stamped after each scrape cycle.
+    """
+    __tablename__ = "app_meta"
+
+    key = Column(String, primary_key=True)
+    value = Column(Text)
+
+class AnalyticsSnapshot(Base):
+    """
+    Parquet snapshot of the analytics columns, written by the scraper after each cycle.
+    """
+    __tablename__ = "analytics_snapshots"
+
+    name = Column(String, primary_key=True)
+    data_version = Column(String)
+    data = Column(LargeBinary)
+    created_at = Column(DateTime)
+
+class JobStat(Base):
+    """
+    Pre-aggregated analytics counters, kept up to date by bulk_upsert_jobs.
+    dimension is one of total, remote, computer, city, employment_type, day, role or skill.
+    """
+    __tablename__ = "job_stats"
+
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
 
 def get_db_connection():
     # This now returns a SQLAlchemy engine for compatibility if needed, 
     # but we'll use SessionLocal for ORM operations.
     return engine.connect()
 
+def _add_missing_columns():
+    # create_all only creates missing tables, add columns introduced since the table was created
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+        with engine.begin() as conn:
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                    print(f"Added column {table.name}.{column.name}")
+
+# Schema migrations, applied in order once per database. The applied version
+# is kept in app_meta under schema_version.
+def _migrate_normalized_columns(conn):
+    # Backfilled in Python so the values match normalize_filter_value exactly
+    # (SQLite's lower() only folds ASCII)
+    source = [getattr(Job, col) for col in NORMALIZED_COLUMNS.values()]
+    rows = conn.execute(select(Job.id, *source)).all()
+    updates = []
+    for row in rows:
+        values = {'b_id': row.id}
+        for norm, col in NORMALIZED_COLUMNS.items():
+            values[f'b_{norm}'] = normalize_filter_value(row._mapping[col])
+        updates.append(values)
+    if updates:
+        conn.execute(
+            update(Job).where(Job.id == bindparam('b_id')).values({norm: bindparam(f'b_{norm}') for norm in NORMALIZED_COLUMNS}),
+            updates
+        )
+
+def _newest_first_index_columns():
+    if engine.dialect.name == "postgresql":
+        # Matches ORDER BY posted_at DESC NULLS LAST, id DESC
+        return "posted_at DESC NULLS LAST, id DESC"
+    # SQLite sorts NULLs first, so an ascending index walked backwards gives the same order
+    return "posted_at, id"
+
+def _migrate_filter_indexes(conn):
+    newest_first = _newest_first_index_columns()
+    # text_pattern_ops lets LIKE 'x%' use the index
+    pattern_ops = " text_pattern_ops" if engine.dialect.name == "postgresql" else ""
+    for statement in [
+        f"CREATE INDEX IF NOT EXISTS ix_jobs_posted_at_id ON jobs ({newest_first})",
+        f"CREATE INDEX IF NOT EXISTS ix_jobs_is_remote_posted_at ON jobs (is_remote, {newest_first})",
+        f"CREATE INDEX IF NOT EXISTS ix_jobs_city_norm ON jobs (city_norm{pattern_ops})",
+        f"CREATE INDEX IF NOT EXISTS ix_jobs_state_norm ON jobs (state_norm{pattern_ops})",
+        f"CREATE INDEX IF NOT EXISTS ix_jobs_country_norm ON jobs (country_norm{pattern_ops})",
+        f"CREATE INDEX IF NOT EXISTS ix_jobs_employment_type_norm ON jobs (employment_type_norm{pattern_ops})",
+    ]:
+        conn.exec_driver_sql(statement)
+
+def _migrate_enrichment(conn, batch_size=1000):
+    # Classifies existing jobs and extracts their skills, payloads are read to get job_highlights
+    conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_jobs_role_family_posted_at ON jobs (role_family, {_newest_first_index_columns()})")
+    ids = conn.execute(select(Job.id)).scalars().all()
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        payloads = dict(conn.execute(select(JobRawData.job_id, JobRawData.data).where(JobRawData.job_id.in_(batch_ids))).all())
+        roles = []
+        skills = []
+        for row in conn.execute(select(Job.id, Job.title, Job.description, Job.raw_data).where(Job.id.in_(batch_ids))):
+            raw_data = row.raw_data if row.id not in payloads else decompress_raw_data(payloads[row.id])
+            enrichment = enrich_record({'title': row.title, 'description': row.description, 'raw_data': raw_data})
+            roles.append({'b_id': row.id, 'b_role_family': enrichment['role_family']})
+            skills.extend({'job_id': row.id, 'skill': skill} for skill in enrichment['skills'])
+        conn.execute(update(Job).where(Job.id == bindparam('b_id')).values(role_family=bindparam('b_role_family')), roles)
+        conn.execute(delete(JobSkill).where(JobSkill.job_id.in_(batch_ids)))
+        if skills:
+            conn.execute(JobSkill.__table__.insert(), skills)
+    # init_job_stats rebuilds the rollups with the new role and skill counters
+    conn.execute(delete(JobStat))
+
+def _migrate_clusters(conn, batch_size=1000):
+    # Clusters existing jobs oldest first, so the earliest posting of a job becomes canonical
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_jobs_cluster_id ON jobs (cluster_id)")
+    conn.execute(delete(JobLshBucket))
+    conn.execute(delete(JobSignature))
+    order = [Job.posted_at.is_(None), Job.posted_at, Job.id]
+    ids = conn.execute(select(Job.id).order_by(*order)).scalars().all()
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        rows = [dict(row._mapping) for row in conn.execute(
+            select(Job.id, Job.title, Job.employer, Job.description).where(Job.id.in_(batch_ids)).order_by(*order)
+        )]
+        _assign_clusters(conn, rows, {})
+        conn.execute(
+            update(Job).where(Job.id == bindparam('b_id')).values(cluster_id=bindparam('b_cluster_id')),
+            [{'b_id': row['id'], 'b_cluster_id': row['cluster_id']} for row in rows]
+        )
+
+def _backfill_from_payloads(conn, fill_row, columns, batch_size=1000):
+    # Recomputes columns derived from the stored raw payloads (see _payload_fields)
+    ids = conn.execute(select(Job.id)).scalars().all()
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        payloads = dict(conn.execute(select(JobRawData.job_id, JobRawData.data).where(JobRawData.job_id.in_(batch_ids))).all())
+        updates = []
+        for job_id, raw_data in conn.execute(select(Job.id, Job.raw_data).where(Job.id.in_(batch_ids))):
+            row = {}
+            fill_row(row, _payload_fields({'raw_data': decompress_raw_data(payloads[job_id]) if job_id in payloads else raw_data}))
+            if any(row[col] is not None for col in columns):
+                updates.append({'b_id': job_id, **{f'b_{col}': row[col] for col in columns}})
+        if updates:
+            conn.execute(
+                update(Job).where(Job.id == bindparam('b_id')).values({col: bindparam(f'b_{col}') for col in columns}),
+                updates
+            )
+
+def _migrate_coordinates(conn):
+    pattern_ops = " text_pattern_ops" if engine.dialect.name == "postgresql" else ""
+    conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_jobs_geohash ON jobs (geohash{pattern_ops})")
+    _backfill_from_payloads(conn, _locate_row, ['latitude', 'longitude', 'geohash'])
+
+def _migrate_salaries(conn):
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_jobs_annual_salary_min ON jobs (annual_salary_min)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_jobs_annual_salary_max ON jobs (annual_salary_max)")
+    _backfill_from_payloads(conn, _salary_row, ['annual_salary_min', 'annual_salary_max'])
+
+def _migrate_change_seq(conn, batch_size=1000):
+    # Existing jobs enter the feed oldest first, their insert time is unknown
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_jobs_change_seq ON jobs (change_seq)")
+    now = datetime.utcnow()
+    ids = conn.execute(select(Job.id).order_by(Job.posted_at.is_(None).desc(), Job.posted_at, Job.id)).scalars().all()
+    for start in range(0, len(ids), batch_size):
+        conn.execute(
+            update(Job).where(Job.id == bindparam('b_id')).values(
+                change_seq=bindparam('b_change_seq'), created_at=now, updated_at=now
+            ),
+            [{'b_id': job_id, 'b_change_seq': start + offset + 1} for offset, job_id in enumerate(ids[start:start + batch_size])]
+        )
+    stmt = _insert_stmt(AppMeta).values(key='change_seq', value=str(len(ids)))
+    conn.execute(stmt.on_conflict_do_update(index_elements=['key'], set_={'value': stmt.excluded.value}))
+
+MIGRATIONS = [
+    (1, "Backfill normalized location and employment type columns", _migrate_normalized_columns),
+    (2, "Indexes for /jobs filters and ordering", _migrate_filter_indexes),
+    (3, "Backfill role families and skills", _migrate_enrichment),
+    (4, "Near-duplicate clusters", _migrate_clusters),
+    (5, "Job coordinates and geohash index", _migrate_coordinates),
+    (6, "Annualized salary columns", _migrate_salaries),
+    (7, "Change sequence for /jobs/changes", _migrate_change_seq),
+]
+
+def run_migrations():
+    with engine.connect() as conn:
+        current = conn.execute(select(AppMeta.value).where(AppMeta.key == 'schema_version')).scalar()
+    current = int(current or 0)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            stmt = _insert_stmt(AppMeta).values(key='schema_version', value=str(version))
+            stmt = stmt.on_conflict_do_update(index_elements=['key'], set_={'value': stmt.excluded.value})
+            conn.execute(stmt)
+        print(f"Applied migration {version}: {description}")
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    run_migrations()
+    migrate_raw_data()
+    init_search_index()
+    init_job_stats()
     db_info = DATABASE_URL.split('@')[-1] if '@' in DATABASE_URL else DATABASE_URL
     print(f"Database initialized at {db_info}")
 
-def upsert_job(job_data):
+def get_data_version():
+    db = SessionLocal()
+    try:
+        meta = db.query(AppMeta).filter(AppMeta.key == 'data_version').first()
+        return meta.value if meta else None
+    finally:
+        db.close()
+
+async def get_data_version_async():
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(AppMeta.value).where(AppMeta.key == 'data_version'))
+        return result.scalar()
+
+def new_data_version():
+    return str(time.time_ns())
+
+def stamp_data_version(db, version):
+    """
+    Sets the data version in the session's transaction, for writes that must become
+    visible together with it (see write_analytics_snapshot). The caller commits.
+    """
+    stmt = _insert_stmt(AppMeta).values(key='data_version', value=version)
+    stmt = stmt.on_conflict_do_update(index_elements=['key'], set_={'value': stmt.excluded.value})
+    db.execute(stmt)
+
+def bump_data_version(version=None):
+    """
+    Stamps a new data version, which tells every API worker to drop its cached responses.
+    Returns the version, or None when it couldn't be stamped.
+    """
+    version = version or new_data_version()
     db = SessionLocal()
     try:
-        # Convert string timestamp to datetime object if needed
-        posted_at = job_data.get('posted_at')
-        if isinstance(posted_at, str) and posted_at:
-            try:
-                posted_at = datetime.fromisoformat(posted_at.replace('Z', '+00:00'))
-            except ValueError:
-                posted_at = None
-
-        # Prepare values for PostgreSQL-style upsert or SQLAlchemy core
-        stmt = insert(Job).values(
-            id=job_data['id'],
-            title=job_data['title'],
-            employer=job_data['employer'],
-            logo=job_data['logo'],
-            city=job_data['city'],
-            state=job_data['state'],
-            country=job_data['country'],
-            description=job_data['description'],
-            apply_link=job_data['apply_link'],
-            is_remote=job_data['is_remote'],
-            employment_type=job_data['employment_type'],
-            posted_at=posted_at,
-            raw_data=job_data['raw_data']
+        stamp_data_version(db, version)
+        db.commit()
+        return version
+    except Exception as e:
+        print(f"Error updating data version: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+# Full-text search backend: a generated tsvector column with a GIN index on PostgreSQL,
+# an FTS5 table keyed by jobs.rowid and kept in sync by bulk_upsert_jobs on SQLite.
+_search_backend = None
+
+def init_search_index():
+    global _search_backend
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql(
+                "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(employer, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'C')) STORED"
+            )
+            conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_jobs_search_vector ON jobs USING GIN (search_vector)")
+            _search_backend = "tsvector"
+        elif engine.dialect.name == "sqlite":
+            exists = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'").first()
+            if not exists:
+                try:
+                    conn.exec_driver_sql("CREATE VIRTUAL TABLE jobs_fts USING fts5(title, employer, description)")
+                except OperationalError as e:
+                    print(f"FTS5 is not available, search falls back to ILIKE: {e}")
+                    _search_backend = ""
+                    return
+                # Backfill jobs that were saved before the index existed
+                conn.exec_driver_sql(
+                    "INSERT INTO jobs_fts (rowid, title, employer, description) "
+                    "SELECT rowid, title, employer, description FROM jobs"
+                )
+            _search_backend = "fts5"
+        else:
+            _search_backend = ""
+
+def rebuild_search_index():
+    # VACUUM may renumber jobs.rowid on SQLite, run this afterwards to re-point the FTS rows
+    if get_search_backend() == "fts5":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM jobs_fts")
+            conn.exec_driver_sql(
+                "INSERT INTO jobs_fts (rowid, title, employer, description) "
+                "SELECT rowid, title, employer, description FROM jobs"
+            )
+
+def get_search_backend():
+    """
+    Returns "tsvector", "fts5" or None when only the ILIKE fallback is available.
+    """
+    global _search_backend
+    if _search_backend is None:
+        try:
+            inspector = inspect(engine)
+            if engine.dialect.name == "postgresql":
+                columns = [c['name'] for c in inspector.get_columns('jobs')]
+                _search_backend = "tsvector" if 'search_vector' in columns else ""
+            elif engine.dialect.name == "sqlite":
+                _search_backend = "fts5" if inspector.has_table('jobs_fts') else ""
+            else:
+                _search_backend = ""
+        except Exception:
+            return None
+    return _search_backend or None
+
+def _fts5_query(search):
+    # Quote every word so user input can't inject FTS5 syntax, and prefix-match each one
+    tokens = re.findall(r'\w+', search)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def apply_search_filter(query, search):
+    """
+    Filters a Job query by a free-text search term, ranked by relevance when a
+    full-text index exists, otherwise with the ILIKE scan over title/description/employer.
+    """
+    backend = get_search_backend()
+    if backend == "tsvector":
+        vector = literal_column('jobs.search_vector')
+        ts_query = func.plainto_tsquery('english', search)
+        return query.filter(vector.op('@@')(ts_query)).order_by(func.ts_rank(vector, ts_query).desc())
+
+    fts_query = _fts5_query(search) if backend == "fts5" else ""
+    if fts_query:
+        matches = (
+            text("SELECT rowid AS job_rowid, rank FROM jobs_fts WHERE jobs_fts MATCH :fts_query")
+            .bindparams(fts_query=fts_query)
+            .columns(job_rowid=Integer, rank=Float)
+            .subquery('fts')
         )
-        
-        # PostgreSQL ON CONFLICT DO UPDATE
-        if DATABASE_URL.startswith("postgresql"):
+        # FTS5 rank is bm25, lower is more relevant
+        return query.join(matches, literal_column('jobs.rowid') == matches.c.job_rowid).order_by(matches.c.rank)
+
+    search_term = f"%{search}%"
+    return query.filter(or_(
+        Job.title.ilike(search_term),
+        Job.description.ilike(search_term),
+        Job.employer.ilike(search_term)
+    ))
+
+def _sync_fts(db, ids):
+    # Re-index the given jobs; upserts keep jobs.rowid stable so it doubles as the FTS rowid
+    params = {'ids': ids}
+    db.execute(text(
+        "DELETE FROM jobs_fts WHERE rowid IN (SELECT rowid FROM jobs WHERE id IN :ids)"
+    ).bindparams(bindparam('ids', expanding=True)), params)
+    db.execute(text(
+        "INSERT INTO jobs_fts (rowid, title, employer, description) "
+        "SELECT rowid, title, employer, description FROM jobs WHERE id IN :ids"
+    ).bindparams(bindparam('ids', expanding=True)), params)
+
+# Analytics rollups: every job contributes +1 to a handful of (dimension, key)
+# counters. Upserts subtract the previous version of a job and add the new one.
+STAT_COLUMNS = ['id', 'title', 'city', 'employment_type', 'posted_at', 'is_remote', 'role_family']
+
+def _stat_keys(row):
+    keys = [('total', 'all')]
+    if row['is_remote']:
+        keys.append(('remote', 'all'))
+    if row['title'] and 'computer' in row['title'].lower():
+        keys.append(('computer', 'all'))
+    if row['city']:
+        keys.append(('city', row['city']))
+    if row['employment_type']:
+        keys.append(('employment_type', row['employment_type']))
+    if row['posted_at']:
+        keys.append(('day', row['posted_at'].date().isoformat()))
+    if row['role_family']:
+        keys.append(('role', row['role_family']))
+    keys.extend(('skill', skill) for skill in row['skills'])
+    return keys
+
+def _apply_stat_deltas(db, deltas):
+    deltas = [
+        {'dimension': dimension, 'key': key, 'count': count}
+        for (dimension, key), count in deltas.items() if count
+    ]
+    if not deltas:
+        return
+    stmt = _insert_stmt(JobStat).values(deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['dimension', 'key'],
+        set_={'count': JobStat.count + stmt.excluded.count}
+    )
+    db.execute(stmt)
+
+def _update_job_stats(db, previous, batch):
+    # previous holds the stored version of every job in batch that already exists
+    deltas = {}
+    for row in batch:
+        old = previous.get(row['id'])
+        if old is not None:
+            for key in _stat_keys(old):
+                deltas[key] = deltas.get(key, 0) - 1
+        for key in _stat_keys(row):
+            deltas[key] = deltas.get(key, 0) + 1
+    _apply_stat_deltas(db, deltas)
+
+def rebuild_job_stats():
+    """
+    Recomputes every analytics counter from the jobs table with GROUP BY queries.
+    Used to backfill the rollups and to repair drift from concurrent writers.
+    """
+    db = SessionLocal()
+    try:
+        counts = {
+            ('total', 'all'): db.query(func.count(Job.id)).scalar(),
+            ('remote', 'all'): db.query(func.count(Job.id)).filter(Job.is_remote == True).scalar(),
+            ('computer', 'all'): db.query(func.count(Job.id)).filter(func.lower(Job.title).like('%computer%')).scalar(),
+        }
+        for dimension, column in [('city', Job.city), ('employment_type', Job.employment_type), ('day', func.date(Job.posted_at)), ('role', Job.role_family)]:
+            for key, count in db.query(column, func.count(Job.id)).filter(column.isnot(None)).group_by(column).all():
+                counts[(dimension, str(key))] = count
+        for key, count in db.query(JobSkill.skill, func.count(JobSkill.job_id)).group_by(JobSkill.skill).all():
+            counts[('skill', key)] = count
+
+        db.query(JobStat).delete()
+        _apply_stat_deltas(db, counts)
+        db.commit()
+        print(f"Rebuilt {len(counts)} analytics counters")
+    except Exception as e:
+        print(f"Error rebuilding analytics counters: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    store_salary_percentiles()
+
+def init_job_stats():
+    # Backfill the rollups the first time they are created on a populated database
+    db = SessionLocal()
+    try:
+        has_jobs = db.query(Job.id).first() is not None
+        needs_backfill = has_jobs and db.query(JobStat).first() is None
+        needs_percentiles = has_jobs and db.query(AppMeta.key).filter(AppMeta.key == 'salary_percentiles').first() is None
+    finally:
+        db.close()
+    if needs_backfill:
+        rebuild_job_stats()
+    elif needs_percentiles:
+        store_salary_percentiles()
+
+JOB_COLUMNS = [
+    'id', 'title', 'employer', 'logo', 'city', 'state', 'country',
+    'description', 'apply_link', 'is_remote', 'employment_type',
+    'posted_at', 'raw_data', 'content_hash'
+]
+
+# Lowercased copies of the filter columns, so exact and prefix filters can use an index
+NORMALIZED_COLUMNS = {
+    'city_norm': 'city',
+    'state_norm': 'state',
+    'country_norm': 'country',
+    'employment_type_norm': 'employment_type',
+}
+
+# Columns written to the jobs table, raw_data goes to job_raw_data instead
+JOB_TABLE_COLUMNS = [col for col in JOB_COLUMNS if col != 'raw_data'] + list(NORMALIZED_COLUMNS) + [
+    'role_family', 'cluster_id', 'latitude', 'longitude', 'geohash', 'annual_salary_min', 'annual_salary_max',
+    'change_seq', 'updated_at'
+]
+
+def normalize_filter_value(value):
+    if not isinstance(value, str):
+        return None
+    return value.strip().lower() or None
+
+def prefix_filter(column, prefix):
+    """
+    Index-friendly "starts with" filter on a normalized column.
+    """
+    if engine.dialect.name == "postgresql":
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return column.like(f"{escaped}%", escape='\\')
+    # SQLite's LIKE is case-insensitive and can't use a plain index, a range can
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper_bound)
+
+def near_filter(latitude, longitude, radius_km):
+    """
+    Index-friendly pre-filter for jobs within radius_km of a point: geohash prefix ranges
+    covering the bounding box, then the box itself. Exact distances are left to the caller.
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius_km)
+    return and_(
+        or_(*[prefix_filter(Job.geohash, cell) for cell in covering_cells(min_lat, max_lat, lon_ranges)]),
+        Job.latitude.between(min_lat, max_lat),
+        or_(*[Job.longitude.between(low, high) for low, high in lon_ranges])
+    )
+
+def salary_percentiles(db):
+    """
+    Salary distribution per employment type and city from the annualized salary
+    columns, each job counted at the midpoint of its range.
+    """
+    by_type, by_city = {}, {}
+    rows = db.query(Job.employment_type, Job.city, Job.annual_salary_min, Job.annual_salary_max).filter(
+        Job.annual_salary_min.isnot(None)
+    )
+    for employment_type, city, annual_min, annual_max in rows:
+        salary = salary_midpoint(annual_min, annual_max)
+        if employment_type:
+            by_type.setdefault(employment_type, []).append(salary)
+        if city:
+            by_city.setdefault(city, []).append(salary)
+    return salary_distribution(by_type, by_city)
+
+def store_salary_percentiles():
+    """
+    Stores salary_percentiles in app_meta for /analytics. Percentiles don't roll up
+    incrementally, the scraper recomputes them once per cycle instead of per request.
+    """
+    db = SessionLocal()
+    try:
+        stmt = _insert_stmt(AppMeta).values(key='salary_percentiles', value=json.dumps(salary_percentiles(db)))
+        stmt = stmt.on_conflict_do_update(index_elements=['key'], set_={'value': stmt.excluded.value})
+        db.execute(stmt)
+        db.commit()
+        return True
+    except Exception as e:
+        print(f"Error storing salary percentiles: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+def stored_salary_percentiles(db):
+    # As of the last store_salary_percentiles, empty until one ran
+    value = db.query(AppMeta.value).filter(AppMeta.key == 'salary_percentiles').scalar()
+    return json.loads(value) if value else salary_distribution({}, {})
+
+def salary_filter(min_salary=None, max_salary=None):
+    """
+    Jobs whose annualized salary range overlaps [min_salary, max_salary].
+    """
+    conditions = []
+    if min_salary is not None:
+        conditions.append(Job.annual_salary_max >= min_salary)
+    if max_salary is not None:
+        conditions.append(Job.annual_salary_min <= max_salary)
+    if engine.dialect.name == "sqlite":
+        # Without histograms SQLite guesses that a range matches a quarter of the rows and
+        # walks the posted_at order instead. Most jobs have no salary, unlikely() makes it
+        # search the salary index.
+        conditions = [func.unlikely(condition) for condition in conditions]
+    return and_(*conditions)
+
+def compress_raw_data(raw_data):
+    if raw_data is None:
+        return None
+    return zlib.compress(raw_data.encode('utf-8'), 6)
+
+def decompress_raw_data(data):
+    if data is None:
+        return None
+    return zlib.decompress(data).decode('utf-8')
+
+def find_known_job_ids(ids, chunk_size=5000):
+    """
+    Returns the subset of ids already stored in the jobs table.
+    """
+    ids = list(ids)
+    known = set()
+    db = SessionLocal()
+    try:
+        for start in range(0, len(ids), chunk_size):
+            known.update(job_id for (job_id,) in db.query(Job.id).filter(Job.id.in_(ids[start:start + chunk_size])))
+    finally:
+        db.close()
+    return known
+
+def load_raw_data(job_id):
+    """
+    Returns the original JSearch payload of a job as a JSON string, or None.
+    """
+    db = SessionLocal()
+    try:
+        stored = db.query(JobRawData.data).filter(JobRawData.job_id == job_id).scalar()
+        if stored is not None:
+            return decompress_raw_data(stored)
+        # Not migrated yet
+        return db.query(Job.raw_data).filter(Job.id == job_id).scalar()
+    finally:
+        db.close()
+
+def _upsert_raw_data(db, rows):
+    payloads = [
+        {'job_id': row['id'], 'data': compress_raw_data(row['raw_data'])}
+        for row in rows if row['raw_data'] is not None
+    ]
+    if not payloads:
+        return
+    stmt = _insert_stmt(JobRawData).values(payloads)
+    stmt = stmt.on_conflict_do_update(index_elements=['job_id'], set_={'data': stmt.excluded.data})
+    db.execute(stmt)
+
+def migrate_raw_data(batch_size=1000):
+    """
+    Moves inline jobs.raw_data payloads into the compressed job_raw_data table.
+    Safe to re-run, it only touches rows that still have an inline payload.
+    """
+    moved = 0
+    db = SessionLocal()
+    try:
+        while True:
+            legacy = db.query(Job.id, Job.raw_data).filter(Job.raw_data.isnot(None)).limit(batch_size).all()
+            if not legacy:
+                break
+            _upsert_raw_data(db, [{'id': job_id, 'raw_data': raw_data} for job_id, raw_data in legacy])
+            db.query(Job).filter(Job.id.in_([job_id for job_id, _ in legacy])).update(
+                {Job.raw_data: None}, synchronize_session=False
+            )
+            db.commit()
+            moved += len(legacy)
+    except Exception as e:
+        print(f"Error migrating raw_data: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    if moved:
+        print(f"Moved {moved} raw payloads to job_raw_data (run VACUUM to reclaim the space)")
+    return moved
+
+# Payload keys that change without the job changing, left out of content_hash.
+# job_posted_at is relative ("21 days ago"), job_posted_at_datetime_utc holds the date.
+VOLATILE_PAYLOAD_KEYS = ('job_posted_at',)
+
+def _stable_payload(raw_data):
+    if not raw_data:
+        return raw_data
+    try:
+        payload = json.loads(raw_data) if isinstance(raw_data, (str, bytes)) else dict(raw_data)
+    except (ValueError, TypeError):
+        return raw_data
+    if not isinstance(payload, dict):
+        return payload
+    return {key: value for key, value in payload.items() if key not in VOLATILE_PAYLOAD_KEYS}
+
+def compute_content_hash(job_data):
+    """
+    Stable hash of a normalized job record, used to skip rewriting unchanged jobs.
+    The raw payload is hashed without VOLATILE_PAYLOAD_KEYS, so refetching a job
+    on a later day doesn't count as a change.
+    """
+    content = {col: job_data.get(col) for col in JOB_COLUMNS if col != 'content_hash'}
+    content['raw_data'] = _stable_payload(content['raw_data'])
+    payload = json.dumps(content, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _parse_posted_at(posted_at):
+    # Convert string timestamp to datetime object if needed
+    if isinstance(posted_at, str) and posted_at:
+        try:
+            return datetime.fromisoformat(posted_at.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return posted_at or None
+
+def _enrich_row(row, job_data):
+    # Records that already carry skills are kept as they are
+    if 'skills' in job_data:
+        row['role_family'] = job_data.get('role_family')
+        row['skills'] = job_data['skills']
+    else:
+        enrichment = enrich_record(job_data)
+        row['role_family'] = enrichment['role_family']
+        row['skills'] = enrichment['skills']
+
+# Record fields that LinkedInScraper.normalize_jobs copies out of the JSearch payload
+PAYLOAD_FIELDS = {
+    'latitude': 'job_latitude',
+    'longitude': 'job_longitude',
+    'min_salary': 'job_min_salary',
+    'max_salary': 'job_max_salary',
+    'salary_period': 'job_salary_period',
+}
+
+def _payload_fields(job_data):
+    # Stored rows and benchmark records only have raw_data, parse it once for all the fields
+    if all(field in job_data for field in PAYLOAD_FIELDS):
+        return job_data
+    try:
+        payload = json.loads(job_data.get('raw_data') or '{}')
+    except ValueError:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
+    return {field: job_data.get(field, payload.get(key)) for field, key in PAYLOAD_FIELDS.items()}
+
+def _locate_row(row, fields):
+    row['latitude'], row['longitude'] = parse_coordinates(fields.get('latitude'), fields.get('longitude'))
+    row['geohash'] = encode_geohash(row['latitude'], row['longitude']) if row['latitude'] is not None else None
+
+def _salary_row(row, fields):
+    row['annual_salary_min'], row['annual_salary_max'] = annualize_salary(
+        fields.get('min_salary'), fields.get('max_salary'), fields.get('salary_period')
+    )
+
+def _replace_job_skills(db, rows):
+    db.execute(delete(JobSkill).where(JobSkill.job_id.in_([row['id'] for row in rows])))
+    skills = [{'job_id': row['id'], 'skill': skill} for row in rows for skill in row['skills']]
+    if skills:
+        db.execute(JobSkill.__table__.insert(), skills)
+
+def _candidate_buckets(db, keys, chunk_size=5000):
+    buckets = {}
+    keys = list(keys)
+    for start in range(0, len(keys), chunk_size):
+        for bucket, job_id in db.execute(
+            select(JobLshBucket.bucket, JobLshBucket.job_id).where(JobLshBucket.bucket.in_(keys[start:start + chunk_size]))
+        ):
+            buckets.setdefault(bucket, set()).add(job_id)
+    return buckets
+
+def _assign_clusters(db, rows, previous):
+    """
+    Sets row['cluster_id'] on every row. Jobs already in previous keep their cluster.
+    A new job joins the cluster of the most similar canonical job that shares an LSH
+    bucket with it, if the estimated similarity reaches SIMILARITY_THRESHOLD, and
+    otherwise becomes the canonical job of a new cluster. Only canonical jobs are
+    indexed, so the candidates of a posting are bounded by the clusters it resembles.
+    """
+    # Imported here so the API, which never writes jobs, starts without numpy
+    from dedup import minhash_signature, band_keys, similarity, signature_to_bytes, signature_from_bytes, SIMILARITY_THRESHOLD
+    signatures = {}
+    keys = {}
+    indexed = []
+    for row in rows:
+        old = previous.get(row['id'])
+        if old is not None and old['cluster_id']:
+            row['cluster_id'] = old['cluster_id']
+            if old['cluster_id'] != row['id']:
+                continue
+        signatures[row['id']] = minhash_signature(row['title'], row['employer'], row['description'])
+        keys[row['id']] = band_keys(signatures[row['id']])
+
+    buckets = _candidate_buckets(db, {key for row_keys in keys.values() for key in row_keys})
+    candidate_ids = list({job_id for job_ids in buckets.values() for job_id in job_ids})
+    known = {}
+    for start in range(0, len(candidate_ids), 5000):
+        chunk = candidate_ids[start:start + 5000]
+        for job_id, data in db.execute(select(JobSignature.job_id, JobSignature.signature).where(JobSignature.job_id.in_(chunk))):
+            known[job_id] = signature_from_bytes(data)
+
+    for row in rows:
+        if row['id'] not in signatures:
+            continue
+        signature = signatures[row['id']]
+        if not row.get('cluster_id'):
+            candidates = sorted({job_id for key in keys[row['id']] for job_id in buckets.get(key, ()) if job_id != row['id']})
+            if candidates:
+                scores = similarity(signature, [known[job_id] for job_id in candidates])
+                best = int(scores.argmax())
+                if scores[best] >= SIMILARITY_THRESHOLD:
+                    row['cluster_id'] = candidates[best]
+                    continue
+            row['cluster_id'] = row['id']
+        # Canonical, later rows of the same batch are matched against it too
+        known[row['id']] = signature
+        for key in keys[row['id']]:
+            buckets.setdefault(key, set()).add(row['id'])
+        indexed.append(row['id'])
+
+    if not indexed:
+        return
+    db.execute(delete(JobLshBucket).where(JobLshBucket.job_id.in_(indexed)))
+    db.execute(delete(JobSignature).where(JobSignature.job_id.in_(indexed)))
+    db.execute(JobSignature.__table__.insert(), [
+        {'job_id': job_id, 'signature': signature_to_bytes(signatures[job_id])} for job_id in indexed
+    ])
+    db.execute(JobLshBucket.__table__.insert(), [
+        {'bucket': key, 'job_id': job_id} for job_id in indexed for key in set(keys[job_id])
+    ])
+
+def _insert_stmt(model=Job):
+    # Both PostgreSQL and SQLite (3.24+) support INSERT ... ON CONFLICT DO UPDATE
+    if engine.dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return insert(model)
+
+def _next_change_seqs(db, count):
+    """
+    Reserves count change sequence numbers and returns the first one. The app_meta row
+    stays locked until the transaction commits, so writers commit in sequence order and
+    /jobs/changes never shows a number before an earlier one is visible.
+    """
+    db.execute(
+        update(AppMeta).where(AppMeta.key == 'change_seq').values(value=cast(cast(AppMeta.value, BigInteger) + count, Text))
+    )
+    return int(db.execute(select(AppMeta.value).where(AppMeta.key == 'change_seq')).scalar()) - count + 1
+
+def _lock_writers(db):
+    """
+    Takes the lock on the change_seq row that _next_change_seqs takes later, before the
+    stored hashes are read. Concurrent writers (scrape workers) wait for each other here
+    instead of both seeing a job as new and counting it twice in job_stats.
+    """
+    db.execute(update(AppMeta).where(AppMeta.key == 'change_seq').values(value=AppMeta.value))
+
+UPSERT_SECONDS = REGISTRY.histogram("jobs_upsert_duration_seconds", "Time spent in bulk_upsert_jobs, commit included")
+UPSERTED_JOBS = REGISTRY.counter("jobs_upserted_total", "Jobs passed to bulk_upsert_jobs", ["result"])
+UPSERT_ERRORS = REGISTRY.counter("jobs_upsert_errors_total", "bulk_upsert_jobs calls rolled back")
+
+def bulk_upsert_jobs(records, batch_size=500):
+    """
+    Inserts or updates many jobs at once. Each batch is written with a single
+    multi-row INSERT ... ON CONFLICT DO UPDATE and all batches share one transaction.
+    Jobs whose content_hash matches the stored one are not rewritten.
+    Returns {'new': ..., 'changed': ..., 'unchanged': ...} job counts.
+    """
+    with UPSERT_SECONDS.time():
+        counts = _bulk_upsert_jobs(records, batch_size)
+    for result, count in counts.items():
+        UPSERTED_JOBS.inc(count, result=result)
+    return counts
+
+def _bulk_upsert_jobs(records, batch_size):
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+    rows = []
+    seen = {}
+    sources = {}
+    for job_data in records:
+        if not job_data.get('id'):
+            continue
+        row = {col: job_data.get(col) for col in JOB_COLUMNS}
+        if not row['content_hash']:
+            row['content_hash'] = compute_content_hash(row)
+        row['posted_at'] = _parse_posted_at(row['posted_at'])
+        for norm, col in NORMALIZED_COLUMNS.items():
+            row[norm] = normalize_filter_value(row[col])
+        sources[row['id']] = job_data
+        # A multi-row ON CONFLICT cannot touch the same id twice, keep the last one
+        if row['id'] in seen:
+            rows[seen[row['id']]] = row
+        else:
+            seen[row['id']] = len(rows)
+            rows.append(row)
+
+    if not rows:
+        return counts
+
+    sync_fts = get_search_backend() == "fts5"
+    previous_columns = [getattr(Job, col) for col in STAT_COLUMNS] + [Job.content_hash, Job.cluster_id]
+    db = SessionLocal()
+    try:
+        _lock_writers(db)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            previous = {
+                old.id: dict(old._mapping, skills=[])
+                for old in db.query(*previous_columns).filter(Job.id.in_([row['id'] for row in batch]))
+            }
+            changed = []
+            for row in batch:
+                old = previous.get(row['id'])
+                if old is None:
+                    counts['new'] += 1
+                elif old['content_hash'] != row['content_hash']:
+                    counts['changed'] += 1
+                else:
+                    counts['unchanged'] += 1
+                    continue
+                changed.append(row)
+            if not changed:
+                continue
+
+            # Only new and changed jobs go through the enrichment stage
+            for row in changed:
+                _enrich_row(row, sources[row['id']])
+                fields = _payload_fields(sources[row['id']])
+                _locate_row(row, fields)
+                _salary_row(row, fields)
+            updated_ids = [row['id'] for row in changed if row['id'] in previous]
+            if updated_ids:
+                for job_id, skill in db.query(JobSkill.job_id, JobSkill.skill).filter(JobSkill.job_id.in_(updated_ids)):
+                    previous[job_id]['skills'].append(skill)
+            _update_job_stats(db, previous, changed)
+            _assign_clusters(db, changed, previous)
+            first_seq = _next_change_seqs(db, len(changed))
+            now = datetime.utcnow()
+            for offset, row in enumerate(changed):
+                row['change_seq'] = first_seq + offset
+                row['updated_at'] = now
+            # created_at is only written by the insert, the update leaves it alone
+            stmt = _insert_stmt().values([dict({col: row[col] for col in JOB_TABLE_COLUMNS}, created_at=now) for row in changed])
             stmt = stmt.on_conflict_do_update(
                 index_elements=['id'],
-                set_={
-                    'title': stmt.excluded.title,
-                    'employer': stmt.excluded.employer,
-                    'logo': stmt.excluded.logo,
-                    'city': stmt.excluded.city,
-                    'state': stmt.excluded.state,
-                    'country': stmt.excluded.country,
-                    'description': stmt.excluded.description,
-                    'apply_link': stmt.excluded.apply_link,
-                    'is_remote': stmt.excluded.is_remote,
-                    'employment_type': stmt.excluded.employment_type,
-                    'posted_at': stmt.excluded.posted_at,
-                    'raw_data': stmt.excluded.raw_data
-                }
+                set_={col: stmt.excluded[col] for col in JOB_TABLE_COLUMNS if col != 'id'},
+                where=Job.content_hash.is_distinct_from(stmt.excluded.content_hash)
             )
             db.execute(stmt)
-        else:
-            # Fallback for SQLite (local dev)
-            existing_job = db.query(Job).filter(Job.id == job_data['id']).first()
-            if existing_job:
-                for key, value in job_data.items():
-                    if key == 'posted_at':
-                        setattr(existing_job, key, posted_at)
-                    else:
-                        setattr(existing_job, key, value)
-            else:
-                new_job = Job(**job_data)
-                new_job.posted_at = posted_at
-                db.add(new_job)
-        
+            _upsert_raw_data(db, changed)
+            _replace_job_skills(db, changed)
+            if sync_fts:
+                _sync_fts(db, [row['id'] for row in changed])
         db.commit()
+        return counts
     except Exception as e:
-        print(f"Error upserting job {job_data.get('id')}: {e}")
+        print(f"Error bulk upserting {len(rows)} jobs: {e}")
+        UPSERT_ERRORS.inc()
         db.rollback()
+        return {'new': 0, 'changed': 0, 'unchanged': 0}
     finally:
         db.close()
+
+def upsert_job(job_data):
+    # Single-row convenience wrapper (one session and commit per job),
+    # prefer bulk_upsert_jobs when saving more than a handful of jobs
+    return bulk_upsert_jobs([job_data], batch_size=1)
@@ -0,0 +1,66 @@
+import hashlib
+import re
+import zlib
+import numpy as np
+
+# MinHash over word 3-gram shingles, split into LSH bands. Two postings whose
+# shingle sets have Jaccard similarity s share at least one band bucket with
+# probability 1 - (1 - s**ROWS)**BANDS: 0.9999 at s=0.9, 0.95 at s=0.8, 0.01 at s=0.4.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Minimum estimated Jaccard similarity for two postings to be the same job
+SIMILARITY_THRESHOLD = 0.8
+
+# Multiply-shift hashing: (a * x + b) mod 2**64, keeping the top 32 bits, with odd a
+_permutations = np.random.RandomState(1).randint(0, 1 << 63, size=(2, NUM_PERM), dtype=np.uint64)
+_A = (_permutations[0] | np.uint64(1))[:, None]
+_B = _permutations[1][:, None]
+
+_WORD = re.compile(r"\w+")
+
+def _shingle_hashes(text):
+    words = _WORD.findall(text.lower())
+    hashes = np.fromiter(map(zlib.crc32, map(str.encode, words)), dtype=np.uint64, count=len(words))
+    if len(hashes) < SHINGLE_SIZE:
+        return np.array([hashes.sum()], dtype=np.uint64)
+    # Each shingle hash mixes the hashes of its SHINGLE_SIZE consecutive words
+    with np.errstate(over="ignore"):
+        shingles = hashes[:1 - SHINGLE_SIZE] * np.uint64(0x9E3779B1)
+        for offset in range(1, SHINGLE_SIZE):
+            end = len(hashes) - SHINGLE_SIZE + 1 + offset
+            shingles = (shingles << np.uint64(7)) ^ (hashes[offset:end] * np.uint64(0x85EBCA77))
+    return np.unique(shingles)
+
+def minhash_signature(title, employer, description):
+    """
+    Returns the MinHash signature (NUM_PERM uint32 values) of a posting's title,
+    employer and description, after lowercasing and dropping punctuation.
+    """
+    hashes = _shingle_hashes(" ".join(part for part in (title, employer, description) if part))
+    with np.errstate(over="ignore"):
+        permuted = (_A * hashes[None, :] + _B) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+def band_keys(signature):
+    """
+    Returns one signed 64-bit bucket key per LSH band of a signature.
+    """
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8, salt=band.to_bytes(16, "little")).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+def similarity(signature, others):
+    """
+    Estimated Jaccard similarity between a signature and each row of others.
+    """
+    return (np.asarray(others) == signature).mean(axis=-1)
+
+def signature_to_bytes(signature):
+    return signature.astype("<u4").tobytes()
+
+def signature_from_bytes(data):
+    return np.frombuffer(data, dtype="<u4").astype(np.uint32)
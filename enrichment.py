@@ -0,0 +1,195 @@
+import json
+import re
+
+# Role families follow the scraper's query categories. Each title is matched with one
+# combined regex; at a given position the more specific families are listed first,
+# e.g. "Data Warehouse Engineer" before "Data Engineer".
+ROLE_FAMILIES = [
+    ("DataOps Engineer", r"dataops"),
+    ("MLOps Engineer", r"mlops"),
+    ("Data Warehouse Engineer", r"data\s+warehous\w*"),
+    ("Data Lake Engineer", r"data\s+lake(?:house)?"),
+    ("Data Mesh Engineer", r"data\s+mesh"),
+    ("Data Fabric Engineer", r"data\s+fabric"),
+    ("Data Governance Engineer", r"data\s+governance"),
+    ("Data Quality Engineer", r"data\s+quality"),
+    ("Data Integration Engineer", r"data\s+integration|etl"),
+    ("Data Migration Engineer", r"data\s+migration"),
+    ("Data Visualization Engineer", r"data\s+visuali[sz]ation|power\s*bi|tableau"),
+    ("Data Architect", r"data\s+architect\w*"),
+    ("Data Scientist", r"data\s+scien(?:tist|ce)"),
+    ("Data Engineer", r"data\s+(?:platform\s+)?engineer\w*"),
+    ("Data Analyst", r"data\s+analy\w*|analytics"),
+    ("Machine Learning Engineer", r"machine\s+learning|ml\s+engineer"),
+    ("AI Engineer", r"ai|artificial\s+intelligence|llm|genai"),
+    ("Frontend Developer", r"front[\s-]?end"),
+    ("Backend Developer", r"back[\s-]?end"),
+    ("Software Engineer", r"software|full[\s-]?stack|developer|programmer"),
+    ("DevOps Engineer", r"devops|site\s+reliability|sre"),
+    ("Cloud Engineer", r"cloud"),
+    ("QA Engineer", r"qa|quality\s+assurance|test(?:ing)?\s+(?:engineer|automation|analyst)"),
+    ("Business Analyst", r"business\s+(?:analyst|intelligence|analytics)|bi\s+analyst"),
+    ("Product Manager", r"product\s+(?:manager|owner|lead)"),
+    ("Project Manager", r"project\s+manager|program\s+manager|scrum\s+master"),
+]
+
+_ROLE_REGEX = re.compile(
+    r"\b(?:" + "|".join(f"(?P<r{i}>{pattern})" for i, (_, pattern) in enumerate(ROLE_FAMILIES)) + r")\b",
+    re.IGNORECASE
+)
+
+# Canonical skill -> spellings found in postings
+SKILLS = {
+    "python": ["python"],
+    "java": ["java"],
+    "javascript": ["javascript", "js"],
+    "typescript": ["typescript"],
+    "c++": ["c++"],
+    "c#": ["c#"],
+    ".net": [".net", "dotnet"],
+    "scala": ["scala"],
+    "sql": ["sql", "t-sql", "pl/sql"],
+    "r": ["r programming", "rstudio"],
+    "sas": ["sas"],
+    "excel": ["excel"],
+    "power bi": ["power bi", "powerbi"],
+    "tableau": ["tableau"],
+    "looker": ["looker"],
+    "aws": ["aws", "amazon web services"],
+    "azure": ["azure"],
+    "gcp": ["gcp", "google cloud"],
+    "docker": ["docker"],
+    "kubernetes": ["kubernetes", "k8s"],
+    "terraform": ["terraform"],
+    "linux": ["linux"],
+    "git": ["git", "github", "gitlab"],
+    "ci/cd": ["ci/cd", "continuous integration"],
+    "jenkins": ["jenkins"],
+    "spark": ["spark", "pyspark"],
+    "hadoop": ["hadoop"],
+    "kafka": ["kafka"],
+    "airflow": ["airflow"],
+    "dbt": ["dbt"],
+    "snowflake": ["snowflake"],
+    "databricks": ["databricks"],
+    "bigquery": ["bigquery"],
+    "redshift": ["redshift"],
+    "postgresql": ["postgresql", "postgres"],
+    "mysql": ["mysql"],
+    "mongodb": ["mongodb"],
+    "redis": ["redis"],
+    "elasticsearch": ["elasticsearch"],
+    "etl": ["etl", "elt"],
+    "data modeling": ["data modeling", "data modelling"],
+    "pandas": ["pandas"],
+    "numpy": ["numpy"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    "tensorflow": ["tensorflow"],
+    "pytorch": ["pytorch"],
+    "machine learning": ["machine learning"],
+    "deep learning": ["deep learning"],
+    "nlp": ["nlp", "natural language processing"],
+    "computer vision": ["computer vision"],
+    "llm": ["llm", "llms", "large language models", "generative ai"],
+    "statistics": ["statistics", "statistical analysis"],
+    "react": ["react", "react.js", "reactjs"],
+    "angular": ["angular"],
+    "vue": ["vue", "vue.js"],
+    "node.js": ["node.js", "nodejs"],
+    "django": ["django"],
+    "flask": ["flask"],
+    "spring": ["spring boot"],
+    "graphql": ["graphql"],
+    "rest api": ["rest api", "rest apis", "restful"],
+    "agile": ["agile"],
+    "scrum": ["scrum"],
+    "jira": ["jira"],
+}
+
+_SKILL_ALIASES = {}
+for _skill, _spellings in SKILLS.items():
+    for _spelling in _spellings:
+        _SKILL_ALIASES[_spelling] = _skill
+
+def _alias_pattern(alias):
+    return re.escape(alias).replace(r"\ ", r"\s+")
+
+def _trie_pattern(words):
+    # Alternation factored by common prefixes ("spark|sql|scala" -> "s(?:cala|park|ql)"),
+    # so the regex engine tries a handful of branches per position instead of every spelling
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    def build(node):
+        branches = [(r"\s+" if char == " " else re.escape(char)) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if '' in node:
+            # Optional and greedy, so the longest spelling is tried first
+            return f"(?:{pattern})?" if len(branches) == 1 and len(pattern) > 1 else pattern + "?"
+        return pattern
+    return build(trie)
+
+# One pattern over every spelling, matched against the lowercased text. The lookarounds
+# stand in for \b, which doesn't work next to symbols like "c++" or ".net".
+_SKILL_REGEX = re.compile(r"(?<![\w+#.])(?:" + _trie_pattern(_SKILL_ALIASES) + r")(?![\w+#])")
+
+_ROLE_NAMES = {name.lower(): name for name, _ in ROLE_FAMILIES}
+
+def find_role_family(name):
+    """
+    Returns the canonical spelling of a role family name, or None if it isn't one.
+    """
+    return _ROLE_NAMES.get(" ".join(name.lower().split())) if name else None
+
+def classify_title(title):
+    """
+    Returns the role family of a job title, or None.
+    """
+    if not title:
+        return None
+    match = _ROLE_REGEX.search(title)
+    if match is None:
+        return None
+    return ROLE_FAMILIES[int(match.lastgroup[1:])][0]
+
+def extract_skills(*texts):
+    """
+    Returns the sorted canonical skills mentioned in any of the texts, one regex pass per text.
+    """
+    found = set()
+    for text in texts:
+        if text:
+            for match in _SKILL_REGEX.finditer(text.lower()):
+                found.add(_SKILL_ALIASES[" ".join(match.group(0).split())])
+    return sorted(found)
+
+def _highlights_text(highlights):
+    # job_highlights maps section names (Qualifications, Responsibilities, ...) to bullet lists
+    if not isinstance(highlights, dict):
+        return None
+    return "\n".join(item for items in highlights.values() if isinstance(items, list) for item in items if isinstance(item, str))
+
+def enrich_job(title, description, highlights=None):
+    """
+    Ingest-time enrichment of one job: {'role_family': ..., 'skills': [...]}.
+    """
+    return {
+        'role_family': classify_title(title),
+        'skills': extract_skills(title, description, _highlights_text(highlights)),
+    }
+
+def enrich_record(job_record):
+    # Without job_highlights on the record they are read back from its raw_data payload
+    highlights = job_record.get('job_highlights')
+    raw_data = job_record.get('raw_data')
+    if highlights is None and raw_data:
+        try:
+            highlights = json.loads(raw_data).get('job_highlights')
+        except (ValueError, AttributeError):
+            highlights = None
+    return enrich_job(job_record.get('title'), job_record.get('description'), highlights)
@@ -7,9 +7,12 @@ import Register from './components/Register'
 
 function App() {
   const [jobs, setJobs] = useState([])
+  const [jobCount, setJobCount] = useState(0)
+  const [nextCursor, setNextCursor] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [analyticsData, setAnalyticsData] = useState(null)
+  const [facets, setFacets] = useState(null)
   const locationPath = useLocation()
 
   // Filter States
@@ -24,27 +27,49 @@ function App() {
     fetchJobs()
   }, [search, location, jobType, isRemote])
 
+  // The type and remote counts follow the text filters, so they don't change with the selects
+  useEffect(() => {
+    fetchFacets()
+  }, [search, location])
+
   useEffect(() => {
     if (locationPath.pathname === '/analytics') {
       fetchAnalytics()
     }
   }, [locationPath.pathname])
 
-  const fetchJobs = async () => {
+  // The board only needs a description snippet, the full text stays on the server
+  const JOB_LIST_FIELDS = 'id,title,employer,city,state,country,is_remote,employment_type,apply_link,posted_at,description_snippet'
+
+  const fetchJobs = async (cursor = null) => {
     try {
-      setLoading(true)
+      if (!cursor) setLoading(true)
 
       const params = new URLSearchParams()
       if (search) params.append('search', search)
       if (location) params.append('location', location)
       if (jobType) params.append('type', jobType)
       if (isRemote !== 'all') params.append('remote', isRemote === 'true')
+      params.append('fields', JOB_LIST_FIELDS)
+      params.append('limit', '50')
+      // One card per job, reposts of the same posting are grouped by the API
+      params.append('collapse', 'true')
+      if (cursor) {
+        params.append('cursor', cursor)
+        params.append('include_count', 'false')
+      }
 
       const apiUrl = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
       const response = await fetch(`${apiUrl}/jobs?${params.toString()}`)
       if (!response.ok) throw new Error('Failed to fetch jobs')
       const data = await response.json()
-      setJobs(data.jobs || [])
+      if (cursor) {
+        setJobs((prev) => [...prev, ...(data.jobs || [])])
+      } else {
+        setJobs(data.jobs || [])
+        setJobCount(data.count || 0)
+      }
+      setNextCursor(data.next_cursor)
     } catch (err) {
       setError(err.message)
     } finally {
@@ -52,6 +77,32 @@ function App() {
     }
   }
 
+  const fetchFacets = async () => {
+    try {
+      const params = new URLSearchParams()
+      if (search) params.append('search', search)
+      if (location) params.append('location', location)
+      params.append('collapse', 'true')
+      const apiUrl = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
+      const response = await fetch(`${apiUrl}/jobs/facets?${params.toString()}`)
+      if (!response.ok) throw new Error('Failed to fetch facets')
+      setFacets(await response.json())
+    } catch (err) {
+      // Counts are optional, the filters work without them
+      setFacets(null)
+    }
+  }
+
+  // type is a prefix filter, so an option counts every employment type it matches
+  const facetLabel = (label, facet, matches) => {
+    if (!facets) return label
+    const count = facets.facets[facet]
+      .filter((entry) => matches(entry.value))
+      .reduce((total, entry) => total + entry.count, 0)
+    return `${label} (${count})`
+  }
+  const typeLabel = (type) => facetLabel(type, 'employment_type', (value) => value.toLowerCase().startsWith(type.toLowerCase()))
+
   const fetchAnalytics = async () => {
     try {
       setLoading(true)
@@ -92,18 +143,18 @@ function App() {
         <div className="search-field">
           <Filter size={20} />
           <select value={jobType} onChange={(e) => setJobType(e.target.value)}>
-            <option value="">All Job Types</option>
-            <option value="Full-time">Full-time</option>
-            <option value="Part-time">Part-time</option>
-            <option value="Contract">Contract</option>
+            <option value="">{facets ? `All Job Types (${facets.count})` : 'All Job Types'}</option>
+            <option value="Full-time">{typeLabel('Full-time')}</option>
+            <option value="Part-time">{typeLabel('Part-time')}</option>
+            <option value="Contract">{typeLabel('Contract')}</option>
           </select>
         </div>
         <div className="search-field">
           <Globe size={20} />
           <select value={isRemote} onChange={(e) => setIsRemote(e.target.value)}>
             <option value="all">Remote / On-site</option>
-            <option value="true">Remote Only</option>
-            <option value="false">On-site Only</option>
+            <option value="true">{facetLabel('Remote Only', 'remote', (value) => value === true)}</option>
+            <option value="false">{facetLabel('On-site Only', 'remote', (value) => value === false)}</option>
           </select>
         </div>
       </div>
@@ -132,7 +183,7 @@ function App() {
                 </div>
                 {job.is_remote ? <span className="badge">Remote</span> : <span className="badge" style={{ background: 'rgba(148, 163, 184, 0.1)', color: '#94a3b8', borderColor: 'rgba(148, 163, 184, 0.2)' }}>On-site</span>}
               </div>
-              <p className="job-description">{job.description}</p>
+              <p className="job-description">{job.description_snippet}</p>
               <button
                 className="apply-btn"
                 onClick={() => window.open(job.apply_link, '_blank')}
@@ -148,6 +199,13 @@ function App() {
               <p>Try adjusting your filters or search terms</p>
             </div>
           )}
+          {nextCursor && (
+            <div style={{ gridColumn: '1/-1', textAlign: 'center' }}>
+              <button onClick={() => fetchJobs(nextCursor)} className="apply-btn" style={{ width: 'auto', padding: '0.5rem 2rem' }}>
+                Load more ({jobs.length} of {jobCount})
+              </button>
+            </div>
+          )}
         </div>
       )}
     </>
@@ -325,7 +383,7 @@ function App() {
       {error && !isAuthPage ? (
         <div style={{ textAlign: 'center', color: '#f43f5e', padding: '4rem' }}>
           <p>Error: {error}</p>
-          <button onClick={fetchJobs} className="apply-btn" style={{ marginTop: '1rem', width: 'auto', padding: '0.5rem 2rem' }}>
+          <button onClick={() => fetchJobs()} className="apply-btn" style={{ marginTop: '1rem', width: 'auto', padding: '0.5rem 2rem' }}>
             Try Again
           </button>
         </div>
@@ -0,0 +1,105 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+# Radius queries are answered from at most this many geohash cells
+MAX_COVER_CELLS = 16
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Geohash of a point. Nearby points share long prefixes, so a B-tree index on the
+    geohash answers "points in this cell" as a range scan.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+def parse_coordinates(latitude, longitude):
+    """
+    Returns (latitude, longitude) as floats, or (None, None) when either is missing or out of range.
+    """
+    try:
+        latitude = float(latitude)
+        longitude = float(longitude)
+    except (TypeError, ValueError):
+        return None, None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or math.isnan(latitude) or math.isnan(longitude):
+        return None, None
+    return latitude, longitude
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Returns (min_lat, max_lat, [(min_lon, max_lon), ...]) around a point. The longitude
+    range is split in two when it crosses the antimeridian.
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(-90.0, latitude - delta_lat)
+    max_lat = min(90.0, latitude + delta_lat)
+    cos_lat = math.cos(math.radians(latitude))
+    if max_lat >= 90 or min_lat <= -90 or cos_lat < 1e-9:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+    delta_lon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    if delta_lon >= 180:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+    min_lon = longitude - delta_lon
+    max_lon = longitude + delta_lon
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+def _cell_size(precision):
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+def _cell_steps(low, high, size, origin):
+    return range(int((low - origin) // size), int((min(high, -origin) - origin) // size) + 1)
+
+def covering_cells(min_lat, max_lat, lon_ranges):
+    """
+    The geohash prefixes of the finest grid that covers the bounding box with at
+    most MAX_COVER_CELLS cells.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_size, lon_size = _cell_size(precision)
+        lat_steps = _cell_steps(min_lat, max_lat, lat_size, -90.0)
+        lon_steps = [_cell_steps(low, high, lon_size, -180.0) for low, high in lon_ranges]
+        if len(lat_steps) * sum(len(steps) for steps in lon_steps) <= MAX_COVER_CELLS:
+            break
+    cells = set()
+    for lat_step in lat_steps:
+        # Encode the centre of each cell, clamped to the grid
+        latitude = min(89.999999, -90.0 + (lat_step + 0.5) * lat_size)
+        for steps in lon_steps:
+            for lon_step in steps:
+                longitude = min(179.999999, -180.0 + (lon_step + 0.5) * lon_size)
+                cells.add(encode_geohash(latitude, longitude, precision))
+    return sorted(cells)
@@ -0,0 +1,127 @@
+import threading
+from datetime import datetime
+from database import SessionLocal, QueryStat, find_known_job_ids
+
+# Stop paging a query once this share of a page's job ids is already known,
+# either stored or returned earlier in the cycle by another query
+EARLY_STOP_KNOWN_RATIO = 0.8
+# Queries averaging fewer new jobs per API call than this are demoted
+LOW_YIELD_PER_CALL = 1.0
+# A demoted query runs one page every DEMOTED_INTERVAL cycles, so its yield keeps being measured
+DEMOTED_INTERVAL = 3
+# Weight of the latest cycle in the yield moving average
+YIELD_ALPHA = 0.5
+
+class QueryPlanner:
+    """
+    Decides how many pages of each query to fetch in a scrape cycle from the yield of
+    new job ids the query had in earlier cycles, and stops paging a query early once
+    its pages are mostly jobs we already have. Yields and plans are kept in query_stats.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.plan_pages = {}
+        self.seen = set()
+        self.cycle = {}
+
+    def load(self):
+        db = SessionLocal()
+        try:
+            self.stats = {
+                stat.query: {
+                    'yield_per_call': stat.yield_per_call,
+                    'calls': stat.calls,
+                    'new_jobs': stat.new_jobs,
+                    'cycles_run': stat.cycles_run,
+                    'cycles_skipped': stat.cycles_skipped,
+                }
+                for stat in db.query(QueryStat).all()
+            }
+        finally:
+            db.close()
+
+    def plan(self, queries, max_pages):
+        """
+        Returns [(query, pages)] for this cycle, highest yield first. Queries without
+        history get max_pages, demoted ones 1 page every DEMOTED_INTERVAL cycles and
+        0 otherwise.
+        """
+        self.load()
+        self.seen = set()
+        self.cycle = {}
+        self.plan_pages = {}
+        for query in queries:
+            stat = self.stats.get(query)
+            if stat is None or stat['yield_per_call'] is None or stat['yield_per_call'] >= LOW_YIELD_PER_CALL:
+                pages = max_pages
+            else:
+                pages = 1 if stat['cycles_skipped'] + 1 >= DEMOTED_INTERVAL else 0
+            self.plan_pages[query] = pages
+
+        def priority(query):
+            stat = self.stats.get(query)
+            return -(stat['yield_per_call'] if stat and stat['yield_per_call'] is not None else float('inf'))
+        return [(query, self.plan_pages[query]) for query in sorted(queries, key=priority)]
+
+    def page_done(self, query, page, jobs):
+        """
+        Records one API call of a query and returns whether its next page is worth fetching.
+        """
+        ids = {job.get('job_id') for job in jobs if job.get('job_id')}
+        with self._lock:
+            unseen = ids - self.seen
+        known = find_known_job_ids(unseen) if unseen else set()
+        with self._lock:
+            new = unseen - known - self.seen
+            self.seen.update(ids)
+            cycle = self.cycle.setdefault(query, {'calls': 0, 'new_jobs': 0, 'stopped_at': None})
+            cycle['calls'] += 1
+            cycle['new_jobs'] += len(new)
+            if not ids:
+                return False
+            if 1 - len(new) / len(ids) >= EARLY_STOP_KNOWN_RATIO:
+                cycle['stopped_at'] = page
+                return False
+            return True
+
+    def summary(self):
+        calls = sum(cycle['calls'] for cycle in self.cycle.values())
+        return {
+            "queries_planned": sum(1 for pages in self.plan_pages.values() if pages),
+            "queries_skipped": sum(1 for pages in self.plan_pages.values() if not pages),
+            "pages_planned": sum(self.plan_pages.values()),
+            "api_calls": calls,
+            "stopped_early": sum(1 for cycle in self.cycle.values() if cycle['stopped_at']),
+            "new_jobs": sum(cycle['new_jobs'] for cycle in self.cycle.values()),
+        }
+
+    def finish(self):
+        """
+        Folds this cycle's yields into query_stats.
+        """
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            for query, pages in self.plan_pages.items():
+                stat = db.get(QueryStat, query) or QueryStat(query=query, calls=0, new_jobs=0, cycles_run=0, cycles_skipped=0)
+                stat.planned_pages = pages
+                cycle = self.cycle.get(query)
+                if not pages or cycle is None or not cycle['calls']:
+                    stat.cycles_skipped = (stat.cycles_skipped or 0) + 1
+                else:
+                    latest = cycle['new_jobs'] / cycle['calls']
+                    previous = stat.yield_per_call
+                    stat.yield_per_call = latest if previous is None else YIELD_ALPHA * latest + (1 - YIELD_ALPHA) * previous
+                    stat.calls = (stat.calls or 0) + cycle['calls']
+                    stat.new_jobs = (stat.new_jobs or 0) + cycle['new_jobs']
+                    stat.cycles_run = (stat.cycles_run or 0) + 1
+                    stat.cycles_skipped = 0
+                    stat.last_run_at = now
+                db.merge(stat)
+            db.commit()
+        except Exception as e:
+            print(f"Error saving query stats: {e}")
+            db.rollback()
+        finally:
+            db.close()
@@ -0,0 +1,63 @@
+import math
+
+# Working hours/days/weeks in a year, used to annualize the JSearch salary periods
+PERIOD_MULTIPLIERS = {
+    'YEAR': 1,
+    'MONTH': 12,
+    'WEEK': 52,
+    'DAY': 260,
+    'HOUR': 2080,
+}
+# Annualized values outside this range are almost always a mislabeled period
+MIN_ANNUAL_SALARY = 1000
+MAX_ANNUAL_SALARY = 5000000
+PERCENTILES = (10, 25, 50, 75, 90)
+
+def _amount(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) and value > 0 else None
+
+def annualize_salary(min_salary, max_salary, period):
+    """
+    Returns (annual_min, annual_max) for the JSearch job_min_salary, job_max_salary and
+    job_salary_period fields. When only one bound is given it is used for both, and
+    (None, None) is returned when there is no usable salary.
+    """
+    multiplier = PERIOD_MULTIPLIERS.get(str(period or '').upper())
+    low, high = _amount(min_salary), _amount(max_salary)
+    if multiplier is None or (low is None and high is None):
+        return None, None
+    low, high = low if low is not None else high, high if high is not None else low
+    low, high = sorted((low * multiplier, high * multiplier))
+    if low < MIN_ANNUAL_SALARY or high > MAX_ANNUAL_SALARY:
+        return None, None
+    return round(low, 2), round(high, 2)
+
+def salary_midpoint(annual_min, annual_max):
+    return (annual_min + annual_max) / 2
+
+def percentiles(values):
+    """
+    Linearly interpolated PERCENTILES of the values (the numpy and pandas default), rounded.
+    """
+    values = sorted(values)
+    result = {}
+    for p in PERCENTILES:
+        position = (len(values) - 1) * p / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, len(values) - 1)
+        result[f"p{p}"] = round(values[lower] + (values[upper] - values[lower]) * (position - lower))
+    return result
+
+def salary_distribution(by_type, by_city, top_cities=10):
+    """
+    The /analytics salary_percentiles payload from {group: [annual salary, ...]} dicts,
+    largest groups first and the cities cut to the top_cities largest.
+    """
+    def entries(groups, key, limit=None):
+        ordered = sorted(groups.items(), key=lambda item: (-len(item[1]), item[0]))[:limit]
+        return [{key: name, "count": len(values), **percentiles(values)} for name, values in ordered]
+    return {"employment_types": entries(by_type, "type"), "cities": entries(by_city, "name", top_cities)}
@@ -3,7 +3,7 @@ import os
 import requests
 import json
 from dotenv import load_dotenv
-from database import init_db, upsert_job
+from database import init_db, bulk_upsert_jobs, bump_data_version
 from datetime import datetime
 
 # Load environment variables
@@ -48,6 +48,7 @@ def main():
         jobs = data.get('data', [])
         print(f"Found {len(jobs)} jobs. Saving to database...")
         
+        job_records = []
         for job in jobs:
             # Extract relevant fields
             job_record = {
@@ -65,10 +66,12 @@ def main():
                 'posted_at': job.get('job_posted_at_datetime_utc'),
                 'raw_data': json.dumps(job)
             }
+            job_records.append(job_record)
             
-            upsert_job(job_record)
-            
-        print(f"Success! Saved {len(jobs)} jobs to the database.")
+        counts = bulk_upsert_jobs(job_records)
+        bump_data_version()
+        print(f"Success! Saved {counts['new']} new and {counts['changed']} changed jobs "
+              f"({counts['unchanged']} unchanged) to the database.")
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data: {e}")
@@ -0,0 +1,239 @@
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import engine, ScrapeCycle, ScrapeTask
+
+# A leased task whose worker sent no heartbeat for this long is handed to another worker
+LEASE_SECONDS = 60
+# Claims of a task before it is marked failed, so a page that keeps crashing workers can't stall its cycle
+MAX_ATTEMPTS = 5
+# Wait before a failed attempt is retried, multiplied by the attempts so far
+RETRY_DELAY_SECONDS = 10
+OPEN_STATUSES = ('pending', 'leased')
+
+class WorkQueue:
+    """
+    Database-backed queue of (query, page) scrape tasks shared by scrape worker processes.
+    A worker leases a task, renews the lease with heartbeats while it fetches and writes
+    the page, and marks the task done, which enqueues the query's next page. The task of a
+    crashed worker is claimed again once its lease runs out. Claims lock the task row
+    with FOR UPDATE SKIP LOCKED on PostgreSQL, on SQLite the claiming UPDATE holds the
+    database write lock.
+    """
+    def __init__(self, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def _insert(self):
+        return sqlite_insert(ScrapeTask) if engine.dialect.name == "sqlite" else pg_insert(ScrapeTask)
+
+    def enqueue_cycle(self, plan, planned=False):
+        """
+        Enqueues the first page of every query in plan, [(query, pages)] as returned by
+        QueryPlanner.plan. Queries planned for 0 pages are kept in the cycle's plan only.
+        Returns the cycle id.
+        """
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            cycle_id = conn.execute(
+                ScrapeCycle.__table__.insert().values(plan=json.dumps(dict(plan)), planned=planned, created_at=now)
+            ).inserted_primary_key[0]
+            tasks = [
+                {'cycle_id': cycle_id, 'query': query, 'page': 1, 'max_pages': pages, 'early_stop': planned,
+                 'status': 'pending', 'available_at': now, 'attempts': 0, 'updated_at': now}
+                for query, pages in plan if pages
+            ]
+            if tasks:
+                conn.execute(ScrapeTask.__table__.insert(), tasks)
+        return cycle_id
+
+    def expire_leases(self):
+        """
+        Marks failed the leased tasks whose lease ran out on their last attempt, instead
+        of letting them be claimed again. Returns the ids of their cycles, which may now
+        be finished (see finish_cycle).
+        """
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            return {
+                cycle_id for (cycle_id,) in conn.execute(
+                    update(ScrapeTask)
+                    .where(ScrapeTask.status == 'leased', ScrapeTask.available_at <= now, ScrapeTask.attempts >= self.max_attempts)
+                    .values(status='failed', lease_owner=None, error='lease expired', updated_at=now)
+                    .returning(ScrapeTask.cycle_id)
+                )
+            }
+
+    def claim(self, worker_id):
+        """
+        Leases the oldest claimable task to worker_id and returns it as a row, or None
+        when no task is claimable right now. Tasks whose lease ran out on their last
+        attempt are left to expire_leases.
+        """
+        now = datetime.utcnow()
+        claimable = (
+            select(ScrapeTask.id)
+            .where(ScrapeTask.status.in_(OPEN_STATUSES), ScrapeTask.available_at <= now, ScrapeTask.attempts < self.max_attempts)
+            .order_by(ScrapeTask.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        with engine.begin() as conn:
+            return conn.execute(
+                update(ScrapeTask)
+                .where(
+                    ScrapeTask.id == claimable, ScrapeTask.status.in_(OPEN_STATUSES), ScrapeTask.available_at <= now,
+                    ScrapeTask.attempts < self.max_attempts
+                )
+                .values(
+                    status='leased', lease_owner=worker_id, attempts=ScrapeTask.attempts + 1,
+                    available_at=now + timedelta(seconds=self.lease_seconds), updated_at=now
+                )
+                .returning(
+                    ScrapeTask.id, ScrapeTask.cycle_id, ScrapeTask.query, ScrapeTask.page, ScrapeTask.max_pages,
+                    ScrapeTask.early_stop, ScrapeTask.attempts
+                )
+            ).first()
+
+    def heartbeat(self, task_id, worker_id):
+        """
+        Extends the lease of a task. Returns False when the worker no longer holds it.
+        """
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            result = conn.execute(
+                update(ScrapeTask)
+                .where(ScrapeTask.id == task_id, ScrapeTask.lease_owner == worker_id, ScrapeTask.status == 'leased')
+                .values(available_at=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+            )
+            return result.rowcount == 1
+
+    @contextmanager
+    def keep_alive(self, task_id, worker_id):
+        """
+        Sends heartbeats for a task from a background thread while the block runs.
+        """
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    if not self.heartbeat(task_id, worker_id):
+                        print(f"Lost the lease on task {task_id}")
+                        return
+                except Exception as e:
+                    print(f"Error renewing the lease on task {task_id}: {e}")
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, task, worker_id, jobs_found, jobs_new, next_page):
+        """
+        Marks a leased task done and, with next_page, enqueues the query's next page in
+        the same transaction. Returns False when the lease had passed to another worker,
+        which then completes the task itself.
+        """
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            result = conn.execute(
+                update(ScrapeTask)
+                .where(ScrapeTask.id == task.id, ScrapeTask.lease_owner == worker_id, ScrapeTask.status == 'leased')
+                .values(status='done', jobs_found=jobs_found, jobs_new=jobs_new, error=None, updated_at=now)
+            )
+            if result.rowcount != 1:
+                return False
+            if next_page and task.page < task.max_pages:
+                stmt = self._insert().values(
+                    cycle_id=task.cycle_id, query=task.query, page=task.page + 1, max_pages=task.max_pages,
+                    early_stop=task.early_stop, status='pending', available_at=now, attempts=0, updated_at=now
+                )
+                conn.execute(stmt.on_conflict_do_nothing(index_elements=['cycle_id', 'query', 'page']))
+            return True
+
+    def fail(self, task, worker_id, error):
+        """
+        Releases a task after a failed attempt. It is retried after a delay, or marked
+        failed once it has had max_attempts.
+        """
+        now = datetime.utcnow()
+        if task.attempts >= self.max_attempts:
+            values = {'status': 'failed'}
+        else:
+            values = {'status': 'pending', 'available_at': now + timedelta(seconds=self.retry_delay * task.attempts)}
+        with engine.begin() as conn:
+            conn.execute(
+                update(ScrapeTask)
+                .where(ScrapeTask.id == task.id, ScrapeTask.lease_owner == worker_id, ScrapeTask.status == 'leased')
+                .values(lease_owner=None, error=str(error), updated_at=now, **values)
+            )
+
+    def has_open_tasks(self):
+        with engine.connect() as conn:
+            return conn.execute(select(ScrapeTask.id).where(ScrapeTask.status.in_(OPEN_STATUSES)).limit(1)).first() is not None
+
+    def progress(self, cycle_id=None):
+        """
+        Task counts per status, for one cycle or the whole queue.
+        """
+        query = select(ScrapeTask.status, func.count(ScrapeTask.id)).group_by(ScrapeTask.status)
+        if cycle_id is not None:
+            query = query.where(ScrapeTask.cycle_id == cycle_id)
+        with engine.connect() as conn:
+            return dict(conn.execute(query).all())
+
+    def finish_cycle(self, cycle_id):
+        """
+        Marks a cycle finished once none of its tasks is pending or leased. Only one caller
+        gets the cycle's summary back, the others get None: the plan, whether it came from
+        the QueryPlanner, and per query the calls, new jobs and the page it stopped early
+        at (the shape of QueryPlanner.cycle).
+        """
+        now = datetime.utcnow()
+        open_tasks = select(ScrapeTask.id).where(ScrapeTask.cycle_id == cycle_id, ScrapeTask.status.in_(OPEN_STATUSES)).exists()
+        with engine.begin() as conn:
+            result = conn.execute(
+                update(ScrapeCycle)
+                .where(ScrapeCycle.id == cycle_id, ScrapeCycle.finished_at.is_(None), ~open_tasks)
+                .values(finished_at=now)
+            )
+            if result.rowcount != 1:
+                return None
+            cycle = conn.execute(select(ScrapeCycle).where(ScrapeCycle.id == cycle_id)).first()
+            tasks = conn.execute(
+                select(ScrapeTask.query, ScrapeTask.page, ScrapeTask.max_pages, ScrapeTask.status,
+                       ScrapeTask.jobs_found, ScrapeTask.jobs_new)
+                .where(ScrapeTask.cycle_id == cycle_id)
+                .order_by(ScrapeTask.query, ScrapeTask.page)
+            ).all()
+
+        queries = {}
+        for task in tasks:
+            entry = queries.setdefault(task.query, {'calls': 0, 'new_jobs': 0, 'stopped_at': None})
+            if task.status != 'done':
+                continue
+            entry['calls'] += 1
+            entry['new_jobs'] += task.jobs_new or 0
+            # A last page with jobs before max_pages means paging stopped early
+            entry['stopped_at'] = task.page if task.jobs_found and task.page < task.max_pages else None
+        return {
+            'cycle_id': cycle_id,
+            'plan': json.loads(cycle.plan),
+            'planned': cycle.planned,
+            'created_at': cycle.created_at,
+            'finished_at': now,
+            'queries': queries,
+            'tasks': {status: sum(1 for task in tasks if task.status == status) for status in ('done', 'failed')},
+            'jobs_found': sum(task.jobs_found or 0 for task in tasks),
+            'jobs_new': sum(task.jobs_new or 0 for task in tasks),
+        }